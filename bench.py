@@ -0,0 +1,811 @@
+#!/usr/bin/env python3
+"""
+Benchmarks and stress checks for trf and choremate.
+
+    python bench.py <name> [args]
+
+Each benchmark works in a temporary directory and prints its results.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+def load_trf(trf_home: str):
+    """
+    Import modules.trf using trf_home as its home directory.
+    """
+    sys.argv = [sys.argv[0], trf_home]
+    import modules.trf as trf
+
+    return trf
+
+
+def conflicts(num_threads: int = 8, num_completions: int = 25):
+    """
+    Hammer a single tracker with record_completion from many threads, each
+    with its own connection, and check that every commit succeeds and that
+    the merged history is exactly what serial recording would have produced.
+    The first thread also compacts the archive with each of its completions,
+    so that the monthly summary is created and changed under conflicts, and
+    the estimators must still have been given one interval per completion.
+    """
+    import transaction
+    from ZODB.POSException import ConflictError
+
+    num_threads = int(num_threads)
+    num_completions = int(num_completions)
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    doc_id = trf.tracker_manager.add_tracker("stress")
+    start = datetime(2024, 1, 1, 12, 0)
+    barrier = threading.Barrier(num_threads)
+    retries = []
+    errors = []
+
+    def worker(n):
+        tm = transaction.TransactionManager()
+        connection = trf.db.open(transaction_manager=tm)
+        try:
+            barrier.wait()
+            for i in range(num_completions):
+                dt = start + timedelta(minutes=i * num_threads + n)
+                for attempt in range(10):
+                    tracker = connection.root()["trackers"][doc_id]
+                    tracker.record_completion((dt, timedelta(0)))
+                    if n == 0:
+                        tracker.compact()
+                    try:
+                        tm.commit()
+                        break
+                    except ConflictError:
+                        tm.abort()
+                        retries.append(n)
+                else:
+                    errors.append(dt)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(num_threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    trf.connection.sync()
+    tracker = trf.tracker_manager.trackers[doc_id]
+    total = num_threads * num_completions
+    expected = [
+        (start + timedelta(minutes=i), timedelta(0))
+        for i in range(total)
+    ][-trf.Tracker.max_history:]
+    print(f"threads:     {num_threads}")
+    print(f"commits:     {total} in {elapsed:.3f}s ({total / elapsed:.0f}/s)")
+    print(f"retries:     {len(retries)}")
+    print(f"failures:    {len(errors)}")
+    streamed = tracker.get_estimators()['quantile'].quantiles[1].count
+    print(f"history ok:  {tracker.history == expected}")
+    print(f"intervals:   {streamed} of {total - 1}")
+    return not errors and not retries and tracker.history == expected and streamed == total - 1
+
+
+def make_trackers(trf, root, num_trackers: int):
+    """
+    Fill root with settings and num_trackers trackers, each with a full
+    weekly history.
+    """
+    import random
+
+    from modules.store import default_settings
+
+    random.seed(0)
+    start = datetime(2024, 1, 1, 12, 0)
+    root["settings"] = default_settings()
+    trackers = root["trackers"] = {}
+    for doc_id in range(1, num_trackers + 1):
+        tracker = trf.Tracker(f"tracker {doc_id} @home", doc_id)
+        tracker.record_completions([
+            (start + timedelta(days=7 * i, hours=random.randint(-12, 12)), timedelta(0))
+            for i in range(trf.Tracker.max_history)
+        ])
+        trackers[doc_id] = tracker
+    return trackers
+
+
+def compression(num_trackers: int = 2000, num_commits: int = 200):
+    """
+    Compare datastore size, load time and commit latency for uncompressed,
+    zlib and lzma compressed records.
+    """
+    import random
+
+    import transaction
+    import ZODB
+    import ZODB.FileStorage
+
+    num_trackers = int(num_trackers)
+    num_commits = int(num_commits)
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    from modules.compress import CompressedStorage
+
+    def open_db(path, codec):
+        storage = CompressedStorage(ZODB.FileStorage.FileStorage(path), codec)
+        return ZODB.DB(storage)
+
+    print(f"{'codec':<6} {'size':>10} {'load':>9} {'commit':>9}")
+    for codec in (None, "zlib", "lzma"):
+        path = os.path.join(tempfile.mkdtemp(prefix="trf-bench-"), "trf.fs")
+        db = open_db(path, codec)
+        tm = transaction.TransactionManager()
+        trackers = make_trackers(trf, db.open(transaction_manager=tm).root(), num_trackers)
+        tm.commit()
+
+        started = time.perf_counter()
+        for _ in range(num_commits):
+            tracker = trackers[random.randint(1, num_trackers)]
+            tracker.record_completion((datetime.now(), timedelta(0)))
+            tm.commit()
+        commit = (time.perf_counter() - started) / num_commits
+        db.close()
+
+        started = time.perf_counter()
+        db = open_db(path, codec)
+        trackers = db.open().root()["trackers"]
+        for tracker in trackers.values():
+            tracker.history
+        load = time.perf_counter() - started
+        db.close()
+        size = os.path.getsize(path)
+        print(f"{codec or 'none':<6} {size:>10,} {load:>8.3f}s {commit * 1000:>7.2f}ms")
+
+
+def compaction(num_completions: int = 200):
+    """
+    Check that the monthly summaries keep every interval and month, count
+    each interval once and never a negative one when completions are
+    recorded out of order, recorded again or removed, and that the
+    estimators are given each interval once until the completions are
+    removed.
+    """
+    num_completions = int(num_completions)
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    Tracker = trf.Tracker
+    start = datetime(2024, 1, 1, 12, 0)
+    week = timedelta(days=7)
+    weekly = [(start + i * week, timedelta(0)) for i in range(num_completions)]
+    tracker = Tracker("weekly", 1)
+
+    def streamed():
+        return tracker.get_estimators()['quantile'].quantiles[1].count
+
+    def counted():
+        rows = tracker.monthly_summary()
+        return (
+            sum(row[1] for row in rows), len(rows),
+            min((row[4] for row in rows), default=0), sum(row[2] for row in rows))
+
+    for completion in weekly:
+        tracker.record_completion(completion)
+        tracker.compact()
+    intervals, months, low, total = counted()
+    in_order = (intervals, low) == (num_completions - 1, week.total_seconds())
+    latest = tracker.last_compacted
+
+    # a completion before any that were compacted
+    early = start - timedelta(days=30)
+    tracker.record_completion((early, timedelta(0)))
+    tracker.compact()
+    count, num_months, low, total = counted()
+    late = (
+        (count, num_months) == (intervals + 1, months) and low > 0
+        and total == (weekly[-1][0] - early).total_seconds()
+        and tracker.last_compacted == latest)
+
+    # and ones between two that were compacted, in different months and
+    # in the same month
+    tracker.record_completion((start + 4 * week + timedelta(days=4), timedelta(0)))
+    tracker.record_completion((start + 10 * week + timedelta(days=3), timedelta(0)))
+    tracker.compact()
+    count, num_months, low, total = counted()
+    between = (
+        (count, num_months) == (intervals + 3, months) and low > 0
+        and total == (weekly[-1][0] - early).total_seconds()
+        and streamed() == count)
+
+    # completions that were compacted recorded again - only the first
+    # and last of each month are known
+    tracker.record_completions([weekly[0], weekly[4], *tracker.history])
+    tracker.compact()
+    again = counted()[:2] == (intervals + 3, months)
+
+    tracker.remove_completions()
+    removed = (
+        counted()[0] == 0 and not tracker.archive and tracker.summary is None
+        and streamed() == 0)
+
+    print(f"in order:    {in_order} ({intervals} intervals in {months} months)")
+    print(f"late:        {late}")
+    print(f"between:     {between}")
+    print(f"again:       {again}")
+    print(f"removed:     {removed}")
+    return in_order and late and between and again and removed
+
+def backups(sizes: str = "500,2000,8000"):
+    """
+    Time the daily zip backup and compare its size with the datastore for
+    each codec and for datastores of increasing size.
+    """
+    import logging
+
+    import transaction
+    import ZODB
+    import ZODB.FileStorage
+
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    from modules.backup import backup_to_zip, verify_zip
+
+    logger = logging.getLogger("bench")
+    print(f"{'trackers':>8} {'datastore':>11} {'codec':<8} {'backup':>11} {'ratio':>6} {'time':>8}")
+    for num_trackers in map(int, sizes.split(",")):
+        home = tempfile.mkdtemp(prefix="trf-bench-")
+        os.makedirs(os.path.join(home, "backup"))
+        db = ZODB.DB(ZODB.FileStorage.FileStorage(os.path.join(home, "trf.fs")))
+        tm = transaction.TransactionManager()
+        make_trackers(trf, db.open(transaction_manager=tm).root(), num_trackers)
+        tm.commit()
+        db.close()
+        size = os.path.getsize(os.path.join(home, "trf.fs"))
+        for codec in ("stored", "deflate", "lzma"):
+            started = time.perf_counter()
+            ok, backup_zip = backup_to_zip(home, "today", logger, codec)
+            elapsed = time.perf_counter() - started
+            backup_zip = backup_zip.split(": ", 1)[1]
+            if not verify_zip(backup_zip)[0]:
+                return False
+            zipped = os.path.getsize(backup_zip)
+            os.rename(backup_zip, f"{backup_zip}.{codec}")
+            print(f"{num_trackers:>8} {size:>11,} {codec:<8} {zipped:>11,} {zipped / size:>6.2f} {elapsed:>7.3f}s")
+
+
+def info(num_toggles: int = 2000, num_trackers: int = 20):
+    """
+    Toggle between the info displays of a few trackers and the help screen,
+    with and without the wrap and tracker info caches.
+    """
+    num_toggles = int(num_toggles)
+    num_trackers = int(num_trackers)
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    trackers = list(make_trackers(trf, {}, num_trackers).values())
+    with open(os.path.join(os.path.dirname(trf.__file__), "README.txt")) as fo:
+        help_text = fo.read()
+
+    def toggle(cached):
+        started = time.perf_counter()
+        for i in range(num_toggles):
+            if not cached:
+                trf.wrap_text.cache_clear()
+                for tracker in trackers:
+                    tracker._v_info_text = None
+            trackers[i % num_trackers].get_tracker_info()
+            trf.wrap(help_text, 0)
+        return (time.perf_counter() - started) / num_toggles
+
+    uncached = toggle(False)
+    cached = toggle(True)
+    print(f"toggles:   {num_toggles} over {num_trackers} trackers and help")
+    print(f"uncached:  {uncached * 1000:.3f}ms per toggle")
+    print(f"cached:    {cached * 1000:.3f}ms per toggle ({uncached / cached:.0f}x)")
+    print(f"wrap:      {trf.wrap_text.cache_info()}")
+
+
+def navigation(num_trackers: int = 5000, num_moves: int = 1000):
+    """
+    Time listing a page of the tracker list when paging, which reuses the
+    sort order, and when scrolling a virtual list a row at a time, against
+    listing with a full resort.
+    """
+    num_trackers = int(num_trackers)
+    num_moves = int(num_moves)
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    manager = trf.tracker_manager
+    manager.trackers = make_trackers(trf, {}, num_trackers)
+    manager.publish_all = True
+    manager.publish()
+
+    def moves(move, resort):
+        manager.list_trackers()
+        started = time.perf_counter()
+        for _ in range(num_moves):
+            move()
+            manager.list_trackers(resort)
+        return (time.perf_counter() - started) / num_moves
+
+    def page():
+        if manager.active_page == manager.num_pages - 1:
+            manager.active_page = 0
+        else:
+            manager.active_page += 1
+
+    def scroll():
+        if not manager.scroll(1):
+            manager.top = 0
+
+    resorted = moves(page, True)
+    paged = moves(page, False)
+    manager.virtual = True
+    scrolled = moves(scroll, False)
+    print(f"trackers:  {num_trackers}")
+    print(f"resorted:  {resorted * 1000:.3f}ms per page")
+    print(f"paged:     {paged * 1000:.3f}ms per page ({resorted / paged:.0f}x)")
+    print(f"scrolled:  {scrolled * 1000:.3f}ms per row ({manager.page_size()} rows shown)")
+
+
+def refresh(num_trackers: int = 100000):
+    """
+    Time TrackerManager.refresh_info with the batched NumPy statistics and
+    with compute_info for each tracker, and an η change, which only
+    updates the bounds. The first batched refresh also packs every history.
+    """
+    num_trackers = int(num_trackers)
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    manager = trf.tracker_manager
+    manager.trackers = make_trackers(trf, {}, num_trackers)
+
+    def timed():
+        started = time.perf_counter()
+        manager.refresh_info()
+        return time.perf_counter() - started
+
+    first = timed()
+    batched = timed()
+    numpy = trf.forecast.np
+    trf.forecast.np = None
+    scalar = timed()
+    trf.forecast.np = numpy
+
+    # as update_settings does, without saving
+    manager.settings["η"] = manager.snapshot["η"] + 1
+    started = time.perf_counter()
+    manager.snapshot_settings()
+    manager.refresh_bounds()
+    bounds = time.perf_counter() - started
+    print(f"trackers:  {num_trackers}")
+    print(f"scalar:    {scalar:.3f}s")
+    print(f"first:     {first:.3f}s")
+    print(f"batched:   {batched:.3f}s ({scalar / batched:.0f}x)")
+    print(f"η change:  {bounds:.3f}s")
+    return batched < 1
+
+
+def quick_record(num_records: int = 200):
+    """
+    Start `trf daemon` and time recording completions through its socket,
+    both per request and for a complete `trf record` command.
+    """
+    import subprocess
+
+    num_records = int(num_records)
+    home = tempfile.mkdtemp(prefix="trf-bench-")
+    trf = load_trf(home)
+    doc_id = trf.tracker_manager.add_tracker("quick record")
+    trf.tracker_manager.close()
+    from modules.client import request, socket_path
+
+    path = socket_path(home)
+    daemon = subprocess.Popen([sys.executable, "-m", "modules", home, "daemon"], stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            if request(path, "ping")[0]:
+                break
+            time.sleep(0.1)
+        else:
+            print("the daemon did not start")
+            return False
+        started = time.perf_counter()
+        for i in range(num_records):
+            ok, msg = request(path, "record", str(doc_id), f"now, {i}m")
+            if not ok:
+                print(msg)
+                return False
+        per_request = (time.perf_counter() - started) / num_records
+
+        started = time.perf_counter()
+        command = subprocess.run([sys.executable, "-m", "modules", home, "record", "quick record"], capture_output=True)
+        elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"])
+        interpreter = time.perf_counter() - started
+    finally:
+        daemon.terminate()
+        daemon.wait()
+    print(f"requests:  {num_records} at {per_request * 1000:.2f}ms each")
+    print(f"command:   {elapsed * 1000:.0f}ms for trf record ({interpreter * 1000:.0f}ms to start python)")
+    return command.returncode == 0
+
+
+# seconds - startup fails if any of these is exceeded
+STARTUP_BUDGET = {
+    "modules.client": 0.03,
+    "modules.tracker": 0.15,
+    "modules.store": 0.3,
+    "modules.ui": 0.8,
+    "first paint": 1.5,
+}
+
+FIRST_PAINT = """
+import sys, time
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
+with create_pipe_input() as inp, create_app_session(input=inp, output=DummyOutput()):
+    import modules.ui as ui
+
+    def painted(app):
+        print(time.time())
+        app.exit()
+
+    ui.app.after_render += painted
+    ui.main()
+"""
+
+
+def name_search(num_trackers: int = 100000, num_queries: int = 200):
+    """
+    Time finding the trackers whose names have words beginning with a
+    query, as F does for each key typed, with the name index and with a
+    scan of every name.
+    """
+    import random
+
+    num_trackers = int(num_trackers)
+    num_queries = int(num_queries)
+    trf = load_trf(tempfile.mkdtemp(prefix="trf-bench-"))
+    from modules.names import NameIndex, name_tokens, new_name_index, query_tokens
+
+    manager = trf.tracker_manager
+    manager.trackers = make_trackers(trf, {}, num_trackers)
+    started = time.perf_counter()
+    manager.names = NameIndex(new_name_index(manager.trackers.values()))
+    built = time.perf_counter() - started
+    manager.publish_all = True
+    manager.publish()
+    manager.list_trackers(True)
+    random.seed(1)
+    queries = [f"tr {random.randint(1, num_trackers)}"[:-1] for _ in range(num_queries)]
+
+    def scan(query):
+        words = query_tokens(query)
+        return sorted(
+            manager.positions[tracker.doc_id]
+            for tracker in manager.trackers.values()
+            if all(any(token.startswith(word) for token in name_tokens(tracker.name)) for word in words)
+        )
+
+    def timed(find):
+        started = time.perf_counter()
+        for query in queries:
+            find(query)
+        return (time.perf_counter() - started) / num_queries
+
+    def indexed(query):
+        return manager.find_positions(manager.find_trackers(query))
+
+    assert all(scan(query) == indexed(query) for query in queries[:5])
+    indexed = timed(indexed)
+    scanned = timed(scan)
+    print(f"trackers:  {num_trackers}")
+    print(f"built:     {built:.3f}s")
+    print(f"scanned:   {scanned * 1000:.3f}ms per query")
+    print(f"indexed:   {indexed * 1000:.3f}ms per query ({scanned / indexed:.0f}x)")
+
+
+def startup(num_trackers: int = 1000):
+    """
+    Check the time to import each layer of trf, from `python -X importtime`,
+    and from starting python to the first paint of the list of
+    num_trackers trackers against STARTUP_BUDGET.
+    """
+    import subprocess
+
+    import transaction
+    import ZODB
+    import ZODB.FileStorage
+
+    num_trackers = int(num_trackers)
+    home = tempfile.mkdtemp(prefix="trf-bench-")
+    trf = load_trf(home)
+    db = ZODB.DB(ZODB.FileStorage.FileStorage(os.path.join(home, "trf.fs")))
+    tm = transaction.TransactionManager()
+    root = db.open(transaction_manager=tm).root()
+    make_trackers(trf, root, num_trackers)
+    root["next_id"] = num_trackers + 1
+    tm.commit()
+    db.close()
+    env = dict(os.environ, TRFHOME=home)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    times = {}
+    for module in list(STARTUP_BUDGET)[:-1]:
+        imported = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            env=env, cwd=cwd, capture_output=True, text=True)
+        for line in imported.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            parts = [x.strip() for x in line.split("|")]
+            if len(parts) == 3 and parts[2] == module:
+                times[module] = int(parts[1]) / 1e6
+    started = time.time()
+    painted = subprocess.run(
+        [sys.executable, "-c", FIRST_PAINT], env=env, cwd=cwd, capture_output=True, text=True)
+    times["first paint"] = float(painted.stdout.split()[0]) - started
+
+    ok = True
+    print(f"{'':<16} {'time':>7} {'budget':>7}")
+    for name, budget in STARTUP_BUDGET.items():
+        within = times.get(name, budget + 1) <= budget
+        ok = ok and within
+        print(f"{name:<16} {times.get(name, 0):>6.3f}s {budget:>6.3f}s{'' if within else '  over budget'}")
+    return ok
+
+
+def make_chores(db_path: str, num_chores: int):
+    """
+    Create the choremate database db_path with num_chores chores, most
+    with a forecast in the next three months and some overdue.
+    """
+    import random
+
+    from modules.model import DatabaseManager
+
+    now = round(datetime.now().timestamp())
+    dbm = DatabaseManager(db_path)
+    rows = []
+    for i in range(num_chores):
+        mean = random.randint(1, 90) * 86400
+        # mostly completed on time, one in ten overdue
+        last = now - random.randint(0, mean + mean // 10)
+        # some chores have a single completion and so no forecast
+        forecast = i % 10 != 0
+        rows.append((
+            f"chore {i}", last - 10 * mean, last - 5 * mean, last,
+            mean if forecast else 0, mean // 5, mean // 8, last + mean if forecast else 0,
+        ))
+    dbm.conn.executemany(
+        """
+        INSERT INTO Chores (name, created, first_completion, last_completion,
+            mean_interval, mad_more, mad_less, next)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+        rows,
+    )
+    dbm.conn.commit()
+    dbm.close()
+
+
+# seconds - due_report fails if the import or the complete command exceeds these
+DUE_BUDGET = {
+    "modules.headless": 0.08,
+    "chores due": 0.25,
+}
+
+
+def due_report(num_chores: int = 50000, runs: int = 5):
+    """
+    Time `chores due --within 2d --format tsv` against num_chores chores,
+    from starting python to the last row, and check that it imports
+    neither textual nor rich and runs while another connection is
+    writing, i.e., that it takes no write lock.
+    """
+    import sqlite3
+    import subprocess
+
+    num_chores, runs = int(num_chores), int(runs)
+    db_path = os.path.join(tempfile.mkdtemp(prefix="chores-bench-"), "chores.db")
+    make_chores(db_path, num_chores)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, "chores.py", "due", "--within", "2d", "--format", "tsv", "--db", db_path]
+
+    imported = subprocess.run(
+        [sys.executable, "-X", "importtime", *command[1:]], cwd=cwd, capture_output=True, text=True)
+    modules = {}
+    for line in imported.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [x.strip() for x in line.split("|")]
+        if len(parts) == 3 and parts[1].isdigit():
+            modules[parts[2]] = int(parts[1]) / 1e6
+    heavy = [name for name in ("textual", "rich", "modules.controller") if name in modules]
+
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+    locked = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+    writer.rollback()
+    writer.close()
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        report = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+        times.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"])
+    interpreter = time.perf_counter() - started
+    times = {"modules.headless": modules.get("modules.headless", 0), "chores due": min(times)}
+
+    print(f"{num_chores} chores, {len(report.stdout.splitlines()) - 1} due within 2d")
+    ok = report.returncode == 0 and not heavy and locked.returncode == 0
+    for name, budget in DUE_BUDGET.items():
+        within = times[name] <= budget
+        ok = ok and within
+        print(f"{name:<16} {times[name]:>6.3f}s {budget:>6.3f}s{'' if within else '  over budget'}")
+    print(f"({interpreter:.3f}s to start python)")
+    if heavy:
+        print(f"imported {', '.join(heavy)}")
+    if locked.returncode:
+        print(f"failed while the database was being written: {locked.stderr.strip().splitlines()[-1]}")
+    if report.returncode:
+        print(report.stderr)
+    return ok
+
+
+# seconds - headless_writes fails if a command takes longer than these
+# from starting python
+WRITE_BUDGET = {
+    "chores add": 0.1,
+    "chores record": 0.1,
+    "chores bulk-record": 0.5,
+}
+
+
+def headless_writes(num_chores: int = 50000, num_records: int = 1000, runs: int = 5):
+    """
+    Time `chores add`, `chores record` by name and `chores bulk-record`
+    of num_records completions against num_chores chores, and check that
+    they write nothing but the database.
+    """
+    import subprocess
+
+    num_chores, num_records, runs = int(num_chores), int(num_records), int(runs)
+    tmpdir = tempfile.mkdtemp(prefix="chores-bench-")
+    db_path = os.path.join(tmpdir, "chores.db")
+    make_chores(db_path, num_chores)
+    bulk_path = os.path.join(tmpdir, "bulk.tsv")
+    now = datetime.now()
+    with open(bulk_path, "w") as f:
+        for i in range(num_records):
+            at = now - timedelta(minutes=num_records - i)
+            f.write(f"chore {i * 7 % num_chores}\t{at.strftime('%Y-%m-%d %H:%M')}\n")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    def timed(*args):
+        best = None
+        for i in range(runs):
+            # a new name each time for add
+            command = [a.format(i) for a in args]
+            started = time.perf_counter()
+            done = subprocess.run(
+                [sys.executable, os.path.join(cwd, "chores.py"), *command, "--db", db_path],
+                # run where any stray file written would show up
+                cwd=tmpdir, capture_output=True, text=True)
+            elapsed = time.perf_counter() - started
+            if done.returncode:
+                print(done.stderr)
+                return None
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"])
+    interpreter = time.perf_counter() - started
+    times = {
+        "chores add": timed("add", "new chore {}"),
+        "chores record": timed("record", "Chore 4242", "--at", "now"),
+        "chores bulk-record": timed("bulk-record", bulk_path),
+    }
+
+    stray = sorted(set(os.listdir(tmpdir)) - {"chores.db", "bulk.tsv"})
+    ok = not stray
+    print(f"{'':<20} {'time':>7} {'budget':>7}")
+    for name, budget in WRITE_BUDGET.items():
+        within = times[name] is not None and times[name] <= budget
+        ok = ok and within
+        print(f"{name:<20} {times[name] or 0:>6.3f}s {budget:>6.3f}s{'' if within else '  over budget'}")
+    print(f"({interpreter:.3f}s to start python, {num_records} completions in the bulk file)")
+    if stray:
+        print(f"also wrote {', '.join(stray)}")
+    return ok
+
+
+def chores_first_paint(num_chores: int = 50000):
+    """
+    Time from mounting TextualView to the first list of num_chores chores
+    shown, without a snapshot and then from the snapshot saved by the
+    first run, and the time until the snapshot is reconciled.
+    """
+    import asyncio
+
+    from modules.controller import Controller
+    from modules.view import TextualView
+
+    num_chores = int(num_chores)
+    db_path = os.path.join(tempfile.mkdtemp(prefix="chores-bench-"), "chores.db")
+    make_chores(db_path, num_chores)
+
+    async def run():
+        controller = Controller(db_path)
+        app = TextualView(controller)
+        started = time.perf_counter()
+        shown = {}
+        async with app.run_test(size=(100, 30)) as pilot:
+            shown["first"] = time.perf_counter() - started
+            while app.stale:
+                await pilot.pause(0.01)
+            shown["live"] = time.perf_counter() - started
+        controller.db_manager.close()
+        return shown
+
+    cold = asyncio.run(run())
+    warm = asyncio.run(run())
+    print(f"without snapshot: {cold['first']:.3f}s to the live list")
+    print(f"with snapshot:    {warm['first']:.3f}s to the snapshot, {warm['live']:.3f}s to the live list")
+    return warm["first"] < cold["first"]
+
+
+def chore_search(num_chores: int = 50000, num_queries: int = 200):
+    """
+    Time search_chores for a page of matches as a query is typed, from
+    one character to a whole name, and is_chore_unique, for num_chores
+    chores.
+    """
+    from modules.controller import Controller
+
+    num_chores, num_queries = int(num_chores), int(num_queries)
+    db_path = os.path.join(tempfile.mkdtemp(prefix="chores-bench-"), "chores.db")
+    make_chores(db_path, num_chores)
+    controller = Controller(db_path)
+    typed = "chore 4242"
+    slowest = 0
+    for i in range(1, len(typed) + 1):
+        started = time.perf_counter()
+        for _ in range(num_queries // len(typed) + 1):
+            matches = controller.search_chores(typed[:i], 11)
+        elapsed = (time.perf_counter() - started) / (num_queries // len(typed) + 1)
+        slowest = max(slowest, elapsed)
+        print(f"{typed[:i]!r:<14} {elapsed * 1000:>7.2f}ms  {len(matches)} shown")
+    started = time.perf_counter()
+    for i in range(num_queries):
+        controller.is_chore_unique(f"chore {i * 7}")
+    unique = (time.perf_counter() - started) / num_queries
+    print(f"is_chore_unique {unique * 1e6:.0f}µs")
+    controller.db_manager.close()
+    return matches[0][1] == typed and slowest < 0.1
+
+
+BENCHMARKS = {
+    "conflicts": conflicts,
+    "compression": compression,
+    "compaction": compaction,
+    "backups": backups,
+    "info": info,
+    "navigation": navigation,
+    "refresh": refresh,
+    "name_search": name_search,
+    "quick_record": quick_record,
+    "startup": startup,
+    "due_report": due_report,
+    "headless_writes": headless_writes,
+    "chores_first_paint": chores_first_paint,
+    "chore_search": chore_search,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"usage: {sys.argv[0]} {{{','.join(BENCHMARKS)}}} [args]")
+        sys.exit(2)
+    name, args = sys.argv[1], sys.argv[2:]
+    ok = BENCHMARKS[name](*args)
+    sys.exit(0 if ok in (None, True) else 1)
@@ -1,9 +1,6 @@
 #!/usr/bin/env python3
-from modules.controller import Controller
 from modules.common import log_msg
-
-# from modules.view import ClickView
-from modules.view import TextualView
+from modules import common, headless
 import os
 import sys
 import json
@@ -13,20 +10,22 @@ CONFIG_FILE = os.path.expanduser("~/.choremate_config")
 pos_to_id = {}
 
 
+def get_choremate_home() -> str:
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, "r") as f:
+            return json.load(f).get("CHOREMATEHOME")
+    envhome = os.environ.get("CHOREMATEHOME")
+    if envhome:
+        return envhome
+    userhome = os.path.expanduser("~")
+    return os.path.join(userhome, ".choremate_home/")
+
+
 def process_arguments() -> tuple:
     """
     Process sys.argv to get the necessary parameters, like the database file location.
     """
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "r") as f:
-            choremate_home = json.load(f).get("CHOREMATEHOME")
-    else:
-        envhome = os.environ.get("CHOREMATEHOME")
-        if envhome:
-            choremate_home = envhome
-        else:
-            userhome = os.path.expanduser("~")
-            choremate_home = os.path.join(userhome, ".choremate_home/")
+    choremate_home = get_choremate_home()
 
     screenshot_dir = os.path.join(choremate_home, "screenshots")
     # backup_dir = os.path.join(choremate_home, "backup")
@@ -52,12 +51,21 @@ def process_arguments() -> tuple:
     return choremate_home, db_path, reset
 
 
-# Get command-line arguments: Process the command-line arguments to get the database file location
-# choremate_home, backup_dir, log_dir, db_path, reset = process_arguments()
-choremate_home, db_path, reset = process_arguments()
+def main():
+    if sys.argv[1:] and sys.argv[1] in headless.COMMANDS:
+        # reports straight from the database without loading the display
+        db_path = os.path.join(get_choremate_home(), "choremate.db")
+        sys.exit(headless.main(db_path, sys.argv[1:]))
 
+    common.LOG_FILE = "log_msg.md"
+    from modules.controller import Controller
 
-def main():
+    # from modules.view import ClickView
+    from modules.view import TextualView
+
+    # Get command-line arguments: Process the command-line arguments to get the database file location
+    # choremate_home, backup_dir, log_dir, db_path, reset = process_arguments()
+    choremate_home, db_path, reset = process_arguments()
     log_msg(f"Using database: {db_path}, reset: {reset}")
     controller = Controller(db_path, reset=reset)
     view = TextualView(controller)
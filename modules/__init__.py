@@ -1,5 +1,8 @@
 import os, sys
 
+# trf [log_level] [home] [command [args]]
+COMMANDS = ('restore', 'daemon', 'record', 'ping')
+
 def process_arguments():
     """
     Process sys.argv to get the necessary parameters, like the database file location.
@@ -15,7 +18,7 @@ def process_arguments():
             log_level = log_level
 
     envhome = os.environ.get('TRFHOME')
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] not in COMMANDS:
         trf_home = sys.argv[1]
     elif envhome:
         trf_home = envhome
@@ -26,10 +29,18 @@ def process_arguments():
 
     db_path = os.path.join(trf_home, "trf.fs")
 
-    restore = len(sys.argv) > 2 and sys.argv[2] == 'restore'
+    # the arguments after home, if given
+    args = sys.argv[2:] if len(sys.argv) > 1 and sys.argv[1] not in COMMANDS else sys.argv[1:]
+    command = args[0] if args and args[0] in COMMANDS else None
+    command_args = args[1:]
+
+    restore = command == 'restore'
+
+    # compress new datastore records with this codec: 'zlib' or 'lzma'
+    compression = os.environ.get('TRFCOMPRESS', '')
 
-    return trf_home, log_level, restore, backup_dir, db_path
+    return trf_home, log_level, restore, backup_dir, db_path, compression, command, command_args
 
 # Get command-line arguments: Process the command-line arguments to get the database file location
-trf_home, log_level, restore, backup_dir, db_path = process_arguments()
+trf_home, log_level, restore, backup_dir, db_path, compression, command, command_args = process_arguments()
 
@@ -1,6 +1,35 @@
 import sys
+from datetime import datetime
 
-from .trf import main # This imports `main` from `trf/trf.py`
+from . import command, command_args, restore, trf_home
+
+def main():
+    if restore:
+        # trf [log_level] home_dir restore [yymmddThhmm]
+        # restore before importing trf since that opens the datastore
+        import logging
+        from .backup import restore as restore_backup
+        logging.basicConfig(level=logging.INFO)
+        to_time = datetime.strptime(command_args[0], "%y%m%dT%H%M") if command_args else None
+        ok, msg = restore_backup(trf_home, logging.getLogger('trf'), to_time)
+        print(msg)
+        sys.exit(0 if ok else 1)
+
+    if command in ('record', 'ping'):
+        # trf [home] record <name> [<completion>] - sent to the running trf
+        # without importing it
+        from .client import main as client_main
+        sys.exit(client_main(trf_home, command, command_args))
+
+    if command == 'daemon':
+        # trf [log_level] [home] daemon - hold the datastore open and serve
+        # commands without the full screen app
+        from .trf import daemon
+        daemon()
+        return
+
+    from .trf import main as trf_main # This imports `main` from `trf/trf.py`
+    trf_main()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,167 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+logger = logging.getLogger()
+
+# Alarm engine
+#
+# A tracker is 'cold' before its early time, 'cool' from early, 'warm' from
+# timely and 'hot' from tardy. The engine keeps a min-heap of every
+# tracker's upcoming crossings and sleeps until the next one. Updating a
+# tracker just pushes its new crossings with a higher version - entries
+# with an old version are discarded when they reach the top of the heap.
+
+STATES = ('cold', 'cool', 'warm', 'hot')
+
+
+class AlarmEvent(NamedTuple):
+    doc_id: int
+    name: str
+    state: str
+    when: datetime
+
+
+def state_at(now: datetime, early: datetime, timely: datetime, tardy: datetime) -> str:
+    if now >= tardy:
+        return 'hot'
+    if now >= timely:
+        return 'warm'
+    if now >= early:
+        return 'cool'
+    return 'cold'
+
+
+class AlarmEngine:
+    """
+    Track the state of each tracker and call the listeners with a list of
+    AlarmEvents whenever trackers cross from one state to the next. update
+    and remove may be called from any thread; run() must be started in the
+    event loop that should call the listeners.
+    """
+
+    def __init__(self, clock: Callable = datetime.now, max_sleep: float = 300):
+        self.clock = clock
+        # wake up at least this often in case the wall clock jumps, e.g.
+        # after a suspend
+        self.max_sleep = max_sleep
+        self.states = {}
+        self.names = {}
+        self.versions = {}
+        self.listeners = []
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+
+    def update(self, doc_id: int, name: str, early: datetime, timely: datetime, tardy: datetime):
+        """Set the crossing times of a tracker, replacing any previous ones."""
+        self.update_many([(doc_id, name, early, timely, tardy)])
+
+    def update_many(self, updates):
+        """
+        update() for each (doc_id, name, early, timely, tardy) in updates
+        with the heap rebuilt just once if there are many.
+        """
+        now = self.clock()
+        entries = []
+        with self._lock:
+            for doc_id, name, early, timely, tardy in updates:
+                version = self.versions.get(doc_id, 0) + 1
+                self.versions[doc_id] = version
+                self.names[doc_id] = name
+                if not (early and timely and tardy):
+                    self.states.pop(doc_id, None)
+                    continue
+                self.states[doc_id] = state_at(now, early, timely, tardy)
+                for when, state in ((early, 'cool'), (timely, 'warm'), (tardy, 'hot')):
+                    if when > now:
+                        entries.append((when, next(self._seq), doc_id, version, state))
+            if len(entries) > len(self._heap):
+                self._heap.extend(entries)
+                self._compact()
+            else:
+                for entry in entries:
+                    heapq.heappush(self._heap, entry)
+                if len(self._heap) > 4 * len(self.versions) + 64:
+                    self._compact()
+        self._wake()
+
+    def remove(self, doc_id: int):
+        with self._lock:
+            self.versions.pop(doc_id, None)
+            self.names.pop(doc_id, None)
+            self.states.pop(doc_id, None)
+
+    def next_alarm(self) -> datetime:
+        """The time of the next crossing or None."""
+        with self._lock:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def due(self) -> list[AlarmEvent]:
+        """Apply and return the crossings that are now due."""
+        now = self.clock()
+        events = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                when, _, doc_id, version, state = heapq.heappop(self._heap)
+                if self.versions.get(doc_id) != version:
+                    continue
+                self.states[doc_id] = state
+                events.append(AlarmEvent(doc_id, self.names[doc_id], state, when))
+        # a tracker may have crossed more than once since the last check
+        latest = {event.doc_id: event for event in events}
+        return list(latest.values())
+
+    def start(self):
+        """Start run() in the running event loop."""
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._loop = None
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        while True:
+            events = self.due()
+            if events:
+                for listener in self.listeners:
+                    try:
+                        listener(events)
+                    except Exception as e:
+                        logger.error(f"alarm listener {listener.__name__} failed: {e}")
+            next_alarm = self.next_alarm()
+            timeout = self.max_sleep
+            if next_alarm is not None:
+                timeout = min(timeout, max(0, (next_alarm - self.clock()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _wake(self):
+        # called after an update, perhaps from another thread, in case the
+        # next crossing is now earlier
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _discard_stale(self):
+        while self._heap and self.versions.get(self._heap[0][2]) != self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        self._heap = [x for x in self._heap if self.versions.get(x[2]) == x[3]]
+        heapq.heapify(self._heap)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import os
 import zipfile
 import re
@@ -6,7 +8,43 @@ from datetime import datetime, timedelta
 
 # Backup and restore functions
 
-def backup_to_zip(trf_home, today, logger):
+CHUNK_SIZE = 1 << 20
+
+# zip compression methods for backup_to_zip
+ZIP_CODECS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+def _zip_member(zipf, path, limit=None):
+    # stream path into zipf a chunk at a time, stopping after limit bytes,
+    # and return the SHA-256 of what was written
+    sha = hashlib.sha256()
+    with open(path, 'rb') as src, zipf.open(os.path.basename(path), 'w', force_zip64=True) as dst:
+        remaining = os.path.getsize(path) if limit is None else limit
+        while remaining > 0:
+            chunk = src.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            sha.update(chunk)
+            dst.write(chunk)
+            remaining -= len(chunk)
+    return sha.hexdigest()
+
+def backup_to_zip(trf_home, today, logger, codec='deflate', size=None):
+    """
+    Save trf.fs and trf.fs.index to backup/yymmdd.zip, compressed with codec
+    ('stored', 'deflate' or 'lzma') and streamed in chunks so memory use
+    stays bounded whatever the size of the datastore. A SHA256SUMS member
+    records the checksum of each file for verify_zip. If given, only the
+    first size bytes of trf.fs are saved - FileStorage only appends, so a
+    size taken between commits gives a consistent copy even if more
+    transactions are committed while the backup is being written.
+    With today == 'remove', the files, together with trf.fs.tmp and
+    trf.fs.lock, are saved to backup/removed.zip and then removed - only
+    trf.fs need exist.
+    """
     backup_dir = os.path.join(trf_home, 'backup')
     files_to_backup = [os.path.join(trf_home, 'trf.fs'), os.path.join(trf_home, 'trf.fs.index')]
     logger.debug(f"{files_to_backup = }")
@@ -16,21 +54,27 @@ def backup_to_zip(trf_home, today, logger):
     last_modified_timestamp = os.path.getmtime(files_to_backup[0])
     last_modified_time = datetime.fromtimestamp(last_modified_timestamp)
 
-    for file in files_to_backup:
+    for file in files_to_backup[:1] if today == 'remove' else files_to_backup:
         if not os.path.exists(file):
             return (False, f"Backup skipped - {file} does not exist")
 
     if today == 'remove':
         files_to_backup += [os.path.join(trf_home, 'trf.fs.tmp'), os.path.join(trf_home, 'trf.fs.lock')]
+        os.makedirs(backup_dir, exist_ok=True)
         backup_zip = os.path.join(trf_home, 'backup', "removed.zip")
     else:
         backup_zip = os.path.join(trf_home, 'backup', f"{last_modified_time.strftime('%y%m%d')}.zip")
         if os.path.exists(backup_zip):
             return (False, f"Backup skipped - backup file already exists: {backup_zip}")
 
-    with zipfile.ZipFile(backup_zip, 'w') as zipf:
+    checksums = []
+    with zipfile.ZipFile(backup_zip + '.tmp', 'w', compression=ZIP_CODECS[codec]) as zipf:
         for file in files_to_backup:
-            zipf.write(file)
+            if os.path.exists(file):
+                limit = size if file == files_to_backup[0] else None
+                checksums.append(f"{_zip_member(zipf, file, limit)}  {os.path.basename(file)}\n")
+        zipf.writestr('SHA256SUMS', ''.join(checksums))
+    os.replace(backup_zip + '.tmp', backup_zip)
 
     if today == 'remove':
         for fp in files_to_backup:
@@ -40,28 +84,59 @@ def backup_to_zip(trf_home, today, logger):
 
     return (True, f"Backup completed: {backup_zip}")
 
-def rotate_backups(trf_home, logger):
+def verify_zip(backup_zip):
+    """
+    Check each member of a backup zip against the checksum recorded in its
+    SHA256SUMS. Returns (ok, msg).
+    """
+    with zipfile.ZipFile(backup_zip, 'r') as zipf:
+        if 'SHA256SUMS' not in zipf.namelist():
+            return False, f"{backup_zip} has no SHA256SUMS"
+        sums = [line.split('  ', 1) for line in zipf.read('SHA256SUMS').decode().splitlines()]
+        for expected, name in sums:
+            sha = hashlib.sha256()
+            try:
+                with zipf.open(name) as fo:
+                    for chunk in iter(lambda: fo.read(CHUNK_SIZE), b''):
+                        sha.update(chunk)
+            except (KeyError, zipfile.BadZipFile) as e:
+                return False, f"{backup_zip}: {name}: {e}"
+            if sha.hexdigest() != expected:
+                return False, f"{backup_zip}: {name} does not match its checksum"
+    return True, f"{backup_zip}: {len(sums)} files verified"
+
+def rotate_backups(trf_home, logger, codec='deflate', size=None):
     # entry point for backups - make sure backup dir exists
     backup_dir = os.path.join(trf_home, 'backup')
     os.makedirs(backup_dir, exist_ok=True)
 
     today = datetime.today()
-    ok, msg = backup_to_zip(trf_home, today, logger)
+    ok, msg = backup_to_zip(trf_home, today, logger, codec, size)
     if not ok:
         logger.info(msg)
         return False
 
-    pattern = re.compile(r'^\d{6}\.zip$')
+    remove = prune_backups(backup_dir, '.zip')
+    if remove:
+        logger.info(f"Removing backup: {', '.join(remove)}")
+    return True
+
+def prune_backups(backup_dir, suffix, keep=7, gap=timedelta(days=14)):
+    """
+    Remove the daily 'yymmdd<suffix>' backups in backup_dir that are not
+    needed to keep the 3 most recent and 4 older ones separated by at least
+    gap. Returns the names (without suffix) of those removed.
+    """
+    pattern = re.compile(rf'^\d{{6}}{re.escape(suffix)}$')
     all_files = os.listdir(backup_dir)
-    names = [os.path.splitext(f)[0] for f in all_files if pattern.match(f)]
+    names = [f[:-len(suffix)] for f in all_files if pattern.match(f)]
     queue = []
-    gap = timedelta(days=14)
 
     names.sort()
     remove = []
     for name in names:
         queue.insert(0, name)
-        if len(queue) > 7:
+        if len(queue) > keep:
             pivot = queue[3]
             older = queue[4]
             pivot_dt = datetime.strptime(pivot, "%y%m%d")
@@ -71,15 +146,13 @@ def rotate_backups(trf_home, logger):
             else:
                 remove.append(queue.pop(3))
 
-            if len(queue) > 7:
-                remove.extend(queue[7:])
-                queue = queue[:7]
+            if len(queue) > keep:
+                remove.extend(queue[keep:])
+                queue = queue[:keep]
 
-    if remove:
-        for name in remove:
-            file = os.path.join(backup_dir, f"{name}.zip")
-            os.remove(file)
-        logger.info(f"Removing backup: {', '.join(remove)}")
+    for name in remove:
+        os.remove(os.path.join(backup_dir, f"{name}{suffix}"))
+    return remove
 
 def restore_from_zip(trf_home):
     clear_screen()
@@ -125,3 +198,249 @@ Choosing one of the 'restore from' options will:
 
         else:
             print("Invalid option. Please choose again.")
+
+
+# Incremental backups
+#
+# FileStorage only ever appends to trf.fs (until it is packed), so after a
+# full copy only the bytes appended since the previous backup need to be
+# saved. backup/incremental.json records each piece: its file, the byte
+# range of trf.fs it holds, the id of the last transaction in that range
+# and a SHA-256 checksum. A chain is a full copy followed by incrementals.
+
+TIME_FORMAT = "%y%m%dT%H%M%S"
+
+
+def _state_path(trf_home):
+    return os.path.join(trf_home, 'backup', 'incremental.json')
+
+
+def _load_state(trf_home):
+    path = _state_path(trf_home)
+    if not os.path.exists(path):
+        return []
+    with open(path) as fo:
+        return json.load(fo)
+
+
+def _save_state(trf_home, backups):
+    path = _state_path(trf_home)
+    with open(path + '.tmp', 'w') as fo:
+        json.dump(backups, fo, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def last_transaction(fs_path, end):
+    """
+    Return the id, as hex, of the committed transaction that ends at byte
+    offset end of the FileStorage file fs_path, '' if the file holds no
+    transactions or None if end is not the end of a committed transaction.
+    """
+    if end <= 4:  # just the 'FS21' file header
+        return ''
+    with open(fs_path, 'rb') as fo:
+        fo.seek(end - 8)
+        # each transaction record ends with a redundant copy of its length
+        length = int.from_bytes(fo.read(8), 'big')
+        start = end - 8 - length
+        if start < 4:
+            return None
+        fo.seek(start)
+        header = fo.read(17)  # tid, length, status
+    if len(header) < 17 or int.from_bytes(header[8:16], 'big') != length:
+        return None
+    if header[16:17] == b'c':  # checkpoint - commit still in progress
+        return None
+    return header[:8].hex()
+
+
+def _copy_range(source, target, start, end):
+    # copy bytes start to end of source to target returning the SHA-256
+    sha = hashlib.sha256()
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        src.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = src.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError(f"{source} ended before byte {end}")
+            sha.update(chunk)
+            dst.write(chunk)
+            remaining -= len(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    return sha.hexdigest()
+
+
+def _checksum(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fo:
+        for chunk in iter(lambda: fo.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def backup_incremental(trf_home, logger, full_every=7, keep_chains=3):
+    """
+    Back up trf.fs by copying just the bytes appended since the last backup.
+    A full copy starts a new chain when there is no previous backup, when
+    trf.fs no longer extends the last backup (e.g. after a pack or restore)
+    or when the last full copy is at least full_every days old. Only the
+    keep_chains most recent chains are kept.
+    Call this between commits, e.g. from the storage worker.
+    """
+    backup_dir = os.path.join(trf_home, 'backup')
+    os.makedirs(backup_dir, exist_ok=True)
+    fs_path = os.path.join(trf_home, 'trf.fs')
+    if not os.path.exists(fs_path):
+        return False, "nothing to backup"
+
+    end = os.path.getsize(fs_path)
+    tid = last_transaction(fs_path, end)
+    if tid is None:
+        return False, f"Backup skipped - {fs_path} does not end with a committed transaction"
+
+    backups = _load_state(trf_home)
+    now = datetime.now()
+    previous = backups[-1] if backups else None
+    fulls = [x for x in backups if x['start'] == 0]
+    full = (
+        previous is None
+        or end < previous['end']
+        or last_transaction(fs_path, previous['end']) != previous['tid']
+        or now - datetime.strptime(fulls[-1]['time'], TIME_FORMAT) >= timedelta(days=full_every)
+        )
+    if not full and end == previous['end']:
+        return False, "Backup skipped - no changes since the last backup"
+
+    start = 0 if full else previous['end']
+    name = f"{now.strftime(TIME_FORMAT)}.{'fs' if full else 'deltafs'}"
+    sha256 = _copy_range(fs_path, os.path.join(backup_dir, name), start, end)
+    backups.append(dict(file=name, time=now.strftime(TIME_FORMAT), start=start, end=end, tid=tid, sha256=sha256))
+
+    # drop the oldest chains
+    starts = [i for i, x in enumerate(backups) if x['start'] == 0]
+    if len(starts) > keep_chains:
+        cut = starts[-keep_chains]
+        for x in backups[:cut]:
+            path = os.path.join(backup_dir, x['file'])
+            if os.path.exists(path):
+                os.remove(path)
+        logger.info(f"Removed backups: {', '.join(x['file'] for x in backups[:cut])}")
+        backups = backups[cut:]
+    _save_state(trf_home, backups)
+
+    msg = f"{'Full' if full else 'Incremental'} backup completed: {name}, bytes {start}-{end}"
+    logger.info(msg)
+    return True, msg
+
+
+def verify_backups(trf_home):
+    """
+    Check each incremental backup file against its recorded size and
+    SHA-256. Returns a list of (file, problem) for those that fail.
+    """
+    backup_dir = os.path.join(trf_home, 'backup')
+    problems = []
+    for x in _load_state(trf_home):
+        path = os.path.join(backup_dir, x['file'])
+        if not os.path.exists(path):
+            problems.append((x['file'], "missing"))
+        elif os.path.getsize(path) != x['end'] - x['start']:
+            problems.append((x['file'], "wrong size"))
+        elif _checksum(path) != x['sha256']:
+            problems.append((x['file'], "checksum mismatch"))
+    return problems
+
+
+def _save_current(trf_home, logger):
+    # save and remove trf.fs, trf.fs.index, trf.fs.lock and trf.fs.tmp
+    # before they are replaced - (True, msg) if there is no trf.fs
+    if not os.path.exists(os.path.join(trf_home, 'trf.fs')):
+        return True, "no trf.fs to save"
+    try:
+        return backup_to_zip(trf_home, 'remove', logger)
+    except OSError as e:
+        return False, str(e)
+
+
+def restore(trf_home, logger, to_time=None):
+    """
+    Restore trf.fs as it was at to_time (default: the latest backup) by
+    replaying the full copy and incrementals of the chain covering that
+    time. Every piece is checked against its size and SHA-256 before
+    anything is replaced. The current trf.fs* files are first saved to
+    removed.zip and are left alone if they can't be. Falls back to the
+    latest daily zip backup, checked against its SHA256SUMS, if there are
+    no incremental backups from before to_time. Returns (ok, msg); nothing
+    is prompted.
+    """
+    backup_dir = os.path.join(trf_home, 'backup')
+    fs_path = os.path.join(trf_home, 'trf.fs')
+    restoring = fs_path + '.restoring'
+    to_time = to_time or datetime.now()
+    stamp = to_time.strftime(TIME_FORMAT)
+    backups = [x for x in _load_state(trf_home) if x['time'] <= stamp]
+    starts = [i for i, x in enumerate(backups) if x['start'] == 0]
+
+    if not starts:
+        pattern = re.compile(r'^\d{6}\.zip$')
+        names = sorted(
+            f for f in os.listdir(backup_dir)
+            if pattern.match(f) and f[:6] <= to_time.strftime('%y%m%d')
+            ) if os.path.isdir(backup_dir) else []
+        if not names:
+            return False, f"No backup from before {to_time.strftime('%Y-%m-%d %H:%M')}"
+        backup_zip = os.path.join(backup_dir, names[-1])
+        ok, msg = verify_zip(backup_zip)
+        if not ok:
+            return False, f"Restore cancelled - {msg}"
+        with zipfile.ZipFile(backup_zip, 'r') as zipf:
+            members = {os.path.basename(x): x for x in zipf.namelist()}
+            if 'trf.fs' not in members:
+                return False, f"{backup_zip} does not contain trf.fs"
+            restored = [name for name in ('trf.fs', 'trf.fs.index') if name in members]
+            for name in restored:
+                with zipf.open(members[name]) as src, open(os.path.join(trf_home, name + '.restoring'), 'wb') as dst:
+                    while chunk := src.read(CHUNK_SIZE):
+                        dst.write(chunk)
+        ok, msg = _save_current(trf_home, logger)
+        if not ok:
+            for name in restored:
+                os.remove(os.path.join(trf_home, name + '.restoring'))
+            return False, f"Restore cancelled - could not save the current files: {msg}"
+        for name in restored:
+            os.replace(os.path.join(trf_home, name + '.restoring'), os.path.join(trf_home, name))
+        msg = f"Restored trf.fs from {backup_zip}"
+        logger.info(msg)
+        return True, msg
+
+    chain = backups[starts[-1]:]
+    files = {x['file'] for x in chain}
+    problems = [(file, problem) for file, problem in verify_backups(trf_home) if file in files]
+    if problems:
+        return False, f"Restore cancelled - {', '.join(f'{file} is {problem}' for file, problem in problems)}"
+
+    with open(restoring, 'wb') as dst:
+        for x in chain:
+            if dst.tell() != x['start']:
+                os.remove(restoring)
+                return False, f"Restore cancelled - {x['file']} does not continue the chain"
+            with open(os.path.join(backup_dir, x['file']), 'rb') as src:
+                while chunk := src.read(CHUNK_SIZE):
+                    dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    if last_transaction(restoring, chain[-1]['end']) != chain[-1]['tid']:
+        os.remove(restoring)
+        return False, "Restore cancelled - the restored file does not end with the recorded transaction"
+
+    ok, msg = _save_current(trf_home, logger)
+    if not ok:
+        os.remove(restoring)
+        return False, f"Restore cancelled - could not save the current files: {msg}"
+    os.replace(restoring, fs_path)
+    # the index is rebuilt when the storage is next opened
+    msg = f"Restored trf.fs as of {chain[-1]['time']} from {', '.join(x['file'] for x in chain)}"
+    logger.info(msg)
+    return True, msg
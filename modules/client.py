@@ -0,0 +1,62 @@
+import os
+import socket
+import sys
+
+# Command client
+#
+# Sends a request to the trf that has the datastore open, see server.py.
+# Only the standard library is imported so that, e.g.,
+#
+#     trf record "fill bird feeders" now
+#
+# from a shell script or cron job takes milliseconds rather than the time
+# needed to start trf itself.
+
+SOCKET_NAME = "trf.sock"
+
+USAGE = """\
+usage: trf [home] record <name or doc_id> [<completion>]
+       trf [home] ping
+
+<completion> is parsed as in the completion dialog, e.g., "now" (the
+default), "24-09-23 3:30p" or "now, 1h" for a completion needed an hour
+earlier."""
+
+
+def socket_path(trf_home: str) -> str:
+    return os.path.join(trf_home, SOCKET_NAME)
+
+
+def request(path: str, *fields: str, timeout: float = 10) -> tuple[bool, str]:
+    """
+    Send a request with fields to the server at path and return its
+    (ok, msg) reply.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError as e:
+            return False, f"trf is not running for {os.path.dirname(path)} ({e.strerror})"
+        sock.sendall(("\t".join(fields) + "\n").encode())
+        reply = b""
+        while not reply.endswith(b"\n"):
+            data = sock.recv(4096)
+            if not data:
+                return False, "no reply from trf"
+            reply += data
+    status, _, msg = reply.decode().rstrip("\n").partition("\t")
+    return status == "ok", msg
+
+
+def main(trf_home: str, command: str, args: list) -> int:
+    if command == "record" and 1 <= len(args) <= 2:
+        fields = [command, *args]
+    elif command == "ping" and not args:
+        fields = [command]
+    else:
+        print(USAGE, file=sys.stderr)
+        return 2
+    ok, msg = request(socket_path(trf_home), *fields)
+    print(msg, file=sys.stdout if ok else sys.stderr)
+    return 0 if ok else 1
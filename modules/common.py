@@ -1,14 +1,17 @@
-import inspect
 from datetime import datetime
 import textwrap
 import shutil
-from rich.markdown import Markdown
-from rich.console import Console
 import os
 import re
+import sys
 
 ELLIPSIS_CHAR = "…"
 
+# the file log_msg appends to - set by the display, left None by the
+# headless commands so that they log nothing to whatever directory they
+# are run from
+LOG_FILE = None
+
 # COLORS = {
 #     1: "#6495ed",  # cornflowerblue
 #     2: "#87cefa",  # lightskyblue
@@ -44,17 +47,22 @@ def truncate_string(s: str, max_length: int) -> str:
         return s
 
 
-def log_msg(msg: str, file_path: str = "log_msg.md"):
+def log_msg(msg: str, file_path: str = None):
     """
     Log a message and save it directly to a specified file.
 
     Args:
         msg (str): The message to log.
-        file_path (str, optional): Path to the log file. Defaults to "log_msg.txt".
+        file_path (str, optional): Path to the log file. Defaults to LOG_FILE,
+            and nothing is logged if that is None.
     """
-    stack = inspect.stack()[1]
-    caller_name = stack.function  # Function name
-    caller_basename = os.path.basename(stack.filename)  # File name (without full path)
+    file_path = file_path or LOG_FILE
+    if file_path is None:
+        return
+    # the caller's frame - inspect.stack() would read the source of every frame
+    caller = sys._getframe(1).f_code
+    caller_name = caller.co_name  # Function name
+    caller_basename = os.path.basename(caller.co_filename)  # File name (without full path)
     caller_file = os.path.splitext(caller_basename)[0]
 
     lines = [
@@ -86,6 +94,10 @@ def display_messages(file_path: str = "log_msg.md"):
     Args:
         file_path (str, optional): Path to the log file. Defaults to "log_msg.txt".
     """
+    # rich is slow to import and only needed here
+    from rich.console import Console
+    from rich.markdown import Markdown
+
     try:
         # Read messages from the file
         with open(file_path, "r") as f:
@@ -177,34 +189,17 @@ def fmt_td(seconds: int, short=True):
         return "?"
     if seconds <= 0:
         return ""
-    try:
-        total_seconds = abs(seconds)
-        until = []
-        days = hours = minutes = 0
-        if total_seconds:
-            seconds = total_seconds % 60
-            minutes = total_seconds // 60
-            if minutes >= 60:
-                hours = minutes // 60
-                minutes = minutes % 60
-            if hours >= 24:
-                days = hours // 24
-                hours = hours % 24
-        if days:
-            until.append(f"{days}d")
-        if hours:
-            until.append(f"{hours}h")
-        if minutes:
-            until.append(f"{minutes}m")
-        # if seconds:
-        #     until.append(f"{seconds}s")
-        if not until:
-            until.append("0m")
-        ret = "".join(until[:2]) if short else "".join(until)
-        return ret
-    except Exception as e:
-        log_msg(f"{seconds}: {e}")
-        return ""
+    # called for every row of every list, so kept to a few divmods
+    hours, minutes = divmod(seconds // 60, 60)
+    days, hours = divmod(hours, 24)
+    if short and days and hours:
+        # only the biggest two
+        minutes = 0
+    return (
+        (f"{days}d" if days else "")
+        + (f"{hours}h" if hours else "")
+        + (f"{minutes}m" if minutes else "")
+    ) or "0m"
 
 
 def fmt_dt(dt: int, short=True):
@@ -0,0 +1,215 @@
+import lzma
+import os
+import sys
+import zlib
+
+import ZODB.blob
+import ZODB.FileStorage
+import ZODB.interfaces
+import zope.interface
+
+# Record compression for ZODB storages
+#
+# A compressed record starts with a two byte marker identifying the codec.
+# Pickles never start with '.' so records without a marker, e.g. those
+# written before compression was enabled, are returned unchanged.
+
+CODECS = {
+    'zlib': (b'.z', zlib.compress, zlib.decompress),
+    'lzma': (b'.x', lzma.compress, lzma.decompress),
+}
+DECOMPRESSORS = {marker: decompress for marker, _, decompress in CODECS.values()}
+
+
+def compress(data: bytes, codec: str = 'zlib') -> bytes:
+    """
+    Return data compressed with codec unless it is already compressed, is
+    too short to be worth compressing or would not be made smaller.
+    """
+    if not codec or not data or len(data) <= 20 or data[:2] in DECOMPRESSORS:
+        return data
+    marker, compressor, _ = CODECS[codec]
+    compressed = marker + compressor(data)
+    return compressed if len(compressed) < len(data) else data
+
+
+def decompress(data: bytes) -> bytes:
+    if data and data[:2] in DECOMPRESSORS:
+        return DECOMPRESSORS[data[:2]](data[2:])
+    return data
+
+
+@zope.interface.implementer(ZODB.interfaces.IStorageWrapper)
+class CompressedStorage:
+    """
+    Wrap a storage so that the records it stores are compressed with
+    codec ('zlib' or 'lzma'). Records are always decompressed when loaded
+    whatever the codec, so with codec=None the wrapper only reads
+    compressed records and writes uncompressed ones.
+    """
+
+    # methods that don't touch record data are used directly from the base
+    copied_methods = (
+        'close', 'getName', 'getSize', 'history', 'isReadOnly',
+        'lastTransaction', 'new_oid', 'sortKey',
+        'tpc_abort', 'tpc_begin', 'tpc_finish', 'tpc_vote',
+        'loadBlob', 'openCommittedBlobFile', 'temporaryDirectory',
+        'supportsUndo', 'undo', 'undoLog', 'undoInfo',
+    )
+
+    def __init__(self, base, codec: str = 'zlib'):
+        if codec and codec not in CODECS:
+            raise ValueError(f"unknown codec '{codec}', expected one of {', '.join(CODECS)}")
+        self.base = base
+        self.codec = codec or None
+        self.db = None
+        for name in self.copied_methods:
+            method = getattr(base, name, None)
+            if method is not None:
+                setattr(self, name, method)
+        zope.interface.directlyProvides(self, zope.interface.providedBy(base))
+        # the base calls back for invalidations and, when resolving
+        # conflicts, to untransform the records it has stored
+        base.registerDB(self)
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+    def __len__(self):
+        return len(self.base)
+
+    def _compress(self, data):
+        return compress(data, self.codec)
+
+    def load(self, oid, version=''):
+        data, serial = self.base.load(oid, version)
+        return decompress(data), serial
+
+    def loadBefore(self, oid, tid):
+        result = self.base.loadBefore(oid, tid)
+        if result is None:
+            return None
+        data, serial, after = result
+        return decompress(data), serial, after
+
+    def loadSerial(self, oid, serial):
+        return decompress(self.base.loadSerial(oid, serial))
+
+    def store(self, oid, serial, data, version, transaction):
+        return self.base.store(oid, serial, self._compress(data), version, transaction)
+
+    def restore(self, oid, serial, data, version, prev_txn, transaction):
+        return self.base.restore(oid, serial, self._compress(data), version, prev_txn, transaction)
+
+    def storeBlob(self, oid, oldserial, data, blobfilename, version, transaction):
+        return self.base.storeBlob(oid, oldserial, self._compress(data), blobfilename, version, transaction)
+
+    def restoreBlob(self, oid, serial, data, blobfilename, prev_txn, transaction):
+        return self.base.restoreBlob(oid, serial, self._compress(data), blobfilename, prev_txn, transaction)
+
+    def pack(self, pack_time, referencesf, gc=None):
+        def references(data, oids=None):
+            return referencesf(decompress(data), oids)
+        if gc is None:
+            return self.base.pack(pack_time, references)
+        return self.base.pack(pack_time, references, gc)
+
+    def iterator(self, start=None, stop=None):
+        return _Iterator(self.base.iterator(start, stop))
+
+    def record_iternext(self, next=None):
+        oid, tid, data, next = self.base.record_iternext(next)
+        return oid, tid, decompress(data), next
+
+    def copyTransactionsFrom(self, other):
+        ZODB.blob.copyTransactionsFromTo(other, self)
+
+    # IStorageWrapper
+
+    def registerDB(self, db):
+        self.db = db
+
+    def invalidateCache(self):
+        if self.db is not None:
+            return self.db.invalidateCache()
+
+    def invalidate(self, transaction_id, oids, version=''):
+        if self.db is not None:
+            return self.db.invalidate(transaction_id, oids)
+
+    def references(self, record, oids=None):
+        return self.db.references(decompress(record), oids)
+
+    def transform_record_data(self, data):
+        if self.db is not None:
+            data = self.db.transform_record_data(data)
+        return self._compress(data)
+
+    def untransform_record_data(self, data):
+        data = decompress(data)
+        if self.db is not None:
+            data = self.db.untransform_record_data(data)
+        return data
+
+
+class _Iterator:
+    # transactions from the base iterator with their records decompressed
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _Transaction(next(self._iterator))
+
+    def close(self):
+        close = getattr(self._iterator, 'close', None)
+        if close is not None:
+            close()
+
+    def __getattr__(self, name):
+        return getattr(self._iterator, name)
+
+
+class _Transaction:
+
+    def __init__(self, transaction):
+        self._transaction = transaction
+
+    def __iter__(self):
+        for record in self._transaction:
+            if record.data:
+                record.data = decompress(record.data)
+            yield record
+
+    def __getattr__(self, name):
+        return getattr(self._transaction, name)
+
+
+def compress_database(source_path: str, target_path: str, codec: str = 'zlib'):
+    """
+    Copy every transaction of the FileStorage at source_path into a new
+    FileStorage at target_path with the records compressed. The source is
+    opened read only and left unchanged.
+    """
+    if os.path.exists(target_path):
+        raise FileExistsError(f"{target_path} already exists")
+    source = ZODB.FileStorage.FileStorage(source_path, read_only=True)
+    target = CompressedStorage(ZODB.FileStorage.FileStorage(target_path), codec)
+    try:
+        target.copyTransactionsFrom(source)
+    finally:
+        target.close()
+        source.close()
+    return os.path.getsize(source_path), os.path.getsize(target_path)
+
+
+if __name__ == "__main__":
+    # python -m modules.compress trf.fs trf-compressed.fs [zlib|lzma]
+    if len(sys.argv) not in (3, 4):
+        print(f"usage: python -m modules.compress source.fs target.fs [{'|'.join(CODECS)}]")
+        sys.exit(2)
+    before, after = compress_database(*sys.argv[1:])
+    print(f"{sys.argv[1]}: {before} bytes -> {sys.argv[2]}: {after} bytes")
@@ -1,8 +1,12 @@
 from modules.model import DatabaseManager
+from modules.backup import prune_backups
 from rich.table import Table
 from rich.box import HEAVY_EDGE
 from datetime import datetime
 import bisect
+import itertools
+import json
+import os
 import string
 from .common import (
     fmt_dt,
@@ -71,24 +75,42 @@ def indx_to_tag(indx: int, fill: int = 1):
     return decimal_to_base26(indx).rjust(fill, "a")
 
 
+# the most rows of the list saved for the first paint, a few screens full
+SNAPSHOT_ROWS = 200
+
+
 class Controller:
     def __init__(self, database_path: str, reset: bool = False):
         self.db_manager = DatabaseManager(database_path, reset=reset)
+        self.backup_dir = os.path.join(
+            os.path.dirname(os.path.abspath(database_path)), "backup"
+        )
         self.tag_to_id = {}
-        self.chore_names = []
         self.afill = 1
+        self.data_version = None
+        self.snapshot_path = os.path.splitext(database_path)[0] + ".snapshot.json"
 
     def is_chore_unique(self, name: str):
-        return name not in self.chore_names
+        return not self.db_manager.chore_exists(name)
 
-    def show_chores_as_list(self, width: int = 70):
+    def search_chores(self, query: str, limit: int = 20, offset: int = 0):
+        return self.db_manager.search_chores(query, limit, offset)
+
+    def show_chores_as_list(self, width: int = 70, listed: tuple = None):
+        """
+        Format the list of chores for width. listed is (data_version,
+        chores) from DatabaseManager.read_chores, e.g., from a worker
+        thread, or None to query the database now.
+        """
         now = round(
             datetime.now()
             # .replace(hour=0, minute=0, second=0, microsecond=0)
             .timestamp()
         )
 
-        chores = self.db_manager.list_chores()
+        if listed is None:
+            listed = self.db_manager.data_version(), self.db_manager.list_chores()
+        self.data_version, chores = listed
         self.afill = 1 if len(chores) < 26 else 2 if len(chores) < 676 else 3
         if not chores:
             return [
@@ -110,9 +132,7 @@ class Controller:
 
         # chore_id: 0,  name: 1, created: 2, first_completion: 3, last_completion: 4,
         # mean_interval: 5, mad_less: 6, mad_more: 7, next: 8, num_completions: 9
-        self.chore_names = []
         for idx, chore in enumerate(chores):
-            self.chore_names.append(chore[1])
             tag = indx_to_tag(idx, self.afill)
             next = ""
             pm_str = ""
@@ -170,6 +190,48 @@ class Controller:
 
         return results
 
+    def save_snapshot(self, rows: list, width: int):
+        """
+        Save the first SNAPSHOT_ROWS of the formatted list, rows, with the
+        data_version and width they were formatted for so the next start
+        can paint them at once, see load_snapshot.
+        """
+        snapshot = {
+            "data_version": self.data_version,
+            "width": width,
+            "saved": round(datetime.now().timestamp()),
+            "afill": self.afill,
+            "rows": rows[: SNAPSHOT_ROWS + 1],
+            # the tags of the saved rows, which come first
+            "tag_to_id": dict(itertools.islice(self.tag_to_id.items(), SNAPSHOT_ROWS)),
+        }
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            log_msg(f"Could not save the list snapshot: {e}")
+
+    def load_snapshot(self, width: int):
+        """
+        Return the saved snapshot if it was formatted for width, else None.
+        snapshot["current"] is whether the chores have not changed since,
+        in which case its tags are restored and can be used at once.
+        """
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get("width") != width or not snapshot.get("rows"):
+            return None
+        snapshot["current"] = snapshot["data_version"] == self.db_manager.data_version()
+        if snapshot["current"]:
+            self.afill = snapshot["afill"]
+            self.tag_to_id = snapshot["tag_to_id"]
+        return snapshot
+
     def show_chore(self, tag):
         if str(tag) in string.ascii_lowercase:
             chore_id = self.tag_to_id.get(tag, None)
@@ -222,6 +284,20 @@ class Controller:
 
         return chore_id, chore_name, last_completion, results, tag_to_idx
 
+    def backup_database(self):
+        """
+        Make today's compressed backup of the database, if needed, and prune
+        the older ones as rotate_backups does for trf. Safe to call from a
+        worker thread.
+        """
+        ok, msg = self.db_manager.backup(self.backup_dir)
+        log_msg(msg)
+        if ok:
+            removed = prune_backups(self.backup_dir, ".db.gz")
+            if removed:
+                log_msg(f"Removing backup: {', '.join(removed)}")
+        return ok, msg
+
     def add_chore(self, name, created: int = round(datetime.now().timestamp())):
         self.db_manager.add_chore(name, created)
 
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import signal
+from functools import partial
+from typing import Callable
+
+from . import db_path, trf_home
+from .__version__ import version
+from .client import socket_path
+from .scheduler import Scheduler
+from .server import CommandServer
+from .store import announce, new_day, open_store, schedule_jobs
+from .tracker import Tracker
+
+logger = logging.getLogger()
+
+# Daemon
+#
+# `trf daemon` holds the datastore open, runs the housekeeping jobs and
+# alarms and serves commands, see server.py, without the display - only
+# the model and persistence modules are imported.
+
+
+async def handle_command(store, fields: list, then: Callable = None) -> tuple[bool, str]:
+    """
+    Carry out a request from another process. then is passed to
+    store.submit for changes, e.g., to redisplay the list.
+    """
+    command, args = fields[0], fields[1:]
+    if command == 'ping' and not args:
+        return True, f"trf {version} with {len(store.rows)} trackers in {trf_home}"
+    if command == 'record' and 1 <= len(args) <= 2:
+        # the trackers are only read on the storage worker
+        ok, doc_id = await asyncio.wrap_future(store.worker.submit(store.find_tracker, args[0]))
+        if not ok:
+            return False, doc_id
+        ok, completion = Tracker.parse_completion(args[1] if len(args) > 1 else 'now')
+        if not ok:
+            return False, completion or "Invalid completion"
+        future = store.submit(store.record_completion, doc_id, completion, then=then)
+        ok, msg = await asyncio.wrap_future(future)
+        if ok:
+            msg = f"recorded {Tracker.format_dt(completion[0], long=True)} for {store.rows[doc_id].name}"
+        return ok, msg
+    return False, f"unknown command or wrong arguments: {' '.join(fields)}"
+
+
+def daemon():
+    """
+    Hold the datastore open, run the periodic jobs and alarms and serve
+    commands, e.g., from `trf record`, until interrupted.
+    """
+    store = open_store()
+    scheduler = Scheduler()
+    command_server = CommandServer(socket_path(trf_home), partial(handle_command, store))
+    store.alarms.listeners.append(partial(announce, scheduler, store))
+
+    async def serve():
+        if not await command_server.start():
+            return
+        scheduler.every("clock", 60, new_day, scheduler, store, align=True)
+        schedule_jobs(scheduler, store)
+        scheduler.start()
+        store.alarms.start()
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        await stopped.wait()
+
+    try:
+        logger.info(f"Started trf daemon with database file {db_path}")
+        asyncio.run(serve())
+    finally:
+        command_server.stop()
+        scheduler.stop()
+        store.alarms.stop()
+        store.close()
+        logger.info(f"Stopped trf daemon and closed database file {db_path}")
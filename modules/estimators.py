@@ -0,0 +1,183 @@
+import math
+
+# Streaming estimators
+#
+# Each estimator summarises every interval it has been given in a few
+# numbers and is updated in O(1) as each new interval arrives, so that a
+# forecast never needs more than the latest completion. Intervals are in
+# seconds. An estimator provides
+#
+#     update(x)   add the interval x
+#     location    the typical interval or None before the first update
+#     spread      the typical deviation from location or None before the
+#                 second update
+#
+# and is registered in ESTIMATORS under the name used for the 'estimator'
+# setting.
+
+# the weight of the newest interval in the exponentially weighted averages
+ALPHA = 0.25
+
+
+class EWMA:
+    """Exponentially weighted moving average."""
+
+    def __init__(self, alpha: float = ALPHA):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, x: float):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+
+
+class EWMAD:
+    """
+    Exponentially weighted mean absolute deviation of each value from the
+    exponentially weighted mean of the values before it.
+    """
+
+    def __init__(self, alpha: float = ALPHA):
+        self.mean = EWMA(alpha)
+        self.value = None
+
+    def update(self, x: float):
+        if self.mean.value is not None:
+            deviation = abs(x - self.mean.value)
+            if self.value is None:
+                self.value = deviation
+            else:
+                self.value += self.mean.alpha * (deviation - self.value)
+        self.mean.update(x)
+
+
+class P2Quantile:
+    """
+    The P² estimate of the p quantile (Jain and Chlamtac, 1985) from five
+    markers whose heights are adjusted with a piecewise-parabolic formula
+    as each value arrives.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    @property
+    def value(self):
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # the exact quantile of the first few values
+            heights = sorted(self.heights)
+            rank = self.p * (len(heights) - 1)
+            lower = math.floor(rank)
+            upper = min(lower + 1, len(heights) - 1)
+            return heights[lower] + (rank - lower) * (heights[upper] - heights[lower])
+        return self.heights[2]
+
+    def update(self, x: float):
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(x)
+            if self.count == 5:
+                heights.sort()
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if heights[i] <= x < heights[i + 1])
+        positions = self.positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, d)
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+
+class ExponentialEstimator:
+    """The exponentially weighted mean and mean absolute deviation."""
+
+    def __init__(self):
+        self.mad = EWMAD()
+
+    def update(self, x: float):
+        self.mad.update(x)
+
+    @property
+    def location(self):
+        return self.mad.mean.value
+
+    @property
+    def spread(self):
+        return self.mad.value
+
+
+class QuantileEstimator:
+    """
+    The median and, as a spread that long or short outliers can't inflate,
+    half the distance between the 10% and 90% quantiles.
+    """
+
+    def __init__(self):
+        self.quantiles = [P2Quantile(p) for p in (0.1, 0.5, 0.9)]
+
+    def update(self, x: float):
+        for quantile in self.quantiles:
+            quantile.update(x)
+
+    @property
+    def location(self):
+        return self.quantiles[1].value
+
+    @property
+    def spread(self):
+        if self.quantiles[1].count < 2:
+            return None
+        return (self.quantiles[2].value - self.quantiles[0].value) / 2
+
+
+ESTIMATORS = {
+    'ewma': ExponentialEstimator,
+    'quantile': QuantileEstimator,
+}
+
+
+def new_estimators(intervals=()) -> dict:
+    """An instance of each of ESTIMATORS, updated with intervals."""
+    estimators = {name: cls() for name, cls in ESTIMATORS.items()}
+    for x in intervals:
+        for estimator in estimators.values():
+            estimator.update(x)
+    return estimators
@@ -0,0 +1,114 @@
+import struct
+from datetime import datetime, timedelta
+
+# Batched forecasts
+#
+# The statistics of Tracker.compute_info for many histories at once. Each
+# history is packed, once, into a row of microseconds padded to a fixed
+# width; the rows are gathered into arrays and the intervals, averages,
+# spreads and bounds are computed for every row together. Timedeltas are
+# divided with the same round-half-even rule as timedelta / int so the
+# results match compute_info exactly.
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def __getattr__(name: str):
+    # NumPy is optional and slow to import, so it is only imported when np
+    # is first used. Without it Tracker.compute_info is used for every
+    # tracker. The functions below are only called once np is known not to
+    # be None.
+    global np
+    if name != 'np':
+        raise AttributeError(name)
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    return np
+
+
+def pack(history: list, width: int) -> bytes:
+    """
+    The completion times of history followed by their timedeltas, as
+    microseconds, each padded with zeros to width.
+    """
+    padding = [0] * (width - len(history))
+    return struct.pack(
+        f"{2 * width}q",
+        *[(dt - EPOCH) // MICROSECOND for dt, _ in history], *padding,
+        *[td // MICROSECOND for _, td in history], *padding,
+    )
+
+
+def to_datetime(usec: int) -> datetime:
+    return EPOCH + timedelta(microseconds=usec)
+
+
+def to_timedelta(usec: int) -> timedelta:
+    return timedelta(microseconds=usec)
+
+
+def _divide(a, b):
+    # a / b rounded to the nearest integer, ties to even, for b > 0
+    q, r = np.divmod(a, b)
+    r = 2 * r
+    return q + ((r > b) | ((r == b) & (q % 2 == 1)))
+
+
+class BatchStats:
+    """
+    The statistics of a batch of histories, see batch_stats, as arrays
+    with a row for each history. All times are in microseconds.
+    """
+
+    def __init__(self, counts, intervals, average, spread, last_interval, expected, eta):
+        self.counts = counts
+        self.num_intervals = np.maximum(counts - 1, 0)
+        self.intervals = intervals
+        self.average = average
+        self.spread = spread
+        self.n_x_spread = eta * spread
+        self.last_interval = last_interval
+        self.expected = expected
+        self.early = expected - 2 * eta * spread
+        self.timely = expected - self.n_x_spread
+        self.tardy = expected + self.n_x_spread
+        self.eta = eta
+
+    def bounds(self):
+        """
+        An iterator over the (early, timely, tardy) datetimes of each row,
+        None without intervals.
+        """
+        has_intervals = (self.num_intervals > 0).tolist()
+        columns = [
+            [x if m else None for x, m in zip(column.astype('datetime64[us]').tolist(), has_intervals)]
+            for column in (self.early, self.timely, self.tardy)
+        ]
+        return zip(*columns)
+
+
+def batch_stats(rows: list, counts: list, width: int, eta: int) -> BatchStats:
+    """
+    The statistics for each of the histories packed in rows, with counts
+    completions each, with the spread multiplied by eta.
+    """
+    n = len(rows)
+    counts = np.array(counts, dtype=np.int64)
+    packed = np.frombuffer(b''.join(rows), dtype=np.int64).reshape(n, 2, width)
+    completed, taken = packed[:, 0], packed[:, 1]
+
+    num_intervals = np.maximum(counts - 1, 0)
+    in_range = np.arange(1, width) < counts[:, None]
+    intervals = np.where(in_range, completed[:, 1:] + taken[:, 1:] - completed[:, :-1], 0)
+    divisor = np.maximum(num_intervals, 1)
+
+    average = _divide(intervals.sum(axis=1), divisor)
+    index = np.arange(n)
+    last = completed[index, np.maximum(counts - 1, 0)]
+    last_interval = intervals[index, np.maximum(num_intervals - 1, 0)]
+    deviation = np.where(in_range, np.abs(intervals - average[:, None]), 0)
+    spread = np.where(num_intervals > 1, _divide(deviation.sum(axis=1), divisor), 0)
+    return BatchStats(counts, intervals, average, spread, last_interval, last + average, eta)
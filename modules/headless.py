@@ -0,0 +1,225 @@
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from modules.common import fmt_dt, fmt_td, time_to_seconds
+from modules.model import DatabaseManager
+
+# Headless commands
+#
+# Reports for scripts and status bars and changes from automation, e.g.,
+#
+#     chores due --within 2d --format tsv
+#     chores record "fill bird feeders" --at "9:30a" --needed "yesterday 3p"
+#
+# go straight to the database. Only the model and the helpers in
+# common.py are imported - never the controller, rich or textual - so that
+# a command takes milliseconds even for a large database.
+
+COMMANDS = ("due", "record", "add", "bulk-record")
+
+FORMATS = ("text", "tsv")
+
+
+def parser(db_path: str) -> argparse.ArgumentParser:
+    # options shared by every command
+    database = argparse.ArgumentParser(add_help=False)
+    database.add_argument("--db", default=db_path, help=f"database file (default: {db_path})")
+    parser = argparse.ArgumentParser(prog="chores")
+    commands = parser.add_subparsers(dest="command", required=True)
+    due = commands.add_parser(
+        "due", parents=[database], help="list the chores forecast to be needed, soonest first"
+    )
+    due.add_argument(
+        "--within",
+        help="only chores needed within this period from now, e.g., 2d or 1w3d (default: all)",
+    )
+    due.add_argument("--format", choices=FORMATS, default="text")
+    record = commands.add_parser(
+        "record", parents=[database], help="record a completion of a chore"
+    )
+    record.add_argument("chore", help="the name or ID of the chore")
+    record.add_argument("--at", default="now", help="when it was completed (default: now)")
+    record.add_argument(
+        "--needed",
+        help="when it needed to be completed or 'none' to record no interval (default: --at)",
+    )
+    add = commands.add_parser("add", parents=[database], help="add a chore")
+    add.add_argument("name")
+    add.add_argument("--created", default="now", help="(default: now)")
+    bulk = commands.add_parser(
+        "bulk-record",
+        parents=[database],
+        help="record the completions in a file, all or none",
+        description="Each line of file, or stdin for -, is <chore>TAB<at>[TAB<needed>] "
+        "as for record. Blank lines and lines starting with # are skipped. The "
+        "completions are recorded in the order of <at> in a single transaction "
+        "and none are recorded if any line is invalid.",
+    )
+    bulk.add_argument("file")
+    return parser
+
+
+def parse_dt(text: str) -> int:
+    """
+    The timestamp for text, e.g., 'now', '2025-01-19 14:30' or, as in the
+    completion dialog, anything dateutil can parse. Raises ValueError.
+    """
+    text = text.strip()
+    if text.lower() == "now":
+        return round(datetime.now().timestamp())
+    try:
+        return round(datetime.fromisoformat(text).timestamp())
+    except ValueError:
+        pass
+    # dateutil takes longer to import than everything else here together
+    from dateutil.parser import parse
+
+    return round(parse(text).timestamp())
+
+
+def parse_needed(text: str):
+    # as record_completion expects: "" for the completion time or "none"
+    if text is None or text.strip().lower() in ("", "none"):
+        return (text or "").strip().lower()
+    return parse_dt(text)
+
+
+def due_rows(dbm: DatabaseManager, within: int = None, now: int = None):
+    """
+    Yield (chore_id, name, next, due, mean, spread) as strings for the
+    chores forecast within seconds from now or for every forecast chore
+    when within is None. due is the time until next, negative when past.
+    """
+    now = now if now is not None else round(datetime.now().timestamp())
+    before = now + within if within is not None else sys.maxsize
+    for chore_id, name, _, mean, mad_less, mad_more, next in dbm.due_chores(before):
+        sign = "" if now < next else "-"
+        # as in the list view: the spread on the side of next that now is on
+        spread = 2 * mad_more if sign else 2 * mad_less
+        yield (
+            str(chore_id),
+            name,
+            fmt_dt(next, False),
+            f"{sign}{fmt_td(abs(next - now))}",
+            fmt_td(mean),
+            fmt_td(spread),
+        )
+
+
+def due(dbm: DatabaseManager, within: int, format: str, out=sys.stdout):
+    rows = due_rows(dbm, within)
+    if format == "tsv":
+        out.write("id\tname\tnext\tdue\tmean\t+/-\n")
+        out.writelines("\t".join(row) + "\n" for row in rows)
+        return
+    # text: the name is padded to the longest shown so the rows must be
+    # collected first
+    rows = list(rows)
+    name_width = max((len(row[1]) for row in rows), default=4)
+    out.write(
+        f"{'id':>5}  {'name':<{name_width}}  {'next':<14}  {'due':>7}  {'mean':>6}  {'+/-':>6}\n"
+    )
+    for chore_id, name, next, due_in, mean, spread in rows:
+        out.write(
+            f"{chore_id:>5}  {name:<{name_width}}  {next:<14}  {due_in:>7}  {mean:>6}  {spread:>6}\n"
+        )
+
+
+def record(dbm: DatabaseManager, chore: str, at: int, needed) -> tuple[bool, str]:
+    found = dbm.find_chore(chore)
+    if not found:
+        return False, f"no chore or more than one chore matches '{chore}'"
+    chore_id, name = found
+    dbm.record_completion(chore_id, at, needed)
+    return True, f"recorded {fmt_dt(at, False)} for {name}"
+
+
+def add(dbm: DatabaseManager, name: str, created: int) -> tuple[bool, str]:
+    name = name.strip()
+    if not name:
+        return False, "the name is empty"
+    try:
+        chore_id = dbm.add_chore(name, created)
+    except sqlite3.IntegrityError:
+        return False, f"there is already a chore named '{name}'"
+    return True, f"added {name} with ID {chore_id}"
+
+
+def bulk_record(dbm: DatabaseManager, lines) -> tuple[bool, str]:
+    """
+    Record the completions in lines, <chore>TAB<at>[TAB<needed>], in a
+    single transaction - either all of them or, if any line is invalid,
+    none.
+    """
+    completions = []
+    for num, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if not 2 <= len(fields) <= 3:
+            return False, f"line {num}: expected <chore>TAB<at>[TAB<needed>]"
+        found = dbm.find_chore(fields[0])
+        if not found:
+            return False, f"line {num}: no chore or more than one chore matches '{fields[0]}'"
+        try:
+            at = parse_dt(fields[1])
+            needed = parse_needed(fields[2] if len(fields) > 2 else None)
+        except (ValueError, OverflowError) as e:
+            return False, f"line {num}: {e}"
+        completions.append((at, found[0], needed))
+    # the intervals are between successive completions of each chore
+    completions.sort(key=lambda x: x[0])
+    try:
+        for at, chore_id, needed in completions:
+            dbm.record_completion(chore_id, at, needed, commit=False)
+        dbm.conn.commit()
+    except Exception:
+        dbm.conn.rollback()
+        raise
+    return True, f"recorded {len(completions)} completions"
+
+
+def main(db_path: str, args: list) -> int:
+    args = parser(db_path).parse_args(args)
+    if not os.path.exists(args.db):
+        print(f"chores: no database at {args.db}", file=sys.stderr)
+        return 1
+    try:
+        if args.command == "due":
+            within = time_to_seconds(args.within) if args.within else None
+        elif args.command == "record":
+            at, needed = parse_dt(args.at), parse_needed(args.needed)
+        elif args.command == "add":
+            created = parse_dt(args.created)
+    except (ValueError, OverflowError) as e:
+        print(f"chores {args.command}: {e}", file=sys.stderr)
+        return 2
+    dbm = DatabaseManager(args.db)
+    try:
+        if args.command == "due":
+            due(dbm, within, args.format)
+            return 0
+        if args.command == "record":
+            ok, msg = record(dbm, args.chore, at, needed)
+        elif args.command == "add":
+            ok, msg = add(dbm, args.name, created)
+        elif args.file == "-":
+            ok, msg = bulk_record(dbm, sys.stdin)
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                ok, msg = bulk_record(dbm, f)
+    except BrokenPipeError:
+        # e.g., piped into head
+        sys.stderr.close()
+        return 0
+    except OSError as e:
+        print(f"chores {args.command}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        dbm.close()
+    print(msg, file=sys.stdout if ok else sys.stderr)
+    return 0 if ok else 1
@@ -1,18 +1,41 @@
-from logging import log
+import gzip
+import re
+import shutil
 import sqlite3
 from datetime import datetime
 import os
 
 from modules.common import log_msg
 
+LIST_CHORES = """
+    SELECT chore_id, name, created, first_completion, last_completion, mean_interval, mad_less, mad_more, next, (SELECT COUNT(*) FROM Intervals WHERE Intervals.chore_id = Chores.chore_id) AS num_completions
+    FROM Chores
+    ORDER BY next - mad_less, next, name
+"""
+
+# search_chores ranks at most this many matches - ranking costs a couple of
+# microseconds a match and a word or two typed can match every chore
+RANKED = 2000
+
+# setup_database stores this as the database's user_version - a database
+# that already has it is opened without the DDL and its commit, so that,
+# e.g., a headless report doesn't write to the database
+SCHEMA_VERSION = 1
+
 
 class DatabaseManager:
     def __init__(self, db_path: str = "chores.db", reset: bool = False):
         if reset and os.path.exists(db_path):
             os.remove(db_path)
+        self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
         self.cursor = self.conn.cursor()
-        self.setup_database()
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            self.fts = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'Chores_fts'"
+            ).fetchone() is not None
+        else:
+            self.setup_database()
 
     def setup_database(self):
         self.cursor.execute("""
@@ -37,9 +60,123 @@ class DatabaseManager:
                 FOREIGN KEY (chore_id) REFERENCES Chores(chore_id) ON DELETE CASCADE
             )
         """)
+        # due_chores walks this in order rather than sorting every chore
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS Chores_next ON Chores(next)"
+        )
+        # find_chore falls back to this when the case of a name doesn't match
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS Chores_name_nocase ON Chores(name COLLATE NOCASE)"
+        )
+        # data_version counts the changes to Chores and Intervals from any
+        # process, e.g., to tell whether a saved list is still current
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER DEFAULT 0
+            )
+        """)
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO Meta (key, value) VALUES ('data_version', 0)"
+        )
+        for table in ("Chores", "Intervals"):
+            for change in ("INSERT", "UPDATE", "DELETE"):
+                self.cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_{change.lower()}_version
+                    AFTER {change} ON {table}
+                    BEGIN
+                        UPDATE Meta SET value = value + 1 WHERE key = 'data_version';
+                    END
+                """)
+        self.fts = self.setup_search()
+        self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         self.conn.commit()
 
-    def add_chore(self, name, created):
+    def setup_search(self) -> bool:
+        """
+        Index the names of the chores in Chores_fts, an FTS5 table kept in
+        step with Chores by triggers, for search_chores. Returns False if
+        this SQLite was built without FTS5.
+        """
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'Chores_fts'"
+        ).fetchone()
+        try:
+            # the names are read from Chores itself; prefix indexes the
+            # first 2 and 3 characters of each token for searches as you type
+            self.cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS Chores_fts USING fts5(
+                    name, content='Chores', content_rowid='chore_id', prefix='2 3'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            log_msg(f"Searching without an index: {e}")
+            return False
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS Chores_fts_insert AFTER INSERT ON Chores
+            BEGIN
+                INSERT INTO Chores_fts (rowid, name) VALUES (new.chore_id, new.name);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS Chores_fts_delete AFTER DELETE ON Chores
+            BEGIN
+                INSERT INTO Chores_fts (Chores_fts, rowid, name)
+                VALUES ('delete', old.chore_id, old.name);
+            END
+        """)
+        self.cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS Chores_fts_update AFTER UPDATE OF name ON Chores
+            BEGIN
+                INSERT INTO Chores_fts (Chores_fts, rowid, name)
+                VALUES ('delete', old.chore_id, old.name);
+                INSERT INTO Chores_fts (rowid, name) VALUES (new.chore_id, new.name);
+            END
+        """)
+        if not exists:
+            # index the chores added before there was an index
+            self.cursor.execute("INSERT INTO Chores_fts (Chores_fts) VALUES ('rebuild')")
+        return True
+
+    def backup(self, backup_dir: str, pages: int = 64, sleep: float = 0.005):
+        """
+        Save a consistent copy of the database as backup_dir/yymmdd.db.gz,
+        named for the day the database was last modified, unless that file
+        already exists. The copy is made with SQLite's online backup, pages
+        at a time, so writers are only ever held up briefly, and then gzipped
+        to disk in chunks. Uses its own connections so it can run in a worker
+        thread. Returns (ok, msg).
+        """
+        if not os.path.exists(self.db_path):
+            return False, "nothing to backup"
+        os.makedirs(backup_dir, exist_ok=True)
+        modified = datetime.fromtimestamp(os.path.getmtime(self.db_path))
+        backup_gz = os.path.join(backup_dir, f"{modified.strftime('%y%m%d')}.db.gz")
+        if os.path.exists(backup_gz):
+            return False, f"Backup skipped - backup file already exists: {backup_gz}"
+
+        copy_path = os.path.join(backup_dir, "backup.db.tmp")
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
+        source = sqlite3.connect(self.db_path)
+        copy = sqlite3.connect(copy_path)
+        try:
+            source.backup(copy, pages=pages, sleep=sleep)
+            ok = copy.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+        finally:
+            copy.close()
+            source.close()
+        if not ok:
+            os.remove(copy_path)
+            return False, f"Backup failed - the copy of {self.db_path} did not pass quick_check"
+
+        with open(copy_path, "rb") as src, gzip.open(backup_gz + ".tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(backup_gz + ".tmp", backup_gz)
+        os.remove(copy_path)
+        return True, f"Backup completed: {backup_gz}"
+
+    def add_chore(self, name, created, commit: bool = True):
         """Add a new chore and return its ID."""
         if isinstance(created, datetime):
             created = round(created.timestamp())
@@ -47,7 +184,8 @@ class DatabaseManager:
             "INSERT INTO Chores (name, created) VALUES (?, ?)", (name, created)
         )
         new_chore_id = self.cursor.lastrowid  # Retrieve the new record ID
-        self.conn.commit()
+        if commit:
+            self.conn.commit()
         log_msg(f"Added chore {name} with ID {new_chore_id}.")
         return new_chore_id  # Return the ID to the caller
 
@@ -56,7 +194,14 @@ class DatabaseManager:
         self.cursor.execute("DELETE FROM Chores WHERE chore_id = ?", (chore_id,))
         self.conn.commit()
 
-    def record_completion(self, chore_id, completion_datetime, needed_datetime):
+    def record_completion(
+        self, chore_id, completion_datetime, needed_datetime, commit: bool = True
+    ):
+        """
+        Record the completion of chore_id and update its forecast. With
+        commit False the change is left in the open transaction, e.g., to
+        apply a batch of completions at once.
+        """
         self.cursor.execute(
             "SELECT chore_id, last_completion FROM Chores WHERE chore_id = ?",
             (chore_id,),
@@ -150,7 +295,86 @@ class DatabaseManager:
             "UPDATE Chores SET last_completion = ? WHERE chore_id = ?",
             (completion_datetime, chore_id),
         )
-        self.conn.commit()
+        if commit:
+            self.conn.commit()
+
+    def chore_exists(self, name: str) -> bool:
+        return (
+            self.conn.execute(
+                "SELECT 1 FROM Chores WHERE name = ?", (name,)
+            ).fetchone()
+            is not None
+        )
+
+    def search_chores(self, query: str, limit: int = 20, offset: int = 0):
+        """
+        Return up to limit (chore_id, name, next) for the chores whose
+        names contain words beginning with each of the words in query,
+        skipping the first offset. The matches are best first if there are
+        no more than RANKED of them and otherwise in the order the chores
+        were added.
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        if not self.fts:
+            # the same matches, less well ordered, without the index
+            conditions = " AND ".join(["(name LIKE ? OR name LIKE ?)"] * len(words))
+            params = [p for w in words for p in (f"{w}%", f"% {w}%")]
+            return self.conn.execute(
+                f"""
+                SELECT chore_id, name, next FROM Chores
+                WHERE {conditions}
+                ORDER BY name LIMIT ? OFFSET ?
+            """,
+                (*params, limit, offset),
+            ).fetchall()
+        # each word as a quoted prefix so FTS5 syntax in query is just text
+        match = " ".join(f'"{w}"*' for w in words)
+        matches = self.conn.execute(
+            """
+            SELECT count(*) FROM (
+                SELECT 1 FROM Chores_fts WHERE Chores_fts MATCH ? LIMIT ?
+            )
+        """,
+            (match, RANKED + 1),
+        ).fetchone()[0]
+        order = "rank" if matches <= RANKED else "rowid"
+        return self.conn.execute(
+            f"""
+            SELECT chore_id, name, next FROM Chores
+            JOIN (
+                SELECT rowid, {order} AS position FROM Chores_fts WHERE Chores_fts MATCH ?
+                ORDER BY {order} LIMIT ? OFFSET ?
+            ) AS found ON found.rowid = Chores.chore_id
+            ORDER BY found.position
+        """,
+            (match, limit, offset),
+        ).fetchall()
+
+    def find_chore(self, name_or_id: str):
+        """
+        Return (chore_id, name) for the chore whose ID is name_or_id, or
+        whose name is name_or_id ignoring case, or None if there is no such
+        chore or the name matches more than one chore.
+        """
+        name_or_id = name_or_id.strip()
+        if name_or_id.isdigit():
+            return self.conn.execute(
+                "SELECT chore_id, name FROM Chores WHERE chore_id = ?",
+                (int(name_or_id),),
+            ).fetchone()
+        # the UNIQUE index on name, then Chores_name_nocase
+        chore = self.conn.execute(
+            "SELECT chore_id, name FROM Chores WHERE name = ?", (name_or_id,)
+        ).fetchone()
+        if chore:
+            return chore
+        chores = self.conn.execute(
+            "SELECT chore_id, name FROM Chores WHERE name = ? COLLATE NOCASE LIMIT 2",
+            (name_or_id,),
+        ).fetchall()
+        return chores[0] if len(chores) == 1 else None
 
     def list_intervals(self, chore_id):
         """Retrieve all intervals for a given chore_id."""
@@ -167,13 +391,49 @@ class DatabaseManager:
         # return [row[0] for row in self.cursor.fetchall()]
 
     def list_chores(self):
-        self.cursor.execute("""
-            SELECT chore_id, name, created, first_completion, last_completion, mean_interval, mad_less, mad_more, next, (SELECT COUNT(*) FROM Intervals WHERE Intervals.chore_id = Chores.chore_id) AS num_completions
-            FROM Chores 
-            ORDER BY next - mad_less, next, name
-        """)
+        self.cursor.execute(LIST_CHORES)
         return self.cursor.fetchall()
 
+    def data_version(self) -> int:
+        return self.conn.execute(
+            "SELECT value FROM Meta WHERE key = 'data_version'"
+        ).fetchone()[0]
+
+    def read_chores(self) -> tuple[int, list]:
+        """
+        Return (data_version, chores) with chores as from list_chores, both
+        from the same read. Uses its own connection so it can run in a
+        worker thread.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # a read transaction so that no commit can come between the two
+            conn.execute("BEGIN")
+            version = conn.execute(
+                "SELECT value FROM Meta WHERE key = 'data_version'"
+            ).fetchone()[0]
+            chores = conn.execute(LIST_CHORES).fetchall()
+            conn.rollback()
+        finally:
+            conn.close()
+        return version, chores
+
+    def due_chores(self, before: int):
+        """
+        Iterate over (chore_id, name, last_completion, mean_interval,
+        mad_less, mad_more, next) for the chores with a forecast before the
+        timestamp before, soonest first, straight from the cursor.
+        """
+        return self.conn.execute(
+            """
+            SELECT chore_id, name, last_completion, mean_interval, mad_less, mad_more, next
+            FROM Chores
+            WHERE next > 0 AND next <= ?
+            ORDER BY next
+        """,
+            (before,),
+        )
+
     def show_chore(self, name):
         self.cursor.execute(
             """
@@ -0,0 +1,101 @@
+import re
+
+# Name index
+#
+# An inverted index from the words in tracker names to the doc_ids of the
+# trackers with those words, stored in the datastore so that finding a
+# tracker by name never means reading every tracker. The words of
+#
+#     fill bird feeders @home
+#
+# are fill, bird, feeders and home, casefolded, and, for the @context
+# parts, @home as well. Each word of a query must begin one of the words of
+# a name - "bi fe" and "@ho" both match - and is looked up as a range of
+# the BTree's sorted keys, so a search takes time in proportion to the
+# words and trackers matched rather than the number of trackers.
+#
+# BTrees is imported when first needed, as in tracker.py.
+
+WORD = re.compile(r"\w+")
+QUERY_WORD = re.compile(r"@?\w+")
+
+
+def name_tokens(name: str) -> set:
+    subject, *contexts = name.casefold().split('@')
+    tokens = set(WORD.findall(subject))
+    for context in contexts:
+        words = WORD.findall(context)
+        tokens.update(words)
+        tokens.update('@' + word for word in words)
+    return tokens
+
+
+def query_tokens(query: str) -> list:
+    return QUERY_WORD.findall(query.casefold())
+
+
+def new_name_index(trackers=()):
+    """The OOBTree token -> IITreeSet of doc_ids for trackers."""
+    from BTrees.OOBTree import OOBTree
+
+    index = NameIndex(OOBTree())
+    for tracker in trackers:
+        index.add(tracker.doc_id, tracker.name)
+    return index.tokens
+
+
+class NameIndex:
+    """
+    Maintain and search tokens, the OOBTree from new_name_index kept in
+    the datastore root.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def add(self, doc_id: int, name: str):
+        for token in name_tokens(name):
+            doc_ids = self.tokens.get(token)
+            if doc_ids is None:
+                from BTrees.IIBTree import IITreeSet
+                doc_ids = self.tokens[token] = IITreeSet()
+            doc_ids.add(doc_id)
+
+    def remove(self, doc_id: int, name: str):
+        for token in name_tokens(name):
+            doc_ids = self.tokens.get(token)
+            if doc_ids is None:
+                continue
+            if doc_id in doc_ids:
+                doc_ids.remove(doc_id)
+            if not doc_ids:
+                del self.tokens[token]
+
+    def rename(self, doc_id: int, old_name: str, new_name: str):
+        self.remove(doc_id, old_name)
+        self.add(doc_id, new_name)
+
+    def prefixed(self, prefix: str) -> set:
+        """The doc_ids of the names with a word beginning with prefix."""
+        doc_ids = set()
+        # every key that begins with prefix sorts between it and this
+        for token_ids in self.tokens.values(min=prefix, max=prefix + '\U0010ffff'):
+            doc_ids.update(token_ids)
+        return doc_ids
+
+    def search(self, query: str):
+        """
+        The doc_ids of the names with a word beginning with each of the
+        words of query or None if query has no words.
+        """
+        words = query_tokens(query)
+        if not words:
+            return None
+        # the longest words first - they usually match the fewest names
+        words.sort(key=len, reverse=True)
+        doc_ids = self.prefixed(words[0])
+        for word in words[1:]:
+            if not doc_ids:
+                break
+            doc_ids &= self.prefixed(word)
+        return doc_ids
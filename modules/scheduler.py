@@ -0,0 +1,173 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Callable
+
+logger = logging.getLogger()
+
+# Periodic job scheduler
+
+
+class Job:
+    """
+    A named job: fn(*args) runs every interval seconds, or just once when
+    interval is None. Blocking jobs run on executor (anything with a
+    concurrent.futures style submit, e.g. a StorageWorker) or, if that is
+    None, on the event loop's default thread pool so that they never hold
+    up the loop.
+    """
+
+    def __init__(self, name: str, fn: Callable, args: tuple, interval: float = None,
+                 delay: float = 0, align: bool = False, blocking: bool = False,
+                 executor=None, tolerance: float = 1.0):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.interval = interval
+        self.delay = delay
+        self.align = align
+        self.blocking = blocking
+        self.executor = executor
+        # a run that starts more than tolerance seconds after its deadline
+        # counts as missed
+        self.tolerance = tolerance
+        self.deadline = None
+        self.task = None
+        self.runs = 0
+        self.failures = 0
+        self.missed = 0
+        self.last_time = 0.0
+        self.max_time = 0.0
+        self.total_time = 0.0
+        self.max_late = 0.0
+
+    def first_deadline(self, now: float) -> float:
+        # the first deadline in loop time. Aligned jobs run when the wall
+        # clock is a multiple of interval, e.g. on the minute for 60.
+        if self.align and self.interval:
+            wall = time.time() + self.delay
+            return now + self.delay + (self.interval - wall % self.interval) % self.interval
+        return now + self.delay
+
+    def metrics(self) -> dict:
+        return dict(
+            runs=self.runs,
+            failures=self.failures,
+            missed=self.missed,
+            last=self.last_time,
+            max=self.max_time,
+            mean=self.total_time / self.runs if self.runs else 0.0,
+            max_late=self.max_late,
+        )
+
+
+class Scheduler:
+    """
+    Run named periodic and one-shot jobs as tasks in an asyncio event loop,
+    e.g. the one running the prompt_toolkit application. Jobs added before
+    start() begin when it is called.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.loop = None
+
+    def every(self, name: str, interval: float, fn: Callable, *args, **kwargs) -> Job:
+        """Run fn(*args) every interval seconds. See Job for kwargs."""
+        return self._add(Job(name, fn, args, interval=interval, **kwargs))
+
+    def once(self, name: str, delay: float, fn: Callable, *args, **kwargs) -> Job:
+        """Run fn(*args) once after delay seconds. See Job for kwargs."""
+        return self._add(Job(name, fn, args, delay=delay, **kwargs))
+
+    def cancel(self, name: str):
+        job = self.jobs.pop(name, None)
+        if job and job.task:
+            job.task.cancel()
+
+    def start(self):
+        """Start the jobs. Must be called from the running event loop."""
+        self.loop = asyncio.get_running_loop()
+        for job in self.jobs.values():
+            self._start(job)
+
+    def stop(self):
+        for job in self.jobs.values():
+            if job.task:
+                job.task.cancel()
+                job.task = None
+        self.loop = None
+
+    def metrics(self) -> dict:
+        return {name: job.metrics() for name, job in self.jobs.items()}
+
+    def report(self) -> str:
+        lines = [f"{'job':<16} {'runs':>5} {'missed':>6} {'failed':>6} {'mean':>8} {'max':>8} {'late':>8}"]
+        for name, m in self.metrics().items():
+            lines.append(
+                f"{name[:16]:<16} {m['runs']:>5} {m['missed']:>6} {m['failures']:>6} "
+                f"{m['mean'] * 1000:>6.1f}ms {m['max'] * 1000:>6.1f}ms {m['max_late'] * 1000:>6.0f}ms"
+            )
+        return "\n".join(lines)
+
+    def _add(self, job: Job) -> Job:
+        self.cancel(job.name)
+        self.jobs[job.name] = job
+        if self.loop is not None:
+            # already running - start it on the loop, whichever thread this is
+            self.loop.call_soon_threadsafe(self._start, job)
+        return job
+
+    def _start(self, job: Job):
+        done = job.interval is None and job.runs > 0
+        if self.jobs.get(job.name) is job and job.task is None and not done:
+            job.deadline = job.first_deadline(self.loop.time())
+            job.task = self.loop.create_task(self._run(job))
+
+    async def _run(self, job: Job):
+        loop = self.loop
+        while True:
+            wait = job.deadline - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            late = loop.time() - job.deadline
+            job.max_late = max(job.max_late, late)
+            if late > job.tolerance:
+                job.missed += 1
+
+            started = time.perf_counter()
+            try:
+                await self._call(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failures += 1
+                logger.error(f"job '{job.name}' failed: {e}")
+            job.last_time = time.perf_counter() - started
+            job.max_time = max(job.max_time, job.last_time)
+            job.total_time += job.last_time
+            job.runs += 1
+
+            if job.interval is None:
+                # done, but kept for its metrics
+                job.task = None
+                return
+            job.deadline += job.interval
+            behind = loop.time() - job.deadline
+            if behind > 0:
+                # skip, and count, the deadlines that have already passed
+                skipped = int(behind // job.interval) + 1
+                job.missed += skipped
+                job.deadline += skipped * job.interval
+
+    async def _call(self, job: Job):
+        if job.blocking:
+            if job.executor is not None:
+                await asyncio.wrap_future(job.executor.submit(job.fn, *job.args))
+            else:
+                await self.loop.run_in_executor(None, job.fn, *job.args)
+        elif inspect.iscoroutinefunction(job.fn):
+            await job.fn(*job.args)
+        else:
+            job.fn(*job.args)
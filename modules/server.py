@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import socket
+from typing import Awaitable, Callable
+
+logger = logging.getLogger()
+
+# Command server
+#
+# While trf holds the datastore open, either as the full screen app or as
+# `trf daemon`, it listens on a Unix socket in its home directory so that
+# other processes can make changes without opening the datastore
+# themselves. The protocol is a line at a time in UTF-8: each request is a
+# line of tab separated fields, the command followed by its arguments,
+# and each reply is a single line
+#
+#     ok<TAB>message
+#     error<TAB>message
+#
+# with any newlines in message replaced by spaces. See client.py.
+
+
+def encode_reply(ok: bool, msg: str) -> bytes:
+    msg = " ".join(str(msg).splitlines())
+    return f"{'ok' if ok else 'error'}\t{msg}\n".encode()
+
+
+class CommandServer:
+    """
+    Serve requests on the Unix socket at path. handle(fields) is awaited
+    with the fields of each request and returns (ok, msg). start() must be
+    called from the running event loop.
+    """
+
+    def __init__(self, path: str, handle: Callable[[list], Awaitable[tuple]]):
+        self.path = path
+        self.handle = handle
+        self.requests = 0
+        self._server = None
+
+    async def start(self) -> bool:
+        if in_use(self.path):
+            logger.error(f"{self.path} is in use by another trf - not serving commands")
+            return False
+        try:
+            # left behind by a trf that didn't exit cleanly
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # bound with no access for group and others from the start - a chmod
+        # after the bind would leave a moment when others could connect. The
+        # umask is the process's, so it is only changed for the bind itself.
+        umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        except BaseException:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        self._server = await asyncio.start_unix_server(self._serve, sock=sock)
+        logger.info(f"serving commands on {self.path}")
+        return True
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                fields = line.decode(errors="replace").rstrip("\r\n").split("\t")
+                self.requests += 1
+                try:
+                    ok, msg = await self.handle(fields)
+                except Exception as e:
+                    logger.error(f"command {fields} failed: {e}")
+                    ok, msg = False, f"{fields[0]} failed: {e}"
+                writer.write(encode_reply(ok, msg))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def in_use(path: str) -> bool:
+    # whether something is accepting connections on path
+    if not os.path.exists(path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
@@ -0,0 +1,755 @@
+import glob
+import logging
+import os
+import shlex
+import subprocess
+import time
+import traceback
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+from logging.handlers import TimedRotatingFileHandler
+from typing import Any, Callable
+
+from . import compression, db_path, log_level, trf_home
+from . import forecast, tracker
+from .alarms import AlarmEngine
+from .backup import ZIP_CODECS, backup_incremental, rotate_backups
+from .estimators import ESTIMATORS
+from .names import NameIndex, new_name_index
+from .tracker import DEFAULT_SETTINGS, Tracker
+from .worker import StorageWorker
+
+logger = logging.getLogger()
+
+# Persistence
+#
+# The datastore, its settings and TrackerStore, which makes every change
+# to the trackers, together with the logging and housekeeping jobs that
+# any process holding the datastore runs. Nothing here imports
+# prompt_toolkit, so `trf daemon` never loads the display. ZODB and
+# ruamel.yaml are only imported when the datastore is opened.
+
+def setup_logging(trf_home, log_level=logging.INFO, backup_count=7):
+    """
+    Set up logging with daily rotation and a specified log level.
+
+    Args:
+        trf_home (str): The home directory for storing log files.
+        log_level (int): The log level (e.g., logging.DEBUG, logging.INFO).
+        backup_count (int): Number of backup log files to keep.
+    """
+    log_dir = os.path.join(trf_home, "logs")
+
+    # Ensure the logs directory exists
+    os.makedirs(log_dir, exist_ok=True)
+
+    logfile = os.path.join(log_dir, "trf.log")
+
+    # Create a TimedRotatingFileHandler for daily log rotation
+    handler = TimedRotatingFileHandler(
+        logfile, when="midnight", interval=1, backupCount=backup_count
+    )
+
+    # Set the suffix to add the date and ".log" extension to the rotated files
+    handler.suffix = "%y%m%d.log"
+
+    # Create a formatter
+    formatter = logging.Formatter(
+        fmt='--- %(asctime)s - %(levelname)s - %(module)s.%(funcName)s\n    %(message)s',
+        datefmt="%y-%m-%d %H:%M:%S"
+    )
+
+    # Set the formatter to the handler
+    handler.setFormatter(formatter)
+
+    # Define a custom namer function to change the log file naming format
+    def custom_namer(filename):
+        # Replace "tracker.log." with "tracker-" in the rotated log filename
+        return filename.replace("trf.log.", "trf")
+
+    # Set the handler's namer function
+    handler.namer = custom_namer
+
+    # Get the root logger
+    logger = logging.getLogger()
+    logger.setLevel(log_level)
+
+    # Clear any existing handlers (if needed)
+    if logger.hasHandlers():
+        logger.handlers.clear()
+
+    # Add the TimedRotatingFileHandler to the logger
+    logger.addHandler(handler)
+
+    logger.info("Logging setup complete.")
+    logging.info(f"\n### Logging initialized at level {log_level} ###")
+
+    return logger
+
+def cleanup_old_logs():
+    backup_count = 7
+    log_dir = os.path.join(trf_home, "logs")
+    log_files = sorted(glob.glob(os.path.join(log_dir, f"trf?*.log")))
+    logger.debug(f"{log_files = }")
+    if len(log_files) > backup_count:
+        count = 0
+        for log_file in log_files[:-backup_count]:
+            count += 1
+            os.remove(log_file)
+            logger.debug(f"Removed old log file: {log_file}")
+        logger.info(f"Cleaned up {count} old log files.")
+
+def init_db(db_path, compression=None):
+    """
+    Initialize the ZODB database using the specified file. Records are
+    compressed with compression ('zlib' or 'lzma') if given and compressed
+    records are always read.
+    """
+    import ZODB
+    import ZODB.FileStorage
+    from transaction import TransactionManager
+
+    from .compress import CompressedStorage
+
+    storage = CompressedStorage(ZODB.FileStorage.FileStorage(db_path), compression)
+    db = ZODB.DB(storage)
+    db.classFactory = class_factory
+    # An explicit transaction manager rather than the thread-local default
+    # so that changes can be committed from the storage worker thread.
+    transaction_manager = TransactionManager()
+    connection = db.open(transaction_manager=transaction_manager)
+    root = connection.root()
+    return storage, db, connection, root, transaction_manager
+
+
+def class_factory(connection, modulename: str, globalname: str):
+    # Records written before the model was split out of trf.py refer to
+    # trf.Tracker - find it here rather than importing the display
+    if globalname == 'Tracker' and modulename.rsplit('.', 1)[-1] == 'trf':
+        return Tracker
+    from ZODB.broken import find_global
+    return find_global(modulename, globalname)
+
+
+def close_db(db, connection):
+    """
+    Close the ZODB database and its connection.
+    """
+    connection.close()
+    db.close()
+
+
+def default_settings():
+    """
+    A CommentedMap of DEFAULT_SETTINGS, which is stored in the datastore
+    and edited as YAML with these comments.
+    """
+    from ruamel.yaml.comments import CommentedMap
+
+    settings = CommentedMap(DEFAULT_SETTINGS)
+    settings.yaml_set_comment_before_after_key(
+        'ampm',
+        before='trf settings\n\n[ampm] Display 12-hour times with AM or PM if true, \notherwise display 24-hour times'
+        )
+    settings.yaml_set_comment_before_after_key(
+        'yearfirst',
+        before='\n[yearfirst] When parsing ambiguous dates, assume the year is first \nif true, otherwise assume the month is first'
+        )
+    settings.yaml_set_comment_before_after_key(
+        'dayfirst',
+        before='\n[dayfirst] When parsing ambiguous dates, assume the day is first \nif true, otherwise assume the month is first'
+        )
+    settings.yaml_set_comment_before_after_key(
+        'η',
+        before='\n[η] Use this integer multiple of "spread" for setting the \ntimely-to-tardy next confidence interval'
+        )
+    settings.yaml_set_comment_before_after_key(
+        'estimator',
+        before='\n[estimator] Estimate the next interval and its spread with "window" for \nthe average and mean absolute deviation of the intervals in the stored \nhistory, "ewma" for exponentially weighted versions of these that reflect \nevery completion ever recorded or "quantile" for the median and half the \nrange from the 10% to the 90% quantile of every interval'
+        )
+    settings.yaml_set_comment_before_after_key(
+        'backup',
+        before='\n[backup] Either "zip" for a daily zip file of the datastore or \n"incremental" for an hourly copy of just the changes since the last backup'
+        )
+    settings.yaml_set_comment_before_after_key(
+        'backup_codec',
+        before='\n[backup_codec] Compress the daily zip files with "deflate" or "lzma", \nor "stored" for no compression'
+        )
+    settings.yaml_set_comment_before_after_key(
+        'alarm_command',
+        before='\n[alarm_command] If given, a command to run when a tracker becomes cool, \nwarm or hot, e.g., notify-send trf "{name} is {state}"'
+        )
+    return settings
+
+
+def check_settings(settings: dict) -> tuple[bool, str]:
+    """
+    Check the settings that would otherwise only fail later, on another
+    thread, e.g., backup_codec when the daily backup is made.
+    """
+    codec = settings.get('backup_codec', DEFAULT_SETTINGS['backup_codec'])
+    if codec not in ZIP_CODECS:
+        return False, f"backup_codec must be one of {', '.join(ZIP_CODECS)}, not '{codec}'"
+    return True, ""
+
+
+class TrackerStore:
+    """
+    The trackers and settings in the datastore. Only the storage worker
+    reads or changes them: changes are made with submit and committed in
+    batches and anything else the display needs is fetched with read or
+    comes from rows, the plain copies published after each commit.
+    """
+
+    def __init__(self, storage, db, connection, root, transaction) -> None:
+        # Ensure that all required arguments are provided during the first initialization
+        if db is None or connection is None or root is None or transaction is None:
+            raise ValueError("db, connection, root, and transaction must be provided on the first initialization.")
+
+        # Initialize instance attributes
+        self.storage = storage
+        self.db = db
+        self.connection = connection
+        self.root = root
+        self.transaction = transaction
+        self.trackers = {}
+        self.names = None
+        self.commits = 0
+        self._batch = None
+        self.pending = 0
+        self.alarms = AlarmEngine()
+        # a plain copy of the stored settings for reading and its version,
+        # which changes whenever the settings do
+        self.snapshot = {}
+        self.settings_version = 0
+        # the doc_ids of the trackers with archived completions to compact -
+        # None until the trackers are first checked
+        self.uncompacted = None
+        # doc_id -> TrackerRow, replaced as a whole by publish and never
+        # changed so that the UI thread can read it at any time, and the
+        # changes to it expected from submitted commands still pending
+        self.rows = {}
+        self.expected = []
+        self.changed = set()
+        self.publish_all = True
+        tracker.store[0] = self
+        logger.info(f"using data from\n  {self.db}")
+        self.load_data()
+        self.publish()
+        self.worker = StorageWorker()
+        # zip backups only read the datastore files and can be slow so
+        # they get their own, lower priority, thread
+        self.backup_worker = StorageWorker("backup", nice=10)
+
+    def load_data(self):
+        try:
+            if 'settings' not in self.root:
+                self.root['settings'] = default_settings()
+                self.transaction.commit()
+            self.settings = self.root['settings']
+            if 'trackers' not in self.root:
+                self.root['trackers'] = {}
+                self.root['next_id'] = 1  # Initialize the ID counter
+                self.transaction.commit()
+            self.trackers = self.root['trackers']
+            if 'name_index' not in self.root:
+                # a datastore from before the index - build it once
+                self.root['name_index'] = new_name_index(self.trackers.values())
+                self.transaction.commit()
+            self.names = NameIndex(self.root['name_index'])
+        except Exception as e:
+            logger.error(f"Warning: could not load data from '{db_path}': {str(e)}")
+            self.trackers = {}
+            self.names = NameIndex(new_name_index())
+        self.snapshot_settings()
+
+    def snapshot_settings(self):
+        self.snapshot = dict(getattr(self, 'settings', None) or DEFAULT_SETTINGS)
+        ok, msg = check_settings(self.snapshot)
+        if not ok:
+            # e.g., edited by an older trf - use the default instead
+            logger.error(f"{msg} - using '{DEFAULT_SETTINGS['backup_codec']}'")
+            self.snapshot['backup_codec'] = DEFAULT_SETTINGS['backup_codec']
+        self.settings_version += 1
+
+    def restore_defaults(self):
+        with self.batch("restore defaults"):
+            before = self.snapshot
+            self.root['settings'] = default_settings()
+            self.settings = self.root['settings']
+            self.snapshot_settings()
+            self.apply_settings(before)
+            self.save_data()
+        logger.info(f"Restored default settings:\n{self.settings}")
+
+    def refresh_info(self):
+        # the info only lives in memory so nothing is marked changed
+        started = time.perf_counter()
+        self.publish_all = True
+        trackers = list(self.trackers.values())
+        eta = self.snapshot['η']
+        # the batch only computes the window statistics
+        window = self.snapshot.get('estimator', 'window') not in ESTIMATORS
+        if forecast.np is None or eta != int(eta) or not window:
+            for tracker in trackers:
+                tracker.compute_info()
+        else:
+            stats = Tracker.compute_infos(trackers, int(eta))
+            self.alarms.update_many(
+                (tracker.doc_id, tracker.name, *bounds)
+                for tracker, bounds in zip(trackers, stats.bounds()))
+        logger.info(f"Refreshed tracker info for {len(trackers)} trackers in {time.perf_counter() - started:.3f}s.")
+
+    def refresh_bounds(self):
+        # After a change to the settings only the bounds change. The info of
+        # each tracker is rebuilt from its statistics when next needed but
+        # the alarms need the new bounds now.
+        started = time.perf_counter()
+        eta = self.snapshot['η']
+        self.alarms.update_many(
+            (tracker.doc_id, tracker.name, *tracker.bounds(eta))
+            for tracker in self.trackers.values())
+        logger.info(f"Refreshed bounds for {len(self.trackers)} trackers in {time.perf_counter() - started:.3f}s.")
+
+    # def set_setting(self, key, value):
+    #     if key in self.settings:
+    #         self.settings[key] = value
+    #         # self.zodb_root[0] = self.settings  # Update the ZODB storage
+    #         self.root[0] = self.settings  # Update the ZODB storage
+    #         self.transaction.commit()
+    #     else:
+    #         logger.error(f"Setting '{key}' not found.")
+
+    def get_setting(self, key):
+        return self.snapshot.get(key, None)
+
+    def add_tracker(self, name: str) -> None:
+        doc_id = self.root['next_id']
+        # Create a new tracker with the current doc_id
+        tracker = Tracker(name, doc_id)
+        # Add the tracker to the trackers dictionary
+        self.trackers[doc_id] = tracker
+        self.names.add(doc_id, name)
+        self.changed.add(doc_id)
+        # Increment the next_id for the next tracker
+        self.root['next_id'] += 1
+        # Save the updated data
+        self.save_data()
+
+        logger.info(f"Tracker '{name}' added with ID {doc_id}")
+        return doc_id
+
+    def find_tracker(self, name: str) -> tuple[bool, Any]:
+        """
+        (True, doc_id) for the tracker called name, ignoring case if no
+        name matches exactly, or with name as its doc_id, otherwise
+        (False, msg).
+        """
+        name = name.strip()
+        if name.isdigit() and int(name) in self.trackers:
+            return True, int(name)
+        # the name index narrows the trackers to those with the same words
+        doc_ids = self.find_trackers(name)
+        if doc_ids is None:
+            candidates = list(self.trackers.items())
+        else:
+            candidates = [(doc_id, self.trackers[doc_id]) for doc_id in doc_ids if doc_id in self.trackers]
+        matches = [doc_id for doc_id, tracker in candidates if tracker.name == name]
+        if not matches:
+            folded = name.casefold()
+            matches = [doc_id for doc_id, tracker in candidates if tracker.name.casefold() == folded]
+        if len(matches) == 1:
+            return True, matches[0]
+        if matches:
+            return False, f"{len(matches)} trackers are named '{name}' - use the doc_id"
+        return False, f"no tracker named '{name}'"
+
+    def find_trackers(self, query: str):
+        """
+        The doc_ids of the trackers with a word in their names beginning
+        with each word of query, from the name index, or None if query has
+        no words.
+        """
+        return self.names.search(query)
+
+    # Reads for the display, run on the storage worker by read(), e.g.,
+    #     tracker_manager.read(tracker_manager.tracker_info, doc_id, then=show)
+    # and None for a tracker that no longer exists.
+
+    def tracker_info(self, doc_id: int):
+        tracker = self.trackers.get(doc_id)
+        return tracker.get_tracker_info() if tracker is not None else None
+
+    def tracker_history(self, doc_id: int):
+        tracker = self.trackers.get(doc_id)
+        return tracker.format_history() if tracker is not None else None
+
+    def tracker_summary(self, doc_id: int):
+        # loads the summary BTree, so only when asked for
+        tracker = self.trackers.get(doc_id)
+        return tracker.format_monthly_summary() if tracker is not None else None
+
+
+    # The methods that change trackers are run on the storage worker, e.g.,
+    #     tracker_manager.submit(tracker_manager.rename_tracker, doc_id, name)
+    # and return (ok, msg).
+
+    def rename_tracker(self, doc_id: int, new_name: str):
+        tracker = self.trackers[doc_id]
+        self.names.rename(doc_id, tracker.name, new_name)
+        return tracker.rename(new_name)
+
+    def record_completion(self, doc_id: int, comp: tuple[datetime, timedelta]):
+        # dt will be a datetime
+        return self.trackers[doc_id].record_completion(comp)
+
+    def record_completions(self, doc_id: int, completions: list[tuple[datetime, timedelta]]):
+        return self.trackers[doc_id].record_completions(completions)
+
+    def remove_completions(self, doc_id: int):
+        return self.trackers[doc_id].remove_completions()
+
+    def compact_history(self) -> int:
+        # Roll the archived completions of the trackers into their monthly
+        # summaries. Run by the scheduler on the storage worker.
+        if self.uncompacted is None:
+            self.uncompacted = {doc_id for doc_id, tracker in self.trackers.items() if tracker.archive}
+        started = time.perf_counter()
+        count = 0
+        with self.batch("compact history"):
+            for doc_id in list(self.uncompacted):
+                tracker = self.trackers.get(doc_id)
+                if tracker is not None:
+                    count += tracker.compact()
+                self.uncompacted.discard(doc_id)
+            if count:
+                self.save_data()
+        if count:
+            logger.info(f"Compacted {count} completions in {time.perf_counter() - started:.3f}s")
+        return count
+
+    def update_settings(self, updated_settings: dict):
+        ok, msg = check_settings(updated_settings)
+        if not ok:
+            return False, msg
+        before = self.snapshot
+        self.settings.update(updated_settings)
+        self.snapshot_settings()
+        self.apply_settings(before)
+        self.save_data()
+
+    def apply_settings(self, before: dict):
+        # bring the trackers up to date with the settings that have changed
+        # from before
+        if self.snapshot.get('estimator') != before.get('estimator'):
+            self.refresh_info()
+        elif self.snapshot.get('η') != before.get('η'):
+            self.refresh_bounds()
+
+    def submit(self, fn: Callable, *args, name: str = None, then: Callable = None,
+               expect: dict = None) -> Future:
+        """
+        Queue fn(*args) to run in a batch on the storage worker so that its
+        changes are committed without blocking the UI. Returns a Future for
+        the result. When it is done, then(result) is called, on the UI
+        thread if there is one, and failures, including an (False, msg)
+        result, are reported. expect, doc_id -> the TrackerRow expected
+        after fn or None for a deletion, is shown in place of rows until
+        fn is done and dropped, undoing it, if fn fails.
+        """
+        name = name or fn.__name__.strip('_').replace('_', ' ')
+        def command():
+            with self.batch(name):
+                return fn(*args)
+        self.pending += 1
+        if expect:
+            self.expected.append(expect)
+        self.show_pending()
+        future = self.worker.submit(command)
+        future.add_done_callback(lambda f: self.call_in_ui(self._finish, name, f, then, expect))
+        return future
+
+    def _finish(self, name: str, future: Future, then: Callable = None, expect: dict = None):
+        self.pending -= 1
+        if expect:
+            # the published rows now have the change or it failed
+            self.expected = [x for x in self.expected if x is not expect]
+        self.show_pending()
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"{name} failed: {e}\n{traceback.format_exc()}")
+            self.report(f"Could not save changes - {name} failed:\n  {e}")
+            return
+        if isinstance(result, tuple) and result and result[0] is False:
+            self.report(result[1])
+            return
+        if then:
+            then(result)
+
+    def read(self, fn: Callable, *args, then: Callable) -> Future:
+        """
+        Queue fn(*args) to read the datastore on the storage worker, after
+        any changes already submitted, and call then(result), on the UI
+        thread if there is one. Failures are reported.
+        """
+        name = fn.__name__.strip('_').replace('_', ' ')
+        future = self.worker.submit(fn, *args)
+        future.add_done_callback(lambda f: self.call_in_ui(self._read, name, f, then))
+        return future
+
+    def _read(self, name: str, future: Future, then: Callable):
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"{name} failed: {e}\n{traceback.format_exc()}")
+            self.report(f"Could not read the datastore - {name} failed:\n  {e}")
+            return
+        then(result)
+
+    def row(self, doc_id: int):
+        """The TrackerRow of doc_id as displayed or None."""
+        for expect in reversed(self.expected):
+            if doc_id in expect:
+                return expect[doc_id]
+        return self.rows.get(doc_id)
+
+    def shown_rows(self) -> list:
+        """The TrackerRows as displayed, with the pending changes."""
+        if not self.expected:
+            return list(self.rows.values())
+        rows = dict(self.rows)
+        for expect in self.expected:
+            rows.update(expect)
+        return [row for row in rows.values() if row is not None]
+
+    def publish(self):
+        # Copy the trackers changed since the last commit, or all of them,
+        # to a new dict of rows for the display. Run on the storage worker.
+        if self.publish_all:
+            rows = {doc_id: tracker.row() for doc_id, tracker in self.trackers.items()}
+        elif self.changed:
+            rows = dict(self.rows)
+            for doc_id in self.changed:
+                tracker = self.trackers.get(doc_id)
+                if tracker is None:
+                    rows.pop(doc_id, None)
+                else:
+                    rows[doc_id] = tracker.row()
+        else:
+            return
+        self.changed = set()
+        self.publish_all = False
+        self.rows = rows
+
+    # Without a display, e.g. for `trf daemon`, these just log. TrackerManager
+    # overrides them.
+
+    def call_in_ui(self, fn: Callable, *args):
+        fn(*args)
+
+    def show_pending(self):
+        pass
+
+    def report(self, msg: str):
+        logger.info(msg)
+
+    def get_tracker_data(self, doc_id: int = 0):
+        if doc_id is None:
+            # logger.debug("data for all trackers:")
+            for k, v in self.trackers.items():
+                logger.debug(f"   {k:2> }. {v.get_tracker_data()}")
+        elif doc_id in self.trackers:
+            logger.debug(f"data for tracker {doc_id}:")
+            logger.debug(f"   {doc_id:2> }. {self.trackers[doc_id].get_tracker_data()}")
+
+    def save_data(self):
+        self.root['trackers'] = self.trackers
+        if self._batch is not None:
+            # defer the commit to the end of the batch
+            self._batch['changes'] += 1
+            self.transaction.savepoint(True)
+            return
+        logger.info(f"Saving data: {self.trackers = }")
+        self.commit()
+
+    def commit(self):
+        self.transaction.commit()
+        self.commits += 1
+        self.publish()
+
+    @contextmanager
+    def batch(self, name: str = "batch"):
+        """
+        Group the changes made within the block into a single commit.
+        save_data() takes a savepoint instead of committing and, if the block
+        raises, everything done within it is rolled back. Nested batches are
+        merged into the outermost one.
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+        savepoint = self.transaction.savepoint(True)
+        self._batch = dict(name=name, changes=0)
+        commits = self.commits
+        started = time.perf_counter()
+        try:
+            yield self._batch
+        except Exception:
+            self._batch = None
+            savepoint.rollback()
+            # the rollback replaces the root's plain dict of trackers
+            self.trackers = self.root['trackers']
+            self.names = NameIndex(self.root['name_index'])
+            self.settings = self.root['settings']
+            self.snapshot_settings()
+            self.publish_all = True
+            self.publish()
+            logger.error(f"{name}: rolled back after {time.perf_counter() - started:.3f}s")
+            raise
+        changes = self._batch['changes']
+        self._batch = None
+        self.commit()
+        logger.info(f"{name}: {changes} changes, {self.commits - commits} commit(s) in {time.perf_counter() - started:.3f}s")
+
+    def update_tracker(self, doc_id, tracker):
+        if doc_id in self.trackers:
+            self.names.remove(doc_id, self.trackers[doc_id].name)
+        self.names.add(doc_id, tracker.name)
+        self.trackers[doc_id] = tracker
+        self.changed.add(doc_id)
+        self.save_data()
+
+    def update_alarms(self, tracker):
+        # keep the alarm engine's crossing times current with tracker's info
+        self.alarms.update(tracker.doc_id, tracker.name, *tracker.bounds(self.snapshot['η']))
+
+    def info_changed(self, tracker):
+        # called by Tracker.compute_info
+        self.update_alarms(tracker)
+        self.changed.add(tracker.doc_id)
+
+    def delete_tracker(self, doc_id):
+        if doc_id in self.trackers:
+            self.names.remove(doc_id, self.trackers[doc_id].name)
+            del self.trackers[doc_id]
+            self.changed.add(doc_id)
+            self.alarms.remove(doc_id)
+            self.save_data()
+
+    def delete_trackers(self, doc_ids: list[int]):
+        with self.batch(f"delete {len(doc_ids)} trackers"):
+            for doc_id in doc_ids:
+                self.delete_tracker(doc_id)
+
+    def close(self):
+        # Let the storage worker finish the queued changes, then close the
+        # database on the worker thread
+        try:
+            self.worker.submit(self._close).result()
+        finally:
+            self.worker.stop()
+            self.backup_worker.stop()
+
+    def _close(self):
+        # Make sure to commit or abort any ongoing transaction
+        try:
+            if self.connection.transaction_manager.isDoomed():
+                logger.error("Transaction aborted.")
+                self.transaction.abort()
+            else:
+                logger.info("Transaction committed.")
+                self.transaction.commit()
+        except Exception as e:
+            logger.error(f"Error during transaction handling: {e}")
+            self.transaction.abort()
+        else:
+            logger.info("Transaction handled successfully.")
+        finally:
+            self.connection.close()
+            self.db.close()
+
+
+def open_store(cls=TrackerStore):
+    """
+    Set up logging, open the datastore and return a cls, e.g. TrackerStore,
+    for it with the info of every tracker computed.
+    """
+    setup_logging(trf_home=trf_home, log_level=log_level, backup_count=7)
+    store = cls(*init_db(db_path, compression))
+    # the info of the trackers is not stored - compute it, and so seed the
+    # alarms, for all of them
+    store.refresh_info()
+    return store
+
+
+# Housekeeping
+#
+# The jobs run by whichever process holds the datastore, on its scheduler.
+
+clock_day = [None]
+
+def run_backup(store: TrackerStore, hourly: bool = False):
+    """Make the backup selected by the 'backup' setting."""
+    if store.settings.get('backup', 'zip') == 'incremental':
+        ok, msg = backup_incremental(trf_home, logger)
+        if not ok:
+            logger.info(msg)
+    elif not hourly:
+        # trf.fs only grows, so its size now, between commits, marks a
+        # consistent copy that the low priority backup worker can write
+        # while commits continue
+        size = os.path.getsize(db_path)
+        codec = store.snapshot.get('backup_codec', DEFAULT_SETTINGS['backup_codec'])
+        future = store.backup_worker.submit(rotate_backups, trf_home, logger, codec, size)
+        future.add_done_callback(partial(backup_done, store))
+
+def backup_done(store: TrackerStore, future):
+    # called on the backup worker when a zip backup is done
+    e = future.exception()
+    if e is not None:
+        logger.error(f"daily backup failed: {e}", exc_info=e)
+        store.call_in_ui(store.report, f"The daily backup failed:\n  {e}")
+
+def new_day(scheduler, store: TrackerStore):
+    """Start each new day's housekeeping. Called with each tick of the clock."""
+    newday = datetime.now().strftime("%y-%m-%d")
+    if newday != clock_day[0]:
+        logger.info(f"new day: {newday}")
+        clock_day[0] = newday
+        scheduler.once("cleanup logs", 0, cleanup_old_logs, blocking=True)
+        # backups read the datastore files so run them between commits
+        scheduler.once("daily backup", 0, run_backup, store, blocking=True, executor=store.worker)
+
+def schedule_jobs(scheduler, store: TrackerStore):
+    """Add the hourly backup and compaction jobs to scheduler."""
+    scheduler.every(
+        "hourly backup", 3600, run_backup, store, True,
+        align=True, blocking=True, executor=store.worker
+        )
+    scheduler.every(
+        "compact history", 3600, store.compact_history,
+        align=True, blocking=True, executor=store.worker
+        )
+
+def announce(scheduler, store: TrackerStore, events: list):
+    """Log the alarm events and run the alarm_command setting for them."""
+    for event in events:
+        logger.info(f"alarm: {event.name} is {event.state} as of {event.when}")
+    command = store.snapshot.get('alarm_command', '')
+    if command:
+        scheduler.once("alarm command", 0, run_alarm_command, command, events, blocking=True)
+
+def run_alarm_command(command: str, events: list):
+    """Run the alarm_command setting for each event, e.g. notify-send trf "{name} is {state}"."""
+    for event in events:
+        try:
+            args = [
+                arg.format(name=event.name, state=event.state, when=event.when.strftime("%Y-%m-%d %H:%M"))
+                for arg in shlex.split(command)
+                ]
+            subprocess.run(args, timeout=30, capture_output=True)
+        except (OSError, ValueError, KeyError, IndexError, subprocess.SubprocessError) as e:
+            logger.error(f"alarm_command '{command}' failed: {e}")
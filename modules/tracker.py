@@ -0,0 +1,1063 @@
+import logging
+import re
+import shutil
+import textwrap
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, List, NamedTuple
+
+from dateutil.parser import parse, parserinfo
+from persistent import Persistent
+
+from . import forecast
+from .estimators import ESTIMATORS, new_estimators
+
+logger = logging.getLogger()
+
+# Trackers
+#
+# The model: Tracker and the text formatting that it shares with the
+# display. Nothing here opens the datastore or imports prompt_toolkit, so
+# trackers can be made and used, e.g., in bench.py, without either.
+
+# The settings used until they have been read from the datastore. See
+# store.default_settings for their descriptions.
+DEFAULT_SETTINGS = {
+    'ampm': True,
+    'yearfirst': True,
+    'dayfirst': False,
+    'η': 2,
+    'estimator': 'window',
+    'backup': 'zip',
+    'backup_codec': 'deflate',
+    'alarm_command': '',
+}
+
+# The TrackerStore of the open datastore, set when it is created. Trackers
+# read the settings from its snapshot and keep its alarms current.
+store = [None]
+
+
+def current_settings() -> dict:
+    return store[0].snapshot if store[0] is not None else DEFAULT_SETTINGS
+
+
+def settings_version() -> int:
+    return store[0].settings_version if store[0] is not None else 0
+
+
+
+# Non-printing character
+NON_PRINTING_CHAR = '\u200B'
+# Placeholder for spaces within special tokens
+PLACEHOLDER = '\u00A0'
+# Placeholder for hyphens to prevent word breaks
+NON_BREAKING_HYPHEN = '\u2011'
+# Placeholder for zero-width non-joiner
+ZWNJ = '\u200C'
+PLUS_OR_MINUS = '±'
+
+# For showing active page in pages, e.g.,  ○ ○ ⏺ ○ = page 3 of 4 pages
+OPEN_CIRCLE = '○'
+CLOSED_CIRCLE = '⏺'
+ETA = 'η'
+APPROX = '≈'
+
+UP = '↑'
+DOWN = '↓'
+RIGHT = '→'
+
+
+class Geometry:
+    """
+    The terminal size, read once at startup and then updated by the
+    application when the terminal is resized. version is bumped with each
+    change so that width dependent caches know when to start over.
+    """
+
+    def __init__(self):
+        self.columns, self.rows = shutil.get_terminal_size()
+        self.version = 0
+        self.listeners = []
+
+    def update(self, columns: int, rows: int):
+        if (columns, rows) == (self.columns, self.rows):
+            return
+        self.columns, self.rows = columns, rows
+        self.version += 1
+        logger.debug(f"terminal resized to {columns}x{rows}")
+        for listener in self.listeners:
+            listener()
+
+geometry = Geometry()
+
+
+def wrap(text: str, indent: int = 3, width: int = None):
+    if width is None:
+        width = geometry.columns - 3
+    return wrap_text(text, indent, width)
+
+# The info, help and settings displays wrap the same text again and again,
+# so keep the most recent results. The cache is cleared when the terminal
+# is resized since the old widths won't be used again.
+@lru_cache(maxsize=256)
+def wrap_text(text: str, indent: int, width: int):
+    # Preprocess to replace spaces within specific "@\S" patterns with PLACEHOLDER
+    text = preprocess_text(text)
+    numbered_list = re.compile(r'^\d+\.\s.*')
+
+    # Split text into paragraphs
+    paragraphs = text.split('\n')
+
+    # Wrap each paragraph
+    wrapped_paragraphs = []
+    for para in paragraphs:
+        leading_whitespace = re.match(r'^\s*', para).group()
+        initial_indent = leading_whitespace
+
+        # Determine subsequent_indent based on the first non-whitespace character
+        stripped_para = para.lstrip()
+        if stripped_para.startswith(('+', '-', '*', '%', '!', '~')):
+            subsequent_indent = initial_indent + ' ' * 2
+        elif stripped_para.startswith(('@', '&')):
+            subsequent_indent = initial_indent + ' ' * 3
+        # elif stripped_para and stripped_para[0].isdigit():
+        elif stripped_para and numbered_list.match(stripped_para):
+            subsequent_indent = initial_indent + ' ' * 3
+        else:
+            subsequent_indent = initial_indent + ' ' * indent
+
+        wrapped = textwrap.fill(
+            para,
+            initial_indent='',
+            subsequent_indent=subsequent_indent,
+            width=width)
+        wrapped_paragraphs.append(wrapped)
+
+    # Join paragraphs with newline followed by non-printing character
+    wrapped_text = ('\n' + NON_PRINTING_CHAR).join(wrapped_paragraphs)
+
+    # Postprocess to replace PLACEHOLDER and NON_BREAKING_HYPHEN back with spaces and hyphens
+    wrapped_text = postprocess_text(wrapped_text)
+
+    return wrapped_text
+
+def preprocess_text(text):
+    # Regex to find "@\S" patterns and replace spaces within the pattern with PLACEHOLDER
+    text = re.sub(r'(@\S+\s\S+)', lambda m: m.group(0).replace(' ', PLACEHOLDER), text)
+    # Replace hyphens within words with NON_BREAKING_HYPHEN
+    text = re.sub(r'(\S)-(\S)', lambda m: m.group(1) + NON_BREAKING_HYPHEN + m.group(2), text)
+        # logger.debug(f"listing {self.active_page = }, {start_index = }, {end_index = }")
+    return text
+
+def postprocess_text(text):
+    text = text.replace(PLACEHOLDER, ' ')
+    text = text.replace(NON_BREAKING_HYPHEN, '-')
+    return text
+
+@lru_cache(maxsize=64)
+def unwrap(wrapped_text):
+    # Split wrapped text into paragraphs
+    paragraphs = wrapped_text.split('\n' + NON_PRINTING_CHAR)
+
+    # Replace newlines followed by spaces in each paragraph with a single space
+    unwrapped_paragraphs = []
+    for para in paragraphs:
+        unwrapped = re.sub(r'\n\s*', ' ', para)
+        unwrapped_paragraphs.append(unwrapped)
+
+    # Join paragraphs with original newlines
+    unwrapped_text = '\n'.join(unwrapped_paragraphs)
+
+    return unwrapped_text
+
+geometry.listeners.append(wrap_text.cache_clear)
+
+def sort_key(tracker):
+    # Sorting by None first (using doc_id as secondary sorting)
+    if tracker.next_expected_completion is None:
+        return (0, tracker.doc_id)
+    # Sorting by datetime for non-None values
+    else:
+        return (1, tracker.next_expected_completion)
+
+class TrackerStats(NamedTuple):
+    # the statistics of a tracker's history that don't depend on the settings
+    intervals: list
+    average: timedelta  # None without intervals
+    spread: timedelta  # None with fewer than two intervals
+
+class TrackerRow(NamedTuple):
+    # what the list needs of a tracker - a plain copy made on the storage
+    # worker, see TrackerStore.publish, so that the display never reads the
+    # datastore
+    doc_id: int
+    name: str
+    next: datetime  # the forecast or None
+    last: datetime  # the latest completion or None
+    modified: datetime
+    average: timedelta  # None without intervals
+    spread: timedelta  # None with fewer than two intervals
+
+def month_bucket(summary, month: str) -> tuple:
+    # (count, sum, sum of squares, min, max, first, last) for month, with
+    # None for first and last in a summary from before they were kept
+    bucket = summary.get(month, (0, 0.0, 0.0, None, None))
+    return bucket if len(bucket) == 7 else (*bucket, None, None)
+
+def add_to_month(summary, dt: datetime, x: float = None, counted: bool = False):
+    # count the completion at dt in its month, unless it's counted, and
+    # the interval of x seconds ending at it unless x is None
+    month = dt.strftime("%Y-%m")
+    count, total, squares, low, high, first, last = month_bucket(summary, month)
+    if x is not None:
+        count, total, squares = count + 1, total + x, squares + x * x
+        low = x if low is None else min(low, x)
+        high = x if high is None else max(high, x)
+    if not counted:
+        first = dt if first is None else min(first, dt)
+        last = dt if last is None else max(last, dt)
+    summary[month] = (count, total, squares, low, high, first, last)
+
+def remove_from_month(summary, dt: datetime, x: float):
+    # take the interval of x seconds ending at dt out of its month - min and
+    # max can only be kept as they were
+    month = dt.strftime("%Y-%m")
+    count, total, squares, low, high, first, last = month_bucket(summary, month)
+    if count <= 1:
+        count, total, squares, low, high = 0, 0.0, 0.0, None, None
+    else:
+        count, total, squares = count - 1, total - x, squares - x * x
+    summary[month] = (count, total, squares, low, high, first, last)
+
+def split_month(summary, dt: datetime):
+    # dt splits an interval of the month whose completions aren't kept -
+    # take it to be one of the average length split in two
+    month = dt.strftime("%Y-%m")
+    count, total, squares, low, high, first, last = month_bucket(summary, month)
+    if count:
+        half = total / count / 2
+        count, squares = count + 1, squares - 2 * half * half
+        low = min(low, half)
+    first = dt if first is None else min(first, dt)
+    last = dt if last is None else max(last, dt)
+    summary[month] = (count, total, squares, low, high, first, last)
+
+# this is a singleton instance initialized in main()
+class Tracker(Persistent):
+    max_history = 12 # depending on width, 6 rows of 2, 4 rows of 3, 3 rows of 4, 2 rows of 6
+    # Completions that no longer fit in history wait in archive until
+    # compact() rolls them into summary, a BTree of (count, sum, sum of
+    # squares, min, max) of the intervals, in seconds, ending in each month
+    # and the first and last completions compacted in the month, keyed by
+    # 'yyyy-mm'. The BTree is a separate record, only loaded for the
+    # monthly view. last_compacted is the latest compacted completion.
+    archive = ()
+    summary = None
+    last_compacted = None
+
+    @classmethod
+    def format_dt(cls, dt: Any, long=False) -> str:
+        if not isinstance(dt, datetime):
+            return ""
+        if long:
+            return dt.strftime("%Y-%m-%d %H:%M")
+        return dt.strftime("%y%m%dT%H%M")
+
+    @classmethod
+    def td2seconds(cls, td: timedelta) -> str:
+        if not isinstance(td, timedelta):
+            return ""
+        return f"{round(td.total_seconds())}"
+
+    @classmethod
+    def format_td(cls, td: timedelta, short=0):
+        if not isinstance(td, timedelta):
+            return None
+        sign = '+' if td.total_seconds() >= 0 else '-'
+        total_seconds = abs(int(td.total_seconds()))
+        if total_seconds == 0:
+            # return '0 minutes '
+            return '0m' if short else '+0m'
+        total_seconds = abs(total_seconds)
+        try:
+            ret = ""
+            until = []
+            days = hours = minutes = 0
+            if total_seconds:
+                minutes = total_seconds // 60
+                if minutes >= 60:
+                    hours = minutes // 60
+                    minutes = minutes % 60
+                if hours >= 24:
+                    days = hours // 24
+                    hours = hours % 24
+            if days:
+                until.append(f'{days}d')
+            if hours:
+                until.append(f'{hours}h')
+            if minutes:
+                until.append(f'{minutes}m')
+            if not until:
+                until.append('0m')
+            if short == 1:
+                ret = ''.join(until[:2]) if short else sign + ''.join(until)
+            elif short == 2:
+                ret = f"{round(days + hours/24 + minutes/(60*24), 1)}"
+            elif short == 3:
+                ret = f"{round(days + hours/24 + minutes/(60*24), 1)}d"
+            logger.debug(f'{td = }, {short = }: {ret = }')
+            return ret
+        except Exception as e:
+            logger.error(f'{td}: {e}')
+            return ''
+
+    @classmethod
+    def format_completion(cls, completion: tuple[datetime, timedelta], long=False)->str:
+        dt, td = completion
+        return f"{cls.format_dt(dt, long=True)}, {cls.format_td(td)}"
+
+    @classmethod
+    def parse_td(cls, td:str)->tuple[bool, timedelta]:
+        """\
+        Take a period string and return a corresponding timedelta.
+        Examples:
+            parse_duration('-2w3d4h5m')= Duration(weeks=-2,days=3,hours=4,minutes=5)
+            parse_duration('1h30m') = Duration(hours=1, minutes=30)
+            parse_duration('-10m') = Duration(minutes=10)
+        where:
+            d: days
+            h: hours
+            m: minutes
+            s: seconds
+
+        >>> 3*60*60+5*60
+        11100
+        >>> parse_duration("2d-3h5m")[1]
+        Duration(days=1, hours=21, minutes=5)
+        >>> datetime(2015, 10, 15, 9, 0, tz='local') + parse_duration("-25m")[1]
+        DateTime(2015, 10, 15, 8, 35, 0, tzinfo=ZoneInfo('America/New_York'))
+        >>> datetime(2015, 10, 15, 9, 0) + parse_duration("1d")[1]
+        DateTime(2015, 10, 16, 9, 0, 0, tzinfo=ZoneInfo('UTC'))
+        >>> datetime(2015, 10, 15, 9, 0) + parse_duration("1w-2d+3h")[1]
+        DateTime(2015, 10, 20, 12, 0, 0, tzinfo=ZoneInfo('UTC'))
+        """
+
+        knms = {
+            'd': 'days',
+            'day': 'days',
+            'days': 'days',
+            'h': 'hours',
+            'hour': 'hours',
+            'hours': 'hours',
+            'm': 'minutes',
+            'minute': 'minutes',
+            'minutes': 'minutes',
+            's': 'seconds',
+            'second': 'second',
+            'seconds': 'seconds',
+        }
+
+        kwds = {
+            'days': 0,
+            'hours': 0,
+            'minutes': 0,
+            'seconds': 0,
+        }
+
+        period_regex = re.compile(r'(([+-]?)(\d+)([dhms]))+?')
+        expanded_period_regex = re.compile(r'(([+-]?)(\d+)\s(day|hour|minute|second)s?)+?')
+        # logger.debug(f"parse_td: {td}")
+        m = period_regex.findall(td)
+        if not m:
+            m = expanded_period_regex.findall(str(td))
+            if not m:
+                return False, f"Invalid period string '{td}'"
+        for g in m:
+            if g[3] not in knms:
+                return False, f'Invalid period argument: {g[3]}'
+
+            num = -int(g[2]) if g[1] == '-' else int(g[2])
+            if num:
+                kwds[knms[g[3]]] = num
+        td = timedelta(**kwds)
+        return True, td
+
+
+    @classmethod
+    def parse_dt(cls, dt: str = "") -> tuple[bool, datetime]:
+        # if isinstance(dt, datetime):
+        #     return True, dt
+        if dt.strip() == "now":
+            dt = datetime.now()
+            return True, dt
+        elif isinstance(dt, str) and dt:
+            pi = parserinfo(
+                dayfirst=False,
+                yearfirst=True)
+            try:
+                dt = parse(dt, parserinfo=pi)
+                return True, dt
+            except Exception as e:
+                msg = f"Error parsing datetime: {dt}\ne {repr(e)}"
+                return False, msg
+        else:
+            return False, "Invalid datetime"
+
+    @classmethod
+    def parse_completion(cls, completion: str) -> tuple[datetime, timedelta]:
+        parts = [x.strip() for x in re.split(r',\s+', completion)]
+        dt = parts.pop(0)
+        if parts:
+            td = parts.pop(0)
+        else:
+            td = timedelta(0)
+
+        # logger.debug(f"parts: {dt}, {td}")
+        msg = []
+        if not dt:
+            return False, ""
+        dtok, dt = cls.parse_dt(dt)
+        if not dtok:
+            msg.append(dt)
+        if td:
+            # logger.debug(f"{td = }")
+            tdok, td = cls.parse_td(td)
+            if not tdok:
+                msg.append(td)
+        else:
+            # no td specified
+            td = timedelta(0)
+            tdok = True
+        if dtok and tdok:
+            return True, (dt, td)
+        return False, "; ".join(msg)
+
+    @classmethod
+    def parse_completions(cls, completions: List[str]) -> List[tuple[datetime, timedelta]]:
+        completions = [x.strip() for x in completions.split('\n') if x.strip()]
+        output = []
+        msg = []
+        for completion in completions:
+            ok, x = cls.parse_completion(completion)
+            if ok:
+                output.append(x)
+            else:
+                msg.append(x)
+        if msg:
+            return False, "; ".join(msg)
+        return True, output
+
+
+    def __init__(self, name: str, doc_id: int) -> None:
+        self.doc_id = int(doc_id)
+        self.name = name
+        self.history = []
+        # the state of each of the streaming estimators, updated with every
+        # interval recorded whether or not it is still in history
+        self.estimators = new_estimators()
+        self.created = datetime.now()
+        self.modified = self.created
+        logger.info(f"Created tracker {self.name} ({self.doc_id})")
+
+
+    def __setstate__(self, state):
+        # info was stored with the tracker before it was kept in the volatile
+        # _v_info - drop any stored copy
+        state.pop('_info', None)
+        super().__setstate__(state)
+
+    @property
+    def info(self):
+        # The info is only kept in memory - it is lost when ZODB deactivates
+        # the tracker. It is built from the statistics of the history, see
+        # stats, and the settings and is rebuilt whenever the version of the
+        # settings snapshot has changed, e.g., after η is changed.
+        info = getattr(self, '_v_info', None)
+        version = settings_version()
+        if info is None or self._v_info_version != version:
+            info = self._v_info = self._make_info(self.stats, current_settings()['η'])
+            self._v_info_version = version
+            self._v_info_text = None
+        return info
+
+    @property
+    def stats(self) -> TrackerStats:
+        # the statistics that don't depend on the settings, kept until the
+        # history changes. After compute_infos they come from the tracker's
+        # row of the batch.
+        stats = getattr(self, '_v_stats', None)
+        if stats is None:
+            batch = getattr(self, '_v_batch', None)
+            if batch is not None:
+                stats = self._v_stats = self._batch_stats(batch, self._v_row)
+            else:
+                stats = self._v_stats = self.compute_stats()
+        return stats
+
+    @property
+    def next_expected_completion(self):
+        average = self.stats.average
+        return self.history[-1][0] + average if average is not None else None
+
+    @classmethod
+    def get_intervals(cls, history: list) -> list[timedelta]:
+        intervals = []
+        for i in range(len(history)-1):
+            #                 x[i+1]             y[i+1]          x[i]
+            intervals.append(history[i+1][0] + history[i+1][1] - history[i][0])
+        return intervals
+
+    def compute_stats(self) -> TrackerStats:
+        logger.debug(f"Computing stats for {self.name} ({self.doc_id})")
+        intervals = Tracker.get_intervals(self.history)
+        average = spread = None
+        estimator = current_settings().get('estimator', 'window')
+        if estimator in ESTIMATORS:
+            # the streaming estimate - there is an interval to forecast from
+            # whenever the history has one
+            estimator = self.get_estimators()[estimator]
+            if intervals and estimator.location is not None:
+                average = timedelta(seconds=estimator.location)
+            if len(intervals) >= 2 and estimator.spread is not None:
+                spread = timedelta(seconds=estimator.spread)
+        if average is None:
+            if len(intervals) == 1:
+                average = intervals[-1]
+            elif intervals:
+                average = sum(intervals, timedelta()) / len(intervals)
+        if spread is None and len(intervals) >= 2:
+            spread = sum((abs(interval - average) for interval in intervals), timedelta()) / len(intervals)
+        return TrackerStats(intervals, average, spread)
+
+    def kept_completions(self) -> list:
+        # the archived and recent completions - those not yet compacted
+        return sorted([*self.archive, *self.history], key=lambda x: (x[0], x[1]))
+
+    def get_estimators(self) -> dict:
+        estimators = getattr(self, 'estimators', None) or {}
+        if estimators.keys() != ESTIMATORS.keys():
+            # trackers created before the streaming estimators, or before one
+            # of them was added, start the missing ones from every completion
+            # still kept - they are stored with the next change
+            started = new_estimators(
+                interval.total_seconds() for interval in Tracker.get_intervals(self.kept_completions()))
+            estimators = {name: estimators.get(name, started[name]) for name in ESTIMATORS}
+        return estimators
+
+    def restart_estimators(self) -> dict:
+        # start the estimators again from every completion still kept - only
+        # for an explicit reset, since the estimators otherwise carry the
+        # intervals of completions long since compacted
+        self.estimators = new_estimators(
+            interval.total_seconds() for interval in Tracker.get_intervals(self.kept_completions()))
+        return self.estimators
+
+    def compute_info(self):
+        # recompute the statistics from the history and then the info
+        self._v_stats = self.compute_stats()
+        self._v_batch = None
+        self._v_info = None
+        result = self.info
+        logger.debug(f"returning {result['plus_or_minus'] = }")
+        if store[0] is not None:
+            store[0].info_changed(self)
+        logger.debug(f"returning {result = }")
+
+        return result
+
+    def bounds(self, eta: int) -> tuple:
+        """(early, timely, tardy) for η = eta or Nones without intervals."""
+        stats = self.stats
+        if stats.average is None:
+            return None, None, None
+        next = self.history[-1][0] + stats.average
+        spread = stats.spread or timedelta(0)
+        return next - (eta*2) * spread, next - eta * spread, next + eta * spread
+
+    def _make_info(self, stats: TrackerStats, eta: int) -> dict:
+        # the info dict for the statistics of the history and η = eta
+        if not self.history:
+            return dict(
+                last_completion=None, 
+                num_completions=0, 
+                num_intervals=0, 
+                average_interval=timedelta(minutes=0), 
+                last_interval=timedelta(minutes=0), 
+                spread=timedelta(minutes=0), 
+                next_expected_completion=None,
+                early=None, 
+                timely=None, 
+                tardy=None, 
+                avg=None, 
+                plus_or_minus=f"{5*' '}~{5*' '}"
+                )
+        result = {}
+        result['last_completion'] = self.history[-1]
+        result['num_completions'] = len(self.history)
+        result['intervals'] = stats.intervals
+        result['num_intervals'] = len(stats.intervals)
+        result['spread'] = timedelta(minutes=0)
+        result['last_interval'] = None
+        result['average_interval'] = None
+        result['next_expected_completion'] = None
+        result['early'] = None
+        result['timely'] = None
+        result['tardy'] = None
+        result['avg'] = None
+        if result['num_intervals'] > 0:
+            # result['last_interval'] = intervals[-1]
+            result['average_interval'] = stats.average
+            result['next_expected_completion'] = result['last_completion'][0] + result['average_interval']
+            change = result['intervals'][-1] - result['average_interval']
+            direction = UP if change > timedelta(0) else DOWN if change < timedelta(0) else RIGHT
+            result['avg'] = f"{Tracker.format_td(result['average_interval'], 2)}{direction}"
+            # logger.debug(f"{result['avg'] = }")
+        if result['num_intervals'] >= 2:
+            result['spread'] = stats.spread
+            result['n_x_spread'] = eta * result['spread']
+            result['n_spread'] = f"{eta} × {Tracker.format_td(result['spread'], 3)} = {Tracker.format_td(result['n_x_spread'], 3)}"
+        result['plus_or_minus'] = Tracker.format_plus_or_minus(
+            result['average_interval'], result['spread'] if result['num_intervals'] >= 2 else None, eta)
+
+        if result['num_intervals'] >= 1:
+            result['early'], result['timely'], result['tardy'] = self.bounds(eta)
+        return result
+
+    @classmethod
+    def format_plus_or_minus(cls, average: timedelta, spread: timedelta, eta: int) -> str:
+        # the average ± η × spread column of the list
+        if average is None:
+            return f"{5*' '}~{5*' '}"
+        if spread is None:
+            return f"{Tracker.format_td(average, 3): ^11}"
+        return f"{Tracker.format_td(average, 2): >5}{PLUS_OR_MINUS}{Tracker.format_td(eta * spread, 3): <5}"
+
+    def row(self) -> TrackerRow:
+        stats = self.stats
+        return TrackerRow(
+            self.doc_id, self.name, self.next_expected_completion,
+            self.history[-1][0] if self.history else None, self.modified,
+            stats.average, stats.spread)
+
+    def _batch_stats(self, batch, i: int) -> TrackerStats:
+        # the statistics in row i of the batch computed by compute_infos
+        n = int(batch.num_intervals[i])
+        intervals = batch.intervals[i, :n].astype('timedelta64[us]').tolist()
+        average = forecast.to_timedelta(int(batch.average[i])) if n else None
+        spread = forecast.to_timedelta(int(batch.spread[i])) if n >= 2 else None
+        return TrackerStats(intervals, average, spread)
+
+    def packed(self, width: int) -> bytes:
+        # the history as forecast.batch_stats needs it, kept until it changes
+        packed = getattr(self, '_v_packed', None)
+        if packed is None or len(packed) != 16 * width:
+            packed = self._v_packed = forecast.pack(self.history, width)
+        return packed
+
+    @classmethod
+    def compute_infos(cls, trackers: list, eta: int):
+        """
+        Compute the statistics of all of trackers together with
+        forecast.batch_stats, with bounds for η = eta. Each tracker's stats
+        and info are built from them when next needed. Returns the
+        BatchStats.
+        """
+        counts = [len(tracker.history) for tracker in trackers]
+        width = max([cls.max_history, 2] + counts)
+        stats = forecast.batch_stats([tracker.packed(width) for tracker in trackers], counts, width, eta)
+        for i, tracker in enumerate(trackers):
+            tracker._v_info = None
+            tracker._v_stats = None
+            # the stats and the tracker's row
+            tracker._v_batch = stats
+            tracker._v_row = i
+        return stats
+
+    # XXX: Just for reference
+    def add_to_history(self, new_event):
+        self.history.append(new_event)
+        self.modified = datetime.now()
+        self.invalidate_info()
+        self._p_changed = True  # Mark object as changed in ZODB
+
+    @classmethod
+    def merge_histories(cls, old: list, saved: list, new: list) -> list:
+        """
+        Merge two concurrent versions, saved and new, of a history that both
+        started from old. Completions added by either writer are kept,
+        completions removed by new are dropped and the result is sorted and
+        truncated exactly as record_completion would have done.
+        """
+        return cls.merge_completions(old, saved, new)[-cls.max_history:]
+
+    @classmethod
+    def merge_completions(cls, old: list, saved: list, new: list) -> list:
+        # merge_histories without the truncation
+        old_set = set(old)
+        new_set = set(new)
+        removed = old_set - new_set
+        merged = {x for x in saved if x not in removed}
+        merged.update(x for x in new if x not in old_set)
+        return sorted(merged, key=lambda x: (x[0], x[1]))
+
+    @classmethod
+    def stream_completions(cls, estimators: dict, completions: list, added) -> dict:
+        """
+        Update estimators with the interval that each of the added
+        completions makes with the one before it in completions, or with
+        the one after it if it is the earliest. Completions is sorted and
+        includes added. Every completion but the first adds one interval, so
+        the estimators keep their long-run state as completions arrive in
+        any order.
+        """
+        added = sorted(added, key=lambda x: (x[0], x[1]))
+        new = set(added)
+        for completion in added:
+            i = completions.index(completion)
+            if i > 0:
+                pair = completions[i-1:i+1]
+            elif len(completions) > 1 and completions[1] not in new:
+                pair = completions[:2]
+            else:
+                continue
+            interval = cls.get_intervals(pair)[0].total_seconds()
+            for estimator in estimators.values():
+                estimator.update(interval)
+        return estimators
+
+    def _p_resolveConflict(self, old_state, saved_state, new_state):
+        """
+        Called by ZODB when two transactions have both modified this tracker.
+        Appends to history from either transaction are merged rather than
+        raising ConflictError. Other attributes are taken from whichever
+        transaction changed them - if both changed the same attribute to
+        different values the conflict is genuine and is raised.
+        """
+        from ZODB.ConflictResolution import PersistentReference
+
+        def same(a, b):
+            # references to persistent objects such as summary can only be
+            # compared by identity - == raises unless they are the same
+            if isinstance(a, PersistentReference) or isinstance(b, PersistentReference):
+                return a is b
+            return a == b
+
+        old_state = old_state or {}
+        resolved = dict(saved_state)
+        missing = object()
+        for key in set(old_state) | set(saved_state) | set(new_state):
+            if key in ('history', 'archive', 'modified', 'estimators', '_info'):
+                continue
+            old = old_state.get(key, missing)
+            saved = saved_state.get(key, missing)
+            new = new_state.get(key, missing)
+            if new is missing or same(new, old) or same(new, saved):
+                continue
+            if saved is missing or same(saved, old):
+                resolved[key] = new
+            else:
+                from ZODB.POSException import ConflictError
+                raise ConflictError(f"conflicting changes to '{key}' of tracker {saved_state.get('doc_id')}")
+
+        merged = Tracker.merge_completions(
+            old_state.get('history', []),
+            saved_state.get('history', []),
+            new_state.get('history', []))
+        resolved['history'] = merged[-Tracker.max_history:]
+        # completions that either writer archived or that no longer fit in
+        # the merged history
+        archive = Tracker.merge_completions(
+            old_state.get('archive', ()),
+            saved_state.get('archive', ()),
+            new_state.get('archive', ()))
+        archive = sorted(set(archive + merged[:-Tracker.max_history]), key=lambda x: (x[0], x[1]))
+        if archive or 'archive' in saved_state or 'archive' in new_state:
+            resolved['archive'] = archive
+        # stream the completions that only new added into the saved
+        # estimators, as if new had been recorded after saved
+        if 'estimators' in saved_state or 'estimators' in new_state:
+            kept = set(archive) | set(merged)
+            completions = sorted(kept, key=lambda x: (x[0], x[1]))
+            estimators = saved_state.get('estimators')
+            if estimators is not None and estimators.keys() == ESTIMATORS.keys():
+                known = {*old_state.get('history', ()), *old_state.get('archive', ()),
+                         *saved_state.get('history', ()), *saved_state.get('archive', ())}
+                added = ({*new_state.get('history', ()), *new_state.get('archive', ())} - known) & kept
+                resolved['estimators'] = Tracker.stream_completions(estimators, completions, added)
+            else:
+                resolved['estimators'] = new_estimators(
+                    interval.total_seconds() for interval in Tracker.get_intervals(completions))
+        modified = [x for x in (saved_state.get('modified'), new_state.get('modified')) if x]
+        if modified:
+            resolved['modified'] = max(modified)
+        # states stored before the info was volatile may include it
+        resolved.pop('_info', None)
+        logger.info(f"Resolved conflicting changes to tracker {resolved.get('doc_id')}")
+        return resolved
+
+    def format_history(self)->str:
+        output = []
+        for completion in self.history:
+            output.append(Tracker.format_completion(completion, long=True))
+        return '\n  '.join(output)
+
+    def invalidate_info(self):
+        # Invalidate the cached dict so it will be recomputed on next access
+        self._v_info = None
+        self._v_packed = None
+        self.compute_info()
+
+
+    def record_completion(self, completion: tuple[datetime, timedelta]):
+        ok, msg = True, ""
+        if not isinstance(completion, tuple) or len(completion) < 2:
+            completion = (completion, timedelta(0))
+        estimators = self.get_estimators()
+        previous = self.history[-1] if self.history else None
+        self.history.append(completion)
+        self.history.sort(key=lambda x: x[0])
+        self.keep_recent()
+        if previous is not None and self.history[-1] is completion and self.history[-2] is previous:
+            # the usual case - just one more interval
+            interval = Tracker.get_intervals([previous, completion])[0].total_seconds()
+            for estimator in estimators.values():
+                estimator.update(interval)
+        else:
+            Tracker.stream_completions(estimators, self.kept_completions(), [completion])
+        self.estimators = estimators
+
+        # Notify ZODB that this object has changed
+        self.invalidate_info()
+        self.modified = datetime.now()
+        self._p_changed = True
+        return True, f"recorded completion for ..."
+
+    def keep_recent(self):
+        # move the completions that don't fit in history to the archive
+        if len(self.history) > Tracker.max_history:
+            self.archive = sorted([*self.archive, *self.history[:-Tracker.max_history]], key=lambda x: x[0])
+            self.history = self.history[-Tracker.max_history:]
+            if store[0] is not None and store[0].uncompacted is not None:
+                store[0].uncompacted.add(self.doc_id)
+
+    def compact(self) -> int:
+        """
+        Roll the archived completions into the monthly summary and return
+        their number.
+        """
+        archive = self.archive
+        if not archive:
+            return 0
+        if self.summary is None:
+            from BTrees.OOBTree import OOBTree
+            self.summary = OOBTree()
+        last = Tracker.add_intervals(self.summary, archive, self.last_compacted)
+        if self.last_compacted is None or last > self.last_compacted:
+            self.last_compacted = last
+        self.archive = []
+        return len(archive)
+
+    @classmethod
+    def add_intervals(cls, summary, completions: list, previous: datetime = None) -> datetime:
+        # add the intervals ending at each of completions, sorted, the first
+        # from the completion at previous, to summary and return the latest
+        # completion time. Completions at or before previous, e.g., recorded
+        # late, are folded into the months already summarised.
+        for dt, td in completions:
+            if previous is not None and dt <= previous:
+                cls.fold_interval(summary, dt, td)
+                continue
+            add_to_month(summary, dt, (dt + td - previous).total_seconds() if previous is not None else None)
+            previous = dt
+        return previous
+
+    @classmethod
+    def fold_interval(cls, summary, dt: datetime, td: timedelta):
+        # The completion at dt falls among those already summarised and
+        # splits the interval between the ones either side of it, found from
+        # the first and last completions of each month.
+        before = after = None
+        months = sorted(summary)
+        if any(month_bucket(summary, month)[5] is None for month in months):
+            # summarised without the first and last completions
+            split_month(summary, dt)
+            return
+        for month in months:
+            first, last = month_bucket(summary, month)[5:]
+            if dt in (first, last):
+                # already counted
+                return
+            if first < dt < last:
+                split_month(summary, dt)
+                return
+            if last < dt:
+                before = last
+            else:
+                after = first
+                break
+        if after is not None and before is not None:
+            # the interval from before now ends at dt instead of after
+            remove_from_month(summary, after, (after - before).total_seconds())
+        if after is not None:
+            add_to_month(summary, after, (after - dt).total_seconds(), counted=True)
+        add_to_month(summary, dt, (dt + td - before).total_seconds() if before is not None else None)
+
+    def monthly_summary(self) -> list[tuple]:
+        """
+        (month, count, sum, sum of squares, min, max) for the intervals ending
+        in each month, from the summary and the completions not yet compacted.
+        """
+        summary = dict(self.summary.items()) if self.summary is not None else {}
+        Tracker.add_intervals(summary, [*self.archive, *self.history], self.last_compacted)
+        return [
+            (month, *month_bucket(summary, month)[:5]) for month in sorted(summary)
+            if summary[month][0]]
+
+    def format_monthly_summary(self) -> str:
+        days = 24 * 60 * 60
+        rows = [f" {'month':<8} {'count':>5} {'mean':>7} {'sd':>7} {'min':>7} {'max':>7}"]
+        for month, count, total, squares, low, high in self.monthly_summary():
+            mean = total / count
+            sd = max(squares / count - mean * mean, 0) ** 0.5
+            rows.append(
+                f" {month:<8} {count:>5} {mean / days:>6.1f}d {sd / days:>6.1f}d "
+                f"{low / days:>6.1f}d {high / days:>6.1f}d")
+        if len(rows) == 1:
+            rows.append(" no intervals yet")
+        return f"""\
+ name:        {self.name}
+ doc_id:      {self.doc_id}
+ intervals ending in each month:
+{chr(10).join(rows)}
+"""
+
+    def rename(self, name: str):
+        original_name = self.name
+        self.name = name
+        self.invalidate_info()
+        self.modified = datetime.now()
+        self._p_changed = True
+        return True, f"renamed {self.doc_id} from {original_name} to {self.name}"
+
+    def record_completions(self, completions: list[tuple[datetime, timedelta]]):
+        logger.debug(f"starting {self.history = }")
+        estimators = self.get_estimators()
+        known = {*self.archive, *self.history}
+        self.history = []
+        for completion in completions:
+            if not isinstance(completion, tuple) or len(completion) < 2:
+                completion = (completion, timedelta(0))
+            self.history.append(completion)
+        self.history.sort(key=lambda x: x[0])
+        added = [x for x in self.history if x not in known]
+        self.keep_recent()
+        logger.debug(f"ending {self.history = }")
+        # stream the completions that are new - the intervals of those
+        # removed or replaced stay in the estimators until an explicit reset
+        Tracker.stream_completions(estimators, self.kept_completions(), added)
+        self.estimators = estimators
+        self.invalidate_info()
+        self.modified = datetime.now()
+        self._p_changed = True
+        return True, f"recorded completions for ..."
+
+    def remove_completions(self):
+        self.history = []
+        self.archive = []
+        self.summary = None
+        self.last_compacted = None
+        self.restart_estimators()
+        self.invalidate_info()
+        self.modified = datetime.now()
+        self._p_changed = True
+        return True, f"removed all completions for ..."
+
+
+    def edit_history(self):
+        if not self.history:
+            # logger.debug("No history to edit.")
+            return
+
+        # Display current history
+        for i, completion in enumerate(self.history):
+            logger.debug(f"{i + 1}. {self.format_completion(completion)}")
+
+        # Choose an entry to edit
+        try:
+            choice = int(input("Enter the number of the history entry to edit (or 0 to cancel): ").strip())
+            if choice == 0:
+                return
+            if choice < 1 or choice > len(self.history):
+                return
+            selected_comp = self.history[choice - 1]
+
+            # Choose what to do with the selected entry
+            action = input("Do you want to (d)elete or (r)eplace this entry? ").strip().lower()
+
+            if action == 'd':
+                self.history.pop(choice - 1)
+            elif action == 'r':
+                new_comp_str = input("Enter the replacement completion: ").strip()
+                ok, new_comp = self.parse_completion(new_comp_str)
+                if ok:
+                    self.history[choice - 1] = new_comp
+                    return True, f"Entry replaced with {self.format_completion(new_comp)}"
+                else:
+                    return False, f"{new_comp}"
+            else:
+                return False, "Invalid action."
+
+            # Sort and truncate history if necessary
+            self.history.sort()
+            if len(self.history) > self.max_history:
+                self.history = self.history[-self.max_history:]
+
+            # Notify ZODB that this object has changed
+            self.modified = datetime.now()
+            self.update_tracker_info()
+            self.invalidate_info()
+            self._p_changed = True
+
+        except ValueError:
+            logger.error("Invalid input. Please enter a number.")
+
+    def get_tracker_info(self):
+        # the wrapped text is kept, in a volatile attribute, until the
+        # tracker is modified, its info is recomputed or the width or the
+        # settings change
+        key = (self.modified, geometry.columns, settings_version())
+        cached = getattr(self, '_v_info_text', None)
+        if cached and cached[0] == key:
+            return cached[1]
+        self._v_info_text = (key, self._format_tracker_info())
+        return self._v_info_text[1]
+
+    def _format_tracker_info(self):
+        info = self.info
+        logger.debug(f"{info = }")
+        logger.debug(f"{info['avg'] = }")
+        # insert a placeholder to prevent date and time from being split across multiple lines when wrapping
+        # format_str = f"%y-%m-%d{PLACEHOLDER}%H:%M"
+        # logger.debug(f"{self.history = }")
+        history = [f"{Tracker.format_dt(x[0])} {Tracker.format_td(x[1])}" for x in self.history] if self.history else []
+        history = ', '.join(history)
+        intervals = [f"{Tracker.format_td(x, 3)}" for x in info['intervals']] if info.get('intervals') else []
+        intervals = ', '.join(intervals) if intervals else ""
+        return wrap(f"""\
+ name:        {self.name}
+ doc_id:      {self.doc_id}
+ created:     {Tracker.format_dt(self.created)}
+ modified:    {Tracker.format_dt(self.modified)}
+ completions: ({info['num_completions']})
+    {history}
+ intervals:   ({info['num_intervals']})
+    {intervals}
+    average:  {info['avg']}
+    spread:   {Tracker.format_td(info['spread'], 3)}
+    η spread: {info.get('n_spread', '?')}
+ next:    {Tracker.format_dt(info['next_expected_completion'])}
+    early:    next - 2 × η spread = {Tracker.format_dt(info.get('early', '?'))}
+    timely:   next - η spread     = {Tracker.format_dt(info.get('timely', '?'))}
+    tardy:    next + η spread     = {Tracker.format_dt(info.get('tardy', '?'))}
+""", 0)
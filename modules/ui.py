@@ -0,0 +1,1879 @@
+# trf/ui.py
+import importlib.resources
+import logging
+import os
+import re
+import string
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from functools import lru_cache, partial
+from io import StringIO
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import get_app
+from prompt_toolkit.filters import Condition
+from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.key_binding.bindings.focus import (focus_next,
+                                                       focus_previous)
+from prompt_toolkit.keys import Keys
+from prompt_toolkit.layout import Float, FloatContainer, Layout, Window
+from prompt_toolkit.layout.containers import (ConditionalContainer,
+                                              DynamicContainer, HSplit, VSplit,
+                                              Window, WindowAlign)
+from prompt_toolkit.layout.controls import FormattedTextControl
+from prompt_toolkit.layout.dimension import D
+from prompt_toolkit.lexers import Lexer
+from prompt_toolkit.search import SearchDirection, start_search
+from prompt_toolkit.styles import Style
+from prompt_toolkit.styles.named_colors import NAMED_COLORS
+from prompt_toolkit.widgets import (Frame, HorizontalLine, Label,
+                                    MenuContainer, MenuItem, SearchToolbar,
+                                    TextArea)
+
+from . import db_path, trf_home
+from .__version__ import version
+from . import forecast
+from .client import socket_path
+from .daemon import handle_command
+from .scheduler import Scheduler
+from .server import CommandServer
+from .store import TrackerStore, announce, new_day, open_store, schedule_jobs
+from .tracker import (DOWN, PLUS_OR_MINUS, UP, ZWNJ, Tracker, TrackerRow,
+                      geometry, wrap)
+
+# The full screen display, built when this module is imported - see trf.py
+
+logger = logging.getLogger()
+
+freq = 12
+# seconds - the shortest time between redraws
+FRAME_INTERVAL = 1 / 30
+# render counters shown by show_jobs
+render_stats = dict(
+    started=0.0, frames=0, frame_time=0.0, last_frame=0.0, max_frame=0.0,
+    documents=0, lexed_lines=0, cached_lines=0,
+    )
+mode = 'main'
+
+
+@lru_cache(maxsize=1)
+def get_yaml():
+    # ruamel.yaml is only needed for the settings dialog
+    from ruamel.yaml import YAML
+    return YAML()
+
+def clear_screen():
+    # For Windows
+    if os.name == 'nt':
+        os.system('cls')
+    # For macOS and Linux (posix systems)
+    else:
+        os.system('clear')
+
+def page_banner(active_page_num: int, number_of_pages: int, sort_by: str):
+    return f"{active_page_num}/{number_of_pages}: {sort_by}"
+
+class ListRow(NamedTuple):
+    # the formatted fields of a tracker's row in the list, see TrackerLexer
+    doc_id: int
+    tag: str
+    name: str
+    next: str
+    spread: str
+    last: str
+
+
+class TrackerManager(TrackerStore):
+    """
+    TrackerStore with the list of trackers as displayed. The list is built
+    from the published rows, see TrackerStore.row, and never reads the
+    trackers themselves.
+    """
+
+    def __init__(self, storage, db, connection, root, transaction) -> None:
+        # the doc_ids of the trackers in sort order, rebuilt when the list
+        # is resorted, and of those displayed, by row - 1, reset with each
+        # listing. The tag of a row is tag_keys[row - 1].
+        self.sorted_ids = []
+        self.positions = {}  # doc_id -> index in sorted_ids
+        self.view_ids = []
+        # with virtual set, the list shows the trackers from sorted_ids[top]
+        # that fit the terminal instead of pages of 26
+        self.virtual = False
+        self.top = 0
+        self.list_rows = {}  # line number -> ListRow for the displayed list
+        self.list_text = ""
+        self.list_version = 0
+        self.active_page = 0
+        self.num_pages = 0
+        self.selected_id = None
+        self.selected_tracker = None
+        self.selected_row = (None, None)
+        self.sort_by = "next"
+        super().__init__(storage, db, connection, root, transaction)
+
+    def call_in_ui(self, fn: Callable, *args):
+        call_in_ui(fn, *args)
+
+    def show_pending(self):
+        show_pending()
+
+    def report(self, msg: str):
+        display_message(msg, 'info')
+
+
+    def get_tracker_from_tag(self, tag: str):
+        row = tag_keys.index(tag) + 1 if tag in tag_keys else 0
+        if not 0 < row <= len(self.view_ids):
+            return None
+        self.selected_id = self.view_ids[row - 1]
+        self.selected_tracker = self.row(self.selected_id)
+        self.selected_row = (self.active_page, row)
+        return self.selected_tracker
+
+    def sort_key(self, tracker: TrackerRow):
+        forecast_dt = tracker.next
+        last_dt = tracker.last
+        if self.sort_by == "next":
+            if forecast_dt:
+                return (0, forecast_dt)
+            if last_dt:
+                return (1, last_dt)
+            return (2, tracker.doc_id)
+        if self.sort_by == "last":
+            if last_dt:
+                return (0, last_dt)
+            if forecast_dt:
+                return (1, forecast_dt)
+            return (2, tracker.doc_id)
+        if self.sort_by == "subject":
+            return (0, tracker.name)
+        if self.sort_by == "id":
+            return (1, tracker.doc_id)
+        if self.sort_by == "modified":
+            return (1, tracker.modified)
+        else: # next
+            if forecast_dt:
+                return (0, forecast_dt)
+            if last_dt:
+                return (1, last_dt)
+            return (2, tracker.doc_id)
+
+    def get_sorted_trackers(self):
+        # the rows as displayed - the storage worker replaces rather than
+        # changes the published rows so they can be read at any time
+        trackers = self.shown_rows()
+        # Sort the trackers
+        reverse = True if self.sort_by == "modified" else False
+        return sorted(trackers, key=self.sort_key, reverse=reverse)
+
+    def page_size(self) -> int:
+        if self.virtual:
+            # leave room for the banner and the status line
+            return max(1, geometry.rows - 3)
+        return 26
+
+    def list_trackers(self, resort: bool = True):
+        """
+        Return the text of the displayed part of the list, resorting the
+        trackers first unless resort is False, e.g. when changing pages.
+        Only the displayed rows are formatted.
+        """
+        name_width = geometry.columns - 45
+        if resort or not self.sorted_ids:
+            self.sorted_ids = [tracker.doc_id for tracker in self.get_sorted_trackers()]
+            self.positions = {doc_id: i for i, doc_id in enumerate(self.sorted_ids)}
+        size = self.page_size()
+        total = len(self.sorted_ids)
+        self.num_pages = max(1, (total + size - 1) // size)
+
+        sort = self.sort_by + DOWN if self.sort_by == 'modified' else self.sort_by + UP
+        n = self.snapshot.get('η', None)
+        if n:
+            interval = f" η={n} {int(round(100*(1 - 1/(n*n)), 0))}%"
+            # interval = f"{int(round(100*(1 - 1/(n*n)), 0))}% span"
+        else: #        " n=3 89%"
+            interval = "interval"
+
+        if self.virtual:
+            self.top = max(0, min(self.top, total - size))
+            start_index = self.top
+            set_pages(f"{start_index + 1}-{min(start_index + size, total)}/{total}: {sort}")
+        else:
+            self.active_page = min(self.active_page, self.num_pages - 1)
+            start_index = self.active_page * size
+            set_pages(page_banner(self.active_page + 1, self.num_pages, sort))
+        # banner = f"{ZWNJ} tag     next      {interval}     last        subject\n"
+        sub = "subject"
+        banner = f"{ZWNJ} tag     {sub:<{name_width}}  next      {interval}     last \n"
+        rows = []
+        list_rows = {}
+        view_ids = []
+
+        count = 0 
+
+        end_index = start_index + size
+        logger.debug(f"listing {self.active_page = }, {start_index = }, {end_index = }")
+        eta = self.snapshot['η']
+        for doc_id in self.sorted_ids[start_index:end_index]:
+            tracker = self.row(doc_id)
+            if tracker is None:
+                continue
+            parts = [x.strip() for x in tracker.name.split('@')]
+            tracker_name = parts[0]
+            if len(tracker_name) > name_width:
+                tracker_name = tracker_name[:name_width - 1] + "…"
+            forecast_dt = tracker.next
+            plus_or_minus = Tracker.format_plus_or_minus(tracker.average, tracker.spread, eta)
+            if tracker.last:
+                last = tracker.last.strftime("%y-%m-%d")
+            else:
+                last = "~"
+            next = forecast_dt.strftime("%y-%m-%d") if forecast_dt else center_text("~", 8)
+            # tags are reused on every page - a virtual list with more than
+            # 26 rows leaves the rest untagged
+            tag = tag_keys[count] if count < len(tag_keys) else ' '
+            if PLUS_OR_MINUS in plus_or_minus:
+                avg_part, spread_part = [x.strip() for x in plus_or_minus.split(PLUS_OR_MINUS)]
+                spread = f"{avg_part: >5}{PLUS_OR_MINUS}{spread_part: <5}"
+            else:
+                spread = f"{plus_or_minus.strip(): ^11}"
+            list_rows[count+1] = ListRow(tracker.doc_id, tag, tracker_name, next.strip(), spread, last)
+            view_ids.append(tracker.doc_id)
+            count += 1
+            # rows.append(f" {tag}{" "*4}{next}{" "*2}{last}{" "*2}{interval}{" " * 3}{tracker_name}")
+            #             1  1    4         13      2       8       2      8       3
+            this_row = f" {tag}{' '*2}{next}{' '*2}{plus_or_minus}{' '*2}{last}{' '*2}{tracker_name:<{name_width}}"
+            rows.append(this_row)
+        self.view_ids = view_ids
+        if self.selected_id in view_ids:
+            self.selected_row = (self.active_page, view_ids.index(self.selected_id) + 1)
+        self.list_text = banner +"\n".join(rows)
+        self.list_rows = list_rows
+        self.list_version += 1
+        return self.list_text
+
+    def set_active_page(self, page_num):
+        logger.debug(f"set_active_page {page_num = }")
+        if 0 <= page_num < self.num_pages:
+            if self.virtual:
+                self.top = page_num * self.page_size()
+            else:
+                self.active_page = page_num
+            logger.debug(f"setting active page to {page_num = }, {self.active_page = }")
+            display_area.buffer.cursor_position = (
+                display_area.buffer.document.translate_row_col_to_index(0, 0)
+            )
+
+    def scroll(self, rows: int) -> bool:
+        """Move the top of a virtual list by rows. Returns True if it moved."""
+        top = max(0, min(self.top + rows, len(self.sorted_ids) - self.page_size()))
+        if top == self.top:
+            return False
+        self.top = top
+        return True
+
+    def next_page(self):
+        # new_page = min(self.get_active_page() + 1, self.num_pages - 1)
+        if self.virtual:
+            self.scroll(self.page_size())
+        else:
+            self.set_active_page(self.get_active_page() + 1)
+        self.selected_id = None
+        self.selected_row = (self.active_page, 0)
+        logger.debug(f"next page: {self.active_page = }")
+
+    def previous_page(self):
+        if self.virtual:
+            self.scroll(-self.page_size())
+        else:
+            self.set_active_page(self.get_active_page() - 1)
+        self.selected_row = (self.active_page, 0)
+        self.selected_id = None
+
+        logger.debug(f"previous page: {self.active_page = }")
+
+    def get_active_page(self):
+        return self.active_page
+
+    def set_page(self, page_num):
+        self.set_active_page(page_num)
+        self.selected_id = None
+        self.selected_row = (self.active_page, 0)
+        logger.debug(f"set page: {self.active_page = }")
+
+    def first_page(self):
+        self.set_active_page(0)
+        self.selected_id = None
+        self.selected_row = (self.active_page, 0)
+        logger.debug(f"first page: {self.selected_row = }")
+
+    def get_tracker_from_row(self):
+        row = display_area.document.cursor_position_row
+        if not 0 < row <= len(self.view_ids):
+            return None
+        self.selected_row = (self.active_page, row)
+        self.selected_id = self.view_ids[row - 1]
+        self.selected_tracker = self.row(self.selected_id)
+        if self.selected_tracker is None:
+            return None
+        logger.debug(f"returning {self.selected_tracker.doc_id = }; {self.selected_tracker.name = }")
+        return self.selected_tracker
+
+    def get_tracker_from_id(self, doc_id):
+        self.selected_id = doc_id
+        tracker = self.row(doc_id)
+        logger.debug(f"get_tracker_from_id: {doc_id = }; {tracker = }")
+        return tracker
+
+    def find_positions(self, doc_ids) -> list[int]:
+        """
+        The positions in sorted_ids of doc_ids, e.g., from find_trackers,
+        in list order.
+        """
+        return sorted(self.positions[doc_id] for doc_id in doc_ids or () if doc_id in self.positions)
+
+    def go_to(self, position: int):
+        """Display and select the tracker at position in sorted_ids."""
+        size = self.page_size()
+        if self.virtual:
+            if not self.top <= position < self.top + size:
+                self.top = position
+        else:
+            self.active_page = position // size
+        self.selected_id = self.sorted_ids[position]
+
+    def get_row_from_id(self, doc_id):
+        if doc_id in self.view_ids:
+            return self.active_page, self.view_ids.index(doc_id) + 1
+        return None, None
+
+
+tracker_manager = open_store(TrackerManager)
+storage, db, connection, root, transaction = (
+    tracker_manager.storage, tracker_manager.db, tracker_manager.connection,
+    tracker_manager.root, tracker_manager.transaction)
+
+
+tag_keys = list(string.ascii_lowercase)
+
+# Application Setup
+tracker_style = {
+    'next-hot': 'fg:darkorange',
+    'next-warm': 'fg:gold',
+    'next-cool': 'fg:lightskyblue',
+    'next-cold': 'fg:lightcyan',
+    'last-less': '',
+    'last-more': '',
+    'no-dates': '',
+    'default': '',
+    'banner': 'fg:limegreen',
+    'tag': 'fg:gray',
+}
+
+highlight_style = {}
+for k, v in tracker_style.items():
+    # highlight_style[k] = tracker_style[k] + ' bg:#ffffcc' # Almost white
+    # highlight_style[k] = tracker_style[k] + ' bg:#545655' # Shades of gray
+    # highlight_style[k] = tracker_style[k] + ' bg:#606361'
+    # highlight_style[k] = tracker_style[k] + ' bg:#959896'
+    highlight_style[k] = tracker_style[k] + ' bg:gray'
+
+def is_current_row(line_number: int):
+    cursor_row = display_area.document.cursor_position_row
+    # logger.debug(f"{line_number = }, {cursor_row = }")
+    return int(line_number) == int(cursor_row)
+
+banner_regex = re.compile(r'^\u200C')
+
+class DefaultLexer(Lexer):
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(DefaultLexer, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            now = datetime.now()
+        now = datetime.now()
+
+    def lex_document(self, document):
+        # Implement the logic for tokenizing the document here.
+        # You should yield tuples of (start_pos, Token) pairs for each token in the document.
+
+        # Example: Basic tokenization that highlights keywords in a simple way.
+        text = document.text
+        for i, line in enumerate(text.splitlines()):
+            if "keyword" in line:
+                yield i, ('class:keyword', line)
+            else:
+                yield i, ('', line)
+
+
+class InfoLexer(Lexer):
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(InfoLexer, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            now = datetime.now()
+        now = datetime.now()
+
+    def lex_document(self, document):
+        # Implement the logic for tokenizing the document here.
+        # You should yield tuples of (start_pos, Token) pairs for each token in the document.
+
+        # Example: Basic tokenization that highlights keywords in a simple way.
+        # logger.debug("lex_document called")
+        active_page = tracker_manager.active_page
+        lines = document.lines
+        now = datetime.now().strftime("%y-%m-%d")
+        def get_line_tokens(line_number):
+            line = lines[line_number]
+            tokens = []
+            if line:
+                tokens.append((tracker_style.get('default', ''), line))
+            return tokens
+        return get_line_tokens
+
+
+class HelpLexer(Lexer):
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(HelpLexer, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            now = datetime.now()
+        now = datetime.now()
+
+    def lex_document(self, document):
+        # Implement the logic for tokenizing the document here.
+        # You should yield tuples of (start_pos, Token) pairs for each token in the document.
+
+        # Example: Basic tokenization that highlights keywords in a simple way.
+        # logger.debug("lex_document called")
+        active_page = tracker_manager.active_page
+        lines = document.lines
+        now = datetime.now().strftime("%y-%m-%d")
+        def get_line_tokens(line_number):
+            line = lines[line_number]
+            tokens = []
+            if line:
+                tokens.append((tracker_style.get('default', ''), line))
+            return tokens
+        return get_line_tokens
+
+
+
+def get_lexer(document_type):
+    # logger.debug(f"get_lexer: {document_type}")
+    if document_type == 'list':
+        return TrackerLexer()
+    elif document_type == 'info':
+        return InfoLexer()
+    else:
+        return DefaultLexer()
+
+class TrackerLexer(Lexer):
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super(TrackerLexer, cls).__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            self.version = None
+            self.tokens = {}
+
+    def lex_document(self, document):
+        # logger.debug("lex_document called")
+        width = geometry.columns
+        render_stats['documents'] += 1
+        # list_trackers keeps the fields of each row so nothing needs to be
+        # parsed from the text. Tokens are cached by (row, highlighted,
+        # width) until the list or the state of a displayed tracker changes,
+        # so moving the cursor only tokenizes the two rows involved and
+        # other redraws, e.g. for the clock, none.
+        rows = tracker_manager.list_rows if document.text == tracker_manager.list_text else {}
+        version = (tracker_manager.list_version, alarm_render[0])
+        if version != self.version:
+            self.version = version
+            self.tokens = {}
+        lines = document.lines
+
+        def get_line_tokens(line_number):
+            key = (line_number, line_number > 0 and is_current_row(line_number), width)
+            tokens = self.tokens.get(key)
+            if tokens is None:
+                render_stats['lexed_lines'] += 1
+                tokens = self.tokens[key] = self.tokenize(rows.get(line_number), lines[line_number], *key[1:])
+            else:
+                render_stats['cached_lines'] += 1
+            return tokens
+
+        return get_line_tokens
+
+    @staticmethod
+    def tokenize(row: ListRow, line: str, current: bool, width: int) -> list:
+        # Apply style to the whole line with a background for the current line
+        list_style = highlight_style if current else tracker_style
+        if row is None:
+            if banner_regex.match(line):
+                # use tracker style to avoid the highlight
+                return [(tracker_style.get('banner', ''), line)]
+            if current:
+                line = f"{line:<{width+1}}"
+            return [(list_style.get('default', ''), line)]
+
+        # the state kept by the alarm engine sets the style of the row
+        state = tracker_manager.alarms.states.get(row.doc_id)
+        this_style = list_style.get(f'next-{state}' if state else 'default', '')
+        return [
+            (list_style.get('tag', ''), f"  {row.tag}  "),
+            (this_style, f"  {row.name:<{width-45}}"),
+            (this_style, f"  {row.next: ^8}"),
+            (this_style, f"  {row.spread}"),
+            (this_style, f"  {row.last: ^8}"),
+            ]
+
+    def invalidation_hash(self):
+        # changes when an alarm changes the state of a displayed tracker or
+        # the terminal is resized, so that the list is lexed again even
+        # though its text is unchanged
+        return (id(self), alarm_render[0], geometry.version)
+
+    @staticmethod
+    def _parse_date(date_str):
+        return datetime.strptime(date_str, "%y-%m-%d")
+
+
+def format_statustime(obj, freq: int = 0):
+    width = geometry.columns
+    ampm = True
+    dayfirst = False
+    yearfirst = True
+    seconds = int(obj.strftime('%S'))
+    dots = ' ' + (seconds // freq) * '.' if freq > 0 else ''
+    month = obj.strftime('%b')
+    day = obj.strftime('%-d')
+    hourminutes = (
+        obj.strftime(' %-I:%M%p').rstrip('M').lower()
+        if ampm
+        else obj.strftime(' %H:%M')
+    ) + dots
+    if width < 25:
+        weekday = ''
+        monthday = ''
+    elif width < 30:
+        weekday = f' {obj.strftime("%a")}'
+        monthday = ''
+    else:
+        weekday = f'{obj.strftime("%a")}'
+        monthday = f' {day} {month}' if dayfirst else f' {month} {day}'
+    return f' {weekday}{monthday}{hourminutes}'
+
+# Define the style
+style = Style.from_dict({
+    'menu-bar': f'bg:#396060 {NAMED_COLORS["White"]}',
+    'display-area': f'bg:#1d3030 {NAMED_COLORS["White"]}',
+    'input-area': f'bg:#1d3030 {NAMED_COLORS["Gold"]}',
+    'message-window': f'bg:#1d3030 {NAMED_COLORS["LimeGreen"]}',
+    'status-window': f'bg:#396060 {NAMED_COLORS["White"]}',
+})
+
+scheduler = Scheduler()
+alarm_note = ['']
+alarm_render = [0]
+
+def status_text():
+    return f"{format_statustime(datetime.now(), freq)}{alarm_note[0]}"
+
+def tick():
+    """Update the clock in the status bar and start each new day's housekeeping."""
+    update_status(status_text())
+    new_day(scheduler, tracker_manager)
+
+def on_alarm(events):
+    """Announce the trackers that have become cool, warm or hot."""
+    announce(scheduler, tracker_manager, events)
+    more = f" +{len(events) - 1}" if len(events) > 1 else ""
+    alarm_note[0] = f"  {events[-1].name.split('@')[0].strip()[:24]} is {events[-1].state}{more}"
+    update_status(status_text())
+    scheduler.once("clear alarm", 600, clear_alarm_note)
+    # only lex the list again if one of the trackers is displayed
+    displayed = set(tracker_manager.view_ids)
+    if mode == 'main' and displayed.intersection(event.doc_id for event in events):
+        alarm_render[0] += 1
+        app.invalidate()
+
+def clear_alarm_note():
+    alarm_note[0] = ''
+    update_status(status_text())
+
+tracker_manager.alarms.listeners.append(on_alarm)
+
+def start_periodic_checks():
+    """Start the clock, alarm, backup and compaction jobs in the application's event loop."""
+    scheduler.every("clock", freq, tick, align=True)
+    schedule_jobs(scheduler, tracker_manager)
+    scheduler.start()
+    tracker_manager.alarms.start()
+
+def center_text(text, width: int = None):
+    if width is None:
+        width = geometry.columns - 2
+    if len(text) >= width:
+        return text
+    total_padding = width - len(text)
+    left_padding = total_padding // 2
+    right_padding = total_padding - left_padding
+    return ' ' * left_padding + text + ' ' * right_padding
+
+
+dialog_visible = [False]
+message_visible = [False]
+
+selected_id = None
+
+# Tracker mapping example
+# UI Components
+menu_text = "menu  a)dd d)elete e)dit i)nfo l)ist r)ecord s)how ^q)uit"
+menu_container = Window(content=FormattedTextControl(text=menu_text), height=1, style="class:menu-bar")
+
+search_field = SearchToolbar(
+    text_if_not_searching=[
+    ('class:not-searching', "Press '/' to start searching.")
+    ],
+    ignore_case=True,
+    )
+
+def update_status(new_message):
+    status_control.text = new_message
+    app.invalidate()  # Request a UI refresh - coalesced by min_redraw_interval
+
+def call_in_ui(fn: Callable, *args):
+    """Call fn(*args) on the event loop thread when the app is running."""
+    if app.is_running and app.loop is not None:
+        app.loop.call_soon_threadsafe(fn, *args)
+    else:
+        fn(*args)
+
+def show_pending():
+    # flag changes that have been queued but not yet committed
+    saving = "saving… " if tracker_manager.pending else ""
+    right_control.text = f"{saving}{mode} "
+    app.invalidate()
+
+def refresh_list(*args):
+    # redisplay the list with committed changes unless something else is showing
+    if mode == 'main':
+        list_trackers()
+
+def show_tracker_info(doc_id: int):
+    # read the info of doc_id on the storage worker and show it unless
+    # something other than the list is showing by then
+    def show(text):
+        if mode not in ('main', 'inspect'):
+            return
+        if text is None:
+            list_trackers()
+            return
+        set_mode('inspect')
+        display_message(text, 'info')
+        app.layout.focus(display_area)
+    tracker_manager.read(tracker_manager.tracker_info, doc_id, then=show)
+
+def expect(doc_id: int, **changes) -> dict:
+    """
+    The row of doc_id with changes, and the forecast moved to follow a new
+    last completion, to show until the change is committed - see submit.
+    """
+    row = tracker_manager.row(doc_id)
+    if row is None:
+        return None
+    if changes.get('last') and 'next' not in changes:
+        changes['next'] = changes['last'] + row.average if row.average is not None else None
+    return {doc_id: row._replace(modified=datetime.now(), **changes)}
+
+tracker_lexer = TrackerLexer()
+info_lexer = InfoLexer()
+help_lexer = HelpLexer()
+default_lexer = DefaultLexer()
+
+display_area = TextArea(
+    text="",
+    read_only=True,
+    search_field=search_field,
+    lexer=tracker_lexer,
+    focus_on_click=True,
+    scrollbar=True
+    )
+
+def set_lexer(document_type: str):
+    if document_type == 'list':
+        display_area.lexer = tracker_lexer
+    elif document_type == 'info':
+        display_area.lexer = info_lexer
+    elif document_type == 'help':
+        display_area.lexer = help_lexer
+    else:
+        display_area.lexer = default_lexer
+
+input_area = TextArea(
+    focusable=True,
+    multiline=True,
+    prompt='> ',
+    scrollbar=True,
+    height=D(preferred=5, max=10),  # Set preferred and max height
+    style="class:input-area"
+)
+
+dynamic_input_area = DynamicContainer(lambda: input_area)
+
+input_container = ConditionalContainer(
+    content=dynamic_input_area,
+    filter=Condition(lambda: dialog_visible[0])
+)
+
+# Define the message control and message window
+message_control = FormattedTextControl(text="")
+
+def calculate_height():
+    message = message_control.text  # Get the current message
+    lines = message.count('\n')   # Count lines (including wrapped lines)
+    return D(preferred=lines, max=lines+1)
+
+message_window = DynamicContainer(
+    lambda: Window(
+        content=message_control,
+        height=calculate_height(),  # Use dynamic height based on content
+        style="class:message-window"
+    )
+)
+
+message_container = ConditionalContainer(
+    content=message_window,
+    filter=Condition(lambda: message_visible[0])
+)
+
+dialog_area = HSplit(
+        [
+            message_window,
+            HorizontalLine(),
+            input_container,
+        ]
+    )
+
+dialog_container = ConditionalContainer(
+    content=dialog_area,
+    filter=Condition(lambda: dialog_visible[0])
+)
+
+status_control = FormattedTextControl(text=f"{format_statustime(datetime.now(), freq)}")
+status_window = Window(content=status_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.LEFT)
+
+page_control = FormattedTextControl(text="")
+page_window = Window(content=page_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.CENTER)
+
+right_control = FormattedTextControl(text="menu ")
+right_window = Window(content=right_control, height=1, style="class:status-window", width=D(preferred=20), align=WindowAlign.RIGHT)
+
+
+def set_pages(txt: str):
+    page_control.text = f"{txt} "
+
+
+status_area = VSplit(
+    [
+        status_window,
+        page_window,
+        right_window
+    ],
+    height=1,
+)
+
+def get_row_col():
+    row_number = display_area.document.cursor_position_row
+    col_number = display_area.document.cursor_position_col
+    return row_number, col_number
+
+def get_page_row():
+    row = display_area.document.cursor_position_row
+    page = tracker_manager.get_active_page()
+    return page, row
+
+
+def get_tracker_from_row()->int:
+    page, row = get_page_row()
+    view_ids = tracker_manager.view_ids
+    id = view_ids[row - 1] if 0 < row <= len(view_ids) else None
+    logger.debug(f"{page = }, {row = } => {id = }")
+    if id is not None:
+        tracker = tracker_manager.get_tracker_from_id(id)
+    else:
+        tracker = None
+    return tracker
+
+def get_tracker_from_tag(tag: str):
+    return tracker_manager.get_tracker_from_tag(tag)
+
+def read_readme():
+    try:
+        content = None
+        with importlib.resources.open_text('trf', 'README.txt') as readme_file:
+            content = readme_file.read()
+        return content
+    except FileNotFoundError:
+        return "README.txt file not found."
+
+body = HSplit([
+    # menu_container,
+    display_area,
+    status_area,
+    message_container, # Conditional Message Area
+    dialog_container,  # Conditional Input Area
+    ConditionalContainer(content=search_field, filter=Condition(lambda: is_active_mode('search'))),
+])
+
+# Boolean to track the visibility of the float
+float_visible = [False]  # Use a list so we can modify it within a closure
+
+def display_float(event):
+    # Toggle the visibility flag
+    float_visible[0] = not float_visible[0]
+
+    # Force the app to refresh the layout to apply the visibility change
+    event.app.invalidate()
+
+
+kb = KeyBindings()
+
+@kb.add('c-q')
+def exit_app(*event):
+    """Exit the application."""
+    app.exit()
+
+def set_float(content: str, title: str):
+    # Create a FormattedTextControl to dynamically display the content
+    screen_width = geometry.columns
+    content = content.strip()
+    float_lines = [f" {x.rstrip()} " for x in content.split('\n')]
+    float_width = max(len(x) for x in float_lines) + 4
+    float_height = len(float_lines) + 3
+    top = 0 # (screen_height - float_height) // 4
+    left = (screen_width - float_width) # // 2
+
+    # Create the floating content and wrap it with a Frame to add a border
+    floating_content = Frame(
+        body=Window(
+            content=FormattedTextControl(
+                text="\n".join(float_lines),
+                ),
+            height=len(float_lines),
+            ),
+        title=title,
+        )
+    # Create a ConditionalContainer to control the visibility of the Float
+    conditional_floating_content = ConditionalContainer(
+        content=floating_content,
+        filter=Condition(lambda: float_visible[0])  # Control visibility based on float_visible
+    )
+    return Float(content=conditional_floating_content, top=top, left=left)
+
+
+float = None
+def toggle_shortcuts(event=None):
+    logger.debug(f"toggle_shortcuts: {float_visible = }")
+    # Toggle the visibility flag
+    float_visible[0] = not float_visible[0]
+
+    # Force the app to refresh the layout to apply the visibility change
+    app.invalidate()
+
+
+def clear_search(*event):
+    logger.debug("clear search")
+    search_state = get_app().current_search_state
+    text = search_state.text
+    search_state.text = ''
+    cancel(event)
+
+def clear_info(*event):
+    set_mode('main')
+    logger.debug("clear info")
+    list_trackers()
+
+def menu(event=None):
+    """Focus menu."""
+    if event:
+        if app.layout.has_focus(root_container.window):
+            focus_previous(event)
+        else:
+            app.layout.focus(root_container.window)
+
+
+def sort(event=None):
+    if mode == 'main':
+        message_control.text = wrap(f" Sort by n)ext, l)ast, m)odified, s)ubject or i)d", 0)
+        set_mode('sort')
+    elif mode == 'sort':
+        key = event.key_sequence[0].key
+        if key == 'n':
+            tracker_manager.sort_by = 'next'
+        elif key == 'l':
+            tracker_manager.sort_by = 'last'
+        elif key == 's':
+            tracker_manager.sort_by = 'subject'
+        elif key == 'm':
+            tracker_manager.sort_by = 'modified'
+        elif key == 'i':
+            tracker_manager.sort_by = 'id'
+        close_dialog(changed=True)
+    else:
+        return
+
+
+
+def sort_by(event=None):
+    key = event.key_sequence[0].key
+    if key == 'n':
+        tracker_manager.sort_by = 'next'
+    elif key == 'l':
+        tracker_manager.sort_by = 'last'
+    elif key == 's':
+        tracker_manager.sort_by = 'subject'
+    elif key == 'm':
+        tracker_manager.sort_by = 'modified'
+    elif key == 'i':
+        tracker_manager.sort_by = 'id'
+    close_dialog(changed=True)
+
+
+def display_info(msg: str, doc_type: str = 'info'):
+    display_message(msg, 'info')
+    set_mode('info')
+
+
+@kb.add('c-g', filter=Condition(lambda: mode == 'main'))
+def show_jobs(*event):
+    """Show the scheduled jobs with their run times and missed deadlines and the render counters."""
+    display_info(f"{scheduler.report()}\n\n{render_report()}")
+
+def render_report() -> str:
+    r = render_stats
+    mean = r['frame_time'] / r['frames'] if r['frames'] else 0.0
+    return "\n".join([
+        f"frames:        {r['frames']}",
+        f"frame time:    {r['last_frame'] * 1000:.1f}ms last, {mean * 1000:.1f}ms mean, {r['max_frame'] * 1000:.1f}ms max",
+        f"lexed lists:   {r['documents']}",
+        f"lexed lines:   {r['lexed_lines']}",
+        f"cached lines:  {r['cached_lines']}",
+        ])
+
+
+def do_about(*event):
+    display_info('about track ...')
+
+
+def do_commands(*event):
+    output = ["Commands"]
+    for mode, bindings in mode2bindings.items():
+        if mode.startswith('handle'):
+            continue
+        output.append(f"   {mode}")
+        for key, command in bindings.items():
+            output.append(f"      {key: <8} {command.__name__}")
+    display_info("\n".join(output))
+
+def refresh_info(*event):
+    tracker_manager.submit(tracker_manager.refresh_info, then=refresh_list)
+
+def next_page(*event):
+    logger.debug("next page")
+    tracker_manager.next_page()
+    list_trackers(resort=False)
+
+def previous_page(*event):
+    logger.debug("previous page")
+    tracker_manager.previous_page()
+    list_trackers(resort=False)
+
+def toggle_virtual(*event):
+    """Switch between pages of 26 trackers and a list that scrolls a row at a time."""
+    tracker_manager.virtual = not tracker_manager.virtual
+    tracker_manager.active_page = 0
+    tracker_manager.top = 0
+    list_trackers(resort=False)
+
+def cursor_down(*event):
+    buffer = display_area.buffer
+    row = buffer.document.cursor_position_row
+    if tracker_manager.virtual and row >= len(tracker_manager.view_ids):
+        # at the bottom - bring the next tracker into view
+        if tracker_manager.scroll(1):
+            show_row(len(tracker_manager.view_ids))
+    else:
+        buffer.cursor_down()
+
+def cursor_up(*event):
+    buffer = display_area.buffer
+    row = buffer.document.cursor_position_row
+    if tracker_manager.virtual and row <= 1:
+        if tracker_manager.scroll(-1):
+            show_row(1)
+    else:
+        buffer.cursor_up()
+
+def show_row(row: int):
+    # redisplay the scrolled list with the cursor on row
+    display_message(tracker_manager.list_trackers(resort=False), 'list')
+    display_area.buffer.cursor_position = (
+        display_area.buffer.document.translate_row_col_to_index(row, 0)
+        )
+
+def list_trackers(*event, resort: bool = True):
+    """List trackers."""
+    set_mode('main')
+    display_message(tracker_manager.list_trackers(resort), 'list')
+    logger.debug(f"in list_trackers: {tracker_manager.get_tracker_from_id(tracker_manager.selected_id)= }")
+    logger.debug(f"in list_trackers: {tracker_manager.get_row_from_id(tracker_manager.selected_id)= }")
+    page, row = tracker_manager.selected_row
+    if (page, row) != (None, None):
+        logger.debug(f"{page = }, {row = }")
+        display_area.buffer.cursor_position = (
+            display_area.buffer.document.translate_row_col_to_index(row, 0)
+            )
+    app.layout.focus(display_area)
+    app.invalidate()
+
+def toggle_inspect(*event):
+    logger.debug("inspect tracker")
+    if mode == 'main':
+        tracker = tracker_manager.get_tracker_from_row()
+        if not tracker:
+            return
+        show_tracker_info(tracker.doc_id)
+    elif mode == 'inspect':
+        list_trackers()
+
+def toggle_analytics(*event):
+    logger.debug("tracker analytics")
+    if mode == 'main':
+        tracker = tracker_manager.get_tracker_from_row()
+        if not tracker:
+            return
+        set_mode('analytics')
+
+        def show(text):
+            if mode != 'analytics':
+                return
+            display_message(text or '', 'info')
+            app.layout.focus(display_area)
+        tracker_manager.read(tracker_manager.tracker_summary, tracker.doc_id, then=show)
+    elif mode == 'analytics':
+        list_trackers()
+
+
+# Find
+#
+# F starts an incremental search of the names of all the trackers, not
+# just the page shown as with '/'. Each key typed narrows the matches from
+# the name index, read on the storage worker, and shows the first,
+# whichever page it's on, and down and up go to the next and previous
+# matches.
+
+find_state = dict(query='', positions=[], current=0, before=None)
+
+def find(*event):
+    """Find trackers on any page by the beginnings of the words in their names."""
+    find_state.update(
+        query='', positions=[], current=0,
+        before=(tracker_manager.active_page, tracker_manager.top, tracker_manager.selected_id))
+    set_mode('find')
+    show_find()
+
+def find_type(event):
+    if len(event.data) == 1 and event.data.isprintable():
+        find_state['query'] += event.data
+        find_matches()
+
+def find_delete(*event):
+    find_state['query'] = find_state['query'][:-1]
+    find_matches()
+
+def find_matches():
+    query = find_state['query']
+
+    def show(doc_ids):
+        # skip the matches for a query that has since changed
+        if mode != 'find' or find_state['query'] != query:
+            return
+        find_state['positions'] = tracker_manager.find_positions(doc_ids)
+        find_state['current'] = 0
+        show_find()
+    tracker_manager.read(tracker_manager.find_trackers, query, then=show)
+
+def find_next(*event):
+    if find_state['positions']:
+        find_state['current'] = (find_state['current'] + 1) % len(find_state['positions'])
+        show_find()
+
+def find_previous(*event):
+    if find_state['positions']:
+        find_state['current'] = (find_state['current'] - 1) % len(find_state['positions'])
+        show_find()
+
+def show_find():
+    query, positions, current = find_state['query'], find_state['positions'], find_state['current']
+    if positions:
+        tracker_manager.go_to(positions[current])
+        found = f"{current + 1}/{len(positions)}"
+    else:
+        found = "no matches" if query.strip() else ""
+    message_control.text = f"find: {query}▏ {found}\nPress down and up for the next and previous matches, enter to select or escape to cancel."
+    display_message(tracker_manager.list_trackers(resort=False), 'list')
+    page, row = tracker_manager.selected_row
+    if positions and row:
+        display_area.buffer.cursor_position = (
+            display_area.buffer.document.translate_row_col_to_index(row, 0)
+            )
+    app.invalidate()
+
+def find_done(*event):
+    message_control.text = ''
+    list_trackers(resort=False)
+
+def find_cancel(*event):
+    tracker_manager.active_page, tracker_manager.top, tracker_manager.selected_id = find_state['before']
+    find_done()
+
+
+def first_page(*event):
+    tracker_manager.first_page()
+    list_trackers()
+
+def do_restore_defaults(*event):
+    tracker_manager.submit(
+        tracker_manager.restore_defaults,
+        then=lambda _: display_info("Defaults restored.", 'info'))
+
+def save_to_clipboard(*event):
+    # Access the content of the TextArea
+    if display_area.text:
+        import pyperclip
+        pyperclip.copy(display_area.text)
+        display_info('display copied to system clipboard', 'info')
+
+def do_help(*event):
+    help_text = read_readme()
+    display_info(wrap(help_text, 0), 'help')
+
+
+def close_dialog(event=None, changed=False):
+    input_area.text = ''
+    message_control.text = ''
+    if changed:
+        list_trackers()
+    set_mode('main')
+    app.layout.focus(display_area)
+
+def cancel(event=None):
+    close_dialog(event, False)
+
+def settings(event=None):
+    if mode == 'main':
+        message_control.text = "Editing settings. \nPress 'ctrl-s' to save changes or 'escape' to cancel"
+
+        def settings_yaml():
+            # the stored settings are only read on the storage worker
+            yaml_string = StringIO()
+            get_yaml().dump(tracker_manager.settings, yaml_string)
+            return yaml_string.getvalue()
+
+        def show(yaml_output):
+            if mode == 'settings' and not input_area.text:
+                input_area.text = yaml_output
+        app.layout.focus(input_area)
+        set_mode('settings')
+        tracker_manager.read(settings_yaml, then=show)
+    elif mode == 'settings':
+        yaml_string = input_area.text
+        changed = False
+        if yaml_string:
+            yaml_input = StringIO(yaml_string)
+            updated_settings = get_yaml().load(yaml_input)
+            tracker_manager.submit(tracker_manager.update_settings, updated_settings, then=refresh_list)
+            logger.debug(f"updated settings:\n{yaml_string}")
+            changed = True
+        close_dialog(changed=changed)
+
+
+def new(event=None):
+    if mode == 'main':
+        message_control.text = wrap("""\
+Enter the subject of the new tracker. Optionally append a comma and the datetime of the first completion, and again, optionally, another comma and the timedelta of the expected interval until the next completion, e.g. 'subject, 3p wed, +7d'.  Press 'enter' to save changes or '^c' to cancel.
+    """, 0)
+        app.layout.focus(input_area)
+        set_mode('new')
+    elif mode == 'new':
+        name = input_area.text.strip()
+        msg = []
+        changed = False
+        if name:
+            parts = [x.strip() for x in name.split(",")]
+            name = parts[0] if parts else None
+            date = parts[1] if len(parts) > 1 else None
+            interval = parts[2] if len(parts) > 2 else None
+            completions = []
+            if not name:
+                msg.append("No name provided.")
+            if date and not msg:
+                dtok, dt = Tracker.parse_dt(date)
+                if not dtok:
+                    msg.append(dt)
+                else:
+                    # add an initial completion at dt
+                    completions.append((dt, timedelta(0)))
+            if interval and not msg:
+                tdok, td = Tracker.parse_td(interval)
+                if not tdok:
+                    msg.append(td)
+                else:
+                    # add a fictitious completion at td before dt
+                    completions.append((dt-td, timedelta(0)))
+            if name:
+                tracker_manager.submit(
+                    _add_tracker, name, completions, name="new tracker", then=refresh_list)
+                changed = True
+                logger.debug(f"added tracker: {name}")
+            close_dialog(changed=changed)
+    else:
+        return
+
+def _add_tracker(name: str, completions: list[tuple[datetime, timedelta]]):
+    doc_id = tracker_manager.add_tracker(name)
+    for completion in completions:
+        tracker_manager.record_completion(doc_id, completion)
+    return doc_id
+
+
+def delete(event=None):
+    if mode == 'main':
+        tracker = tracker_manager.get_tracker_from_row()
+        if not tracker:
+            return
+        set_mode('delete')
+        message = f" Delete tracker [{tracker.doc_id}] {tracker.name}?\n Press 'y' to delete or 'n' to cancel.\n"
+        message_control.text = wrap(message, 0)
+        set_mode('delete')
+    elif mode == 'delete':
+        key = event.key_sequence[0].key
+        logger.debug(f"got key: {key = }")
+        changed = False
+        if key == 'y':
+            tracker_manager.submit(
+                tracker_manager.delete_tracker, tracker_manager.selected_id,
+                then=refresh_list, expect={tracker_manager.selected_id: None})
+            logger.debug(f"deleted tracker: {tracker_manager.selected_id}")
+            changed = True
+        close_dialog(changed=changed)
+    else:
+        return
+
+
+def complete(event=None):
+    if mode == 'main':
+        tracker = tracker_manager.get_tracker_from_row()
+        if not tracker:
+            return
+        message_control.text = wrap(f'Adding a new completion datetime for [{tracker.doc_id}] {tracker.name}.\nPress "Ctrl-S" to save changes or "escape" to cancel.', 0)
+        app.layout.focus(input_area)
+        set_mode('complete')
+    elif mode == 'complete':
+        changed = False
+        completion_str = input_area.text.strip()
+        ok = False
+        if completion_str:
+            ok, completion = Tracker.parse_completion(completion_str)
+            logger.debug(f"got completion_str: '{completion_str}'; {completion = } for {selected_id}")
+            if ok:
+                logger.debug(f"recording completion_dt: '{completion}' for {selected_id}")
+                doc_id = tracker_manager.selected_id
+                row = tracker_manager.row(doc_id)
+                last = max(completion[0], row.last) if row and row.last else completion[0]
+                tracker_manager.submit(
+                    tracker_manager.record_completion, doc_id, completion,
+                    then=lambda _: show_tracker_info(doc_id), expect=expect(doc_id, last=last))
+                changed = True
+        close_dialog(changed=changed)
+    else:
+        return
+
+
+def rename(event=None):
+    if mode == 'main':
+        tracker = tracker_manager.get_tracker_from_row()
+        if not tracker:
+            return
+        set_mode('rename')
+        message_control.text = f'Editing the name for [{tracker.doc_id}]{tracker.name}\nPress "Ctrl-S" to save changes or "escape" to cancel.'
+        input_area.text = tracker.name
+        app.layout.focus(input_area)
+        set_mode('rename')
+    elif mode == 'rename':
+        changed = False
+        name = input_area.text.strip()
+        if name:
+            logger.debug(f"got name: '{name}' for {selected_id}")
+            doc_id = tracker_manager.selected_id
+            tracker_manager.submit(
+                tracker_manager.rename_tracker, doc_id, name,
+                then=lambda _: show_tracker_info(doc_id), expect=expect(doc_id, name=name))
+            changed = True
+        close_dialog(changed=changed)
+    else:
+        return
+
+def history(event=None):
+    if mode == 'main':
+        tracker = tracker_manager.get_tracker_from_row()
+        if not tracker:
+            return
+        set_mode('history')
+        message_control.text = wrap(f'Editing the history of completions for [{tracker.doc_id}] {tracker.name}.\nModify, add or remove completions - one per line.\nPress "Ctrl-S" to save changes or "escape" to cancel.', 0)
+        # input_area.height = D(preferred=10, max=12)
+
+        def show(history):
+            if mode == 'history' and not input_area.text:
+                input_area.text = history or ''
+        app.layout.focus(input_area)
+        set_mode('history')
+        tracker_manager.read(tracker_manager.tracker_history, tracker.doc_id, then=show)
+    elif mode == 'history':
+        history = input_area.text.strip()
+        selected_id = tracker_manager.selected_id
+        if history:
+            logger.debug(f"starting history: '{history}' for {selected_id}")
+            try:
+                ok, completions = Tracker.parse_completions(history)
+                logger.debug(f"back from parse_completions: {ok = }, {completions = }")
+                if ok:
+                    logger.debug(f"recording '{completions}' for {selected_id}")
+                    tracker_manager.submit(
+                        tracker_manager.record_completions,
+                        selected_id,
+                        completions,
+                        then=lambda _: show_tracker_info(selected_id),
+                        expect=expect(selected_id, last=max((x[0] for x in completions), default=None)),
+                        )
+                    close_dialog(changed=True)
+                else:
+                    display_message(f"Invalid history: '{completions}'", 'error')
+            except Exception as e:
+                display_message(f"Invalid history: '{history}': {e}", 'error')
+        else:
+            logger.debug(f"removing all completions for {selected_id}")
+            tracker_manager.submit(
+                tracker_manager.remove_completions, selected_id,
+                then=lambda _: show_tracker_info(selected_id),
+                expect=expect(selected_id, last=None, next=None, average=None, spread=None))
+            close_dialog(changed=True)
+    else:
+        return
+
+
+def move_to_page(event):
+    page = event.key_sequence[0].key if event else None
+    if not page and page in range(1, 10):
+        return
+    logger.debug(f"got {page = }, {type(page) = }")
+
+    # tracker_manager.set_active_page(int(page)-1)
+    tracker_manager.set_page(int(page)-1)
+    list_trackers(resort=False)
+
+
+def move_to_tag(event):
+    tag = event.key_sequence[0].key if event else None
+    logger.debug(f"got {tag = }")
+    if not tag:
+        return
+    row = list(string.ascii_lowercase).index(tag) + 1
+    display_area.buffer.cursor_position = (
+        display_area.buffer.document.translate_row_col_to_index(row, 0)
+    )
+
+def set_mode_bindings():
+    page_keys = tuple([str(x) for x in range(1, 10)])
+    tag_keys = tuple([x for x in string.ascii_lowercase])
+    sort_keys = ('n', 'l', 'm', 's', 'i')
+    bool_keys = ('y', 'n')
+    mode2bindings = {
+        'main': OrderedDict([
+            ('.', toggle_shortcuts),
+            ('f1', menu),
+            ('f2', do_about),
+            ('f3', toggle_shortcuts),
+            ('f4', settings),
+            ('f5', do_help),
+            ('S', sort),
+            ('N', new),
+            ('C', complete),
+            ('R', rename),
+            ('H', history),
+            ('D', delete),
+            ('space', toggle_inspect),
+            ('A', toggle_analytics),
+            ('F', find),
+            ('left', previous_page),
+            ('right', next_page),
+            ('down', cursor_down),
+            ('up', cursor_up),
+            ('V', toggle_virtual),
+            (tag_keys, move_to_tag),
+            (page_keys, move_to_page),
+            ('c-i', refresh_info),
+            ('c-c', save_to_clipboard),
+            ('c-q', exit_app),
+            ]),
+        'inspect': {
+            'space': toggle_inspect,
+            '.': toggle_shortcuts,
+            },
+        'analytics': {
+            'A': toggle_analytics,
+            '.': toggle_shortcuts,
+            },
+        'sort': {
+            sort_keys: sort,
+            '.': toggle_shortcuts,
+            },
+        'new': {
+            'c-s': new,
+            # '.': toggle_shortcuts,
+            },
+        'delete': {
+            bool_keys: delete,
+            '.': toggle_shortcuts,
+            },
+        'complete' : {
+            'c-s': complete,
+            # '.': toggle_shortcuts,
+            },
+        'rename' : {
+            'c-s': rename,
+            # '.': toggle_shortcuts,
+            },
+        'history' : {
+            'c-s': history,
+            # '.': toggle_shortcuts,
+            },
+        'settings': {
+            'c-s': settings,
+            # '.': toggle_shortcuts,
+            },
+        'search': {
+            'escape': clear_search,
+            },
+        'find': {
+            '<any>': find_type,
+            'backspace': find_delete,
+            'down': find_next,
+            'up': find_previous,
+            'enter': find_done,
+            'escape': find_cancel,
+            },
+        'info': {
+            'escape': clear_info,
+            },
+        }
+
+    return mode2bindings
+
+mode2bindings = set_mode_bindings()
+
+def log_key_bindings(kb: KeyBindings):
+    log_output = []
+    for binding in kb.bindings:
+        keys = ' + '.join(str(key) for key in binding.keys)
+        handler = binding.handler.__name__
+        # Check for a filter (condition)
+        if binding.filter():
+            condition = binding.filter()  # Get the condition/filter applied
+            if condition == True:
+                log_output.append(f"       keys: {keys}, handler: {handler}, condition: {condition}")
+    logger.debug(f"key bindings for {mode}:\n" + '\n'.join(log_output))
+
+def is_active_mode(m: str)-> bool:
+    return m == mode
+
+
+def set_bindings():
+    """/
+    For each mode, add a binding for each key in mode2bindings[mode] to the corresponding method.
+    """
+    logger.debug("set bindings")
+    log_output = []
+    global kb
+    for current_mode, bindings in mode2bindings.items():
+        for key, method in bindings.items():
+            if isinstance(key, tuple):
+                for k in key:
+                    kb.add(k, filter=Condition(lambda m=current_mode: is_active_mode(m)), eager=True)(method)
+            else:
+                kb.add(key, filter=Condition(lambda m=current_mode: is_active_mode(m)),eager=True)(method)
+
+
+
+    for current_mode in ['new', 'complete', 'rename', 'history', 'handle_sort', 'delete', 'settings']:
+        kb.add('escape', filter=Condition(lambda m=current_mode: is_active_mode(m)), eager=True)(cancel)
+
+    # log_key_bindings(kb)
+
+
+menu_items=[
+    MenuItem(
+        "☰ task tracker",
+        children=[
+            MenuItem('F1 toggle menu', handler=menu),
+            MenuItem('F2 about trf', handler=do_about),
+            MenuItem('F3 edit settings', handler=settings),
+            MenuItem('F4 readme', handler=do_help),
+            MenuItem('.  show/hide shortcuts', handler=toggle_shortcuts),
+            MenuItem('^q exit', handler=exit_app),
+
+        ]
+    ),
+    # Label(text="trf: task record and forecast", style="class:menu-title"),
+    # Label(text="☰ task tracker", style="class:menu-title"),
+]
+
+# Create a MenuContainer using the custom menu bar
+root_container = MenuContainer(
+    body=body,
+    menu_items=menu_items,
+    floats=[]
+    )
+
+dialog_visible = [False]
+message_visable = [False]
+
+def set_mode(active_mode):
+    global dialog_visible, message_visible, float_visible, mode #, root_container
+    mode = active_mode
+    float_visible[0] = False
+    right_control.text = f"{'saving… ' if tracker_manager.pending else ''}{mode} "
+    dialog_visible[0] = (
+        mode in ['new', 'complete', 'rename', 'history', 'new', 'settings']
+        )
+    message_visible[0] = (
+        mode in ['delete', 'delete', 'sort', 'handle_sort', 'find']
+        )
+
+    logger.debug(f"setting float for mode {mode}")
+    if True: #not mode.startswith('handle'):
+        output = []
+        for key, command in mode2bindings.get(mode, {}).items():
+            if isinstance(key, tuple):
+                if len(key) > 2:
+                    name = f"{key[0]} {key[1]} … {key[-1]}"
+                else:
+                    name = " ".join([x for x in key])
+                output.append(f"{name: <8} {command.__name__}")
+
+                # output.append(f"{key[0]: <8} {key[1]: <8} {command.__name__}")
+            else:
+                if key.startswith('f'):
+                    continue
+                output.append(f"{key: <8} {command.__name__}")
+        if len(output) > 0:
+            # output.insert(0, f".        close this window")
+            float = set_float("\n".join(output), f"{mode} shortcuts")
+            logger.debug(f"{len(root_container.floats) = }")
+            # NOTE: floats[0] must be for the menu - don't remove it
+            while len(root_container.floats) > 1:
+                root_container.floats.pop(1)
+            logger.debug(f"{len(root_container.floats) = }")
+            root_container.floats.append(float)
+            logger.debug(f"{len(root_container.floats) = }")
+            # floats = [float]
+            logger.debug(f"{output = }")
+    logger.debug(f"dialog_visible: {dialog_visible}; message_visible: {message_visible}")
+    # log_key_bindings(kb)
+
+@kb.add('/', filter=Condition(lambda: mode not in ['new', 'complete', 'rename', 'history', 'settings', 'find']))
+def search_forward(event):
+    # Your custom logic to set search mode
+    logger.debug("setting search mode")
+    set_mode('search')
+    start_search(display_area.control)
+
+@kb.add('?', filter=Condition(lambda: mode not in ['new', 'complete', 'rename', 'history', 'settings', 'find']))
+def search_backward(event):
+    # Your custom logic to set search mode
+    logger.debug("setting search mode")
+    set_mode('search')
+    start_search(display_area.control, SearchDirection.BACKWARD)
+
+set_mode('main')
+
+set_bindings()
+
+status_area = VSplit(
+    [
+        status_window,
+        page_window,
+        right_window
+    ],
+    height=1,
+)
+
+def display_message(message: str, document_type: str = 'list'):
+    """Log messages to the text area."""
+    # logger.debug(f"display_message: {message}; {document_type = }")
+    set_lexer(document_type)
+    display_area.text = message
+    # message_control.text = ""
+    app.invalidate()  # Refresh the UI
+
+def display_notice(message: str, seconds: int = 2):
+    original_message = display_area.text
+    # set_mode('notice')
+    # logger.debug(f"display_notice: {message}; {original_message = }, {selected_mode = }, {message_visible = }")
+    logger.debug(f"setting display_area.text to {message}")
+    display_area.text = message
+    # display_message(message, 'info')
+    # app.invalidate()  # Refresh the UI
+    # logger.debug("starting thread")
+    threading.Thread(target=display_message_after_delay, args=(original_message, seconds,)).start()
+    # app.invalidate()
+
+def display_message_after_delay(message: str, seconds: int = 2):
+    # Sleep for 3 seconds without blocking the main thread
+    # logger.debug("about to sleep")
+    time.sleep(seconds)
+    # logger.debug("back from sleep")
+    display_area.text = message
+    return True
+    # app.invalidate()
+
+
+@kb.add('c-e')
+def add_example_trackers(*event):
+    tracker_manager.submit(_add_example_trackers, then=refresh_list)
+
+def _add_example_trackers():
+    _del_example_trackers()
+    from lorem.text import TextLorem
+    lm = TextLorem(srange=(2,3))
+    import random
+    today = datetime.now().replace(microsecond=0,second=0,minute=0,hour=0)
+    for i in range(1,49): # create 48 trackers
+        name = f"{lm.sentence()[:-1]}"
+        doc_id = 1000 + i # make sure id's don't conflict with existing trackers
+        tracker = Tracker(name, doc_id)
+        # Add the tracker to the trackers dictionary and the name index
+        tracker_manager.update_tracker(doc_id, tracker)
+        # intervals
+        due = today - timedelta(days=random.choice([-5, 0, 5, 10]))
+        avg =timedelta(days=random.choice([7, 10, 14]), hours=random.choice([8, 12, 16, 20]))
+        mad = avg / random.choice([12, 8, 6])
+        if i < 41:
+            completions = [due-2*avg, due-avg-mad, due]
+        elif i < 44:
+            completions = [due-avg-mad, due]
+        elif i < 47:
+            completions = [due]
+        else:
+            completions = []
+
+        for comp in completions:
+            hours = random.choice([0, 0, 0, 0, 0, 0, 12, 24, 36])
+            sign = random.choice([-1, 1])
+            if hours != 0:
+                orig_comp = comp
+                comp = (comp + timedelta(hours=hours), -timedelta(hours=hours)) if sign == 1 else (comp - timedelta(hours=hours), timedelta(hours=hours))
+                logger.debug(f"comp: {comp}; orig_comp: {orig_comp}; sign: {sign}; hours: {hours}")
+            tracker_manager.trackers[doc_id].record_completion(comp)
+        tracker_manager.save_data()
+        tracker_manager.trackers[doc_id].compute_info()
+
+
+@kb.add('c-t')
+def add_readme_trackers(*event):
+    tracker_manager.submit(_add_readme_trackers, then=refresh_list)
+
+def _add_readme_trackers():
+    header = """\
+# Automatically generated by trf.add_readme_trackers()
+# - do not edit here.
+
+other_replacements = {
+
+    }
+"""
+    _del_example_trackers()
+    import random
+    today = datetime.now().replace(microsecond=0,second=0,minute=0,hour=0)
+    names = { # name -> [next days + (before) or - (after) today, num completions]
+        'hot  -  tardy < now': [14, 3],
+        'warm - timely < now < tardy': [7, 3],
+        'cool - early < now < timely': [1, 3],
+        'cold - now < early': [-7, 3],
+        'two completions': [-7, 2],
+        'one completion': [0, 1],
+        'zero completions': [0, 0]
+        }
+    doc_id = 1000
+    for name in names.keys(): # create 6 trackers
+        doc_id += 1
+        tracker = Tracker(name, doc_id)
+        # Add the tracker to the trackers dictionary and the name index
+        tracker_manager.update_tracker(doc_id, tracker)
+        days, completions = names[name]
+        # intervals
+        due = today - timedelta(days=days)
+        avg = timedelta(days=random.choice([6, 7]), hours=random.choice([8, 12, 16, 20]))
+        mad = timedelta(days = 1, hours = random.choice([4, 8, 12]))
+        if completions == 3:
+            completions = [due-2*avg, due-avg-mad, due]
+        elif completions == 2:
+            completions = [due-avg-mad, due]
+        elif completions == 1:
+            completions = [due]
+        else:
+            completions = []
+
+        for comp in completions:
+            hours = random.choice([0, 0, 0, 0, 0, 6, 9, 12])
+            sign = random.choice([-1, 1])
+            if hours != 0:
+                orig_comp = comp
+                comp = (comp + timedelta(hours=hours), -timedelta(hours=hours)) if sign == 1 else (comp - timedelta(hours=hours), timedelta(hours=hours))
+                logger.debug(f"comp: {comp}; orig_comp: {orig_comp}; sign: {sign}; hours: {hours}")
+            tracker_manager.trackers[doc_id].record_completion(comp)
+        tracker_manager.save_data()
+        tracker_manager.trackers[doc_id].compute_info()
+
+
+@kb.add('c-r')
+def del_example_trackers(*event):
+    tracker_manager.submit(_del_example_trackers, then=refresh_list)
+
+def _del_example_trackers():
+    remove = []
+    for id, tracker in tracker_manager.trackers.items():
+        # if tracker.name.startswith('#'):
+        if tracker.doc_id >= 1000:
+            remove.append(id)
+    tracker_manager.delete_trackers(remove)
+
+
+def set_pages(txt: str):
+    page_control.text = f"{txt} "
+
+
+status_area = VSplit(
+    [
+        status_window,
+        page_window,
+        right_window
+    ],
+    height=1,
+)
+
+layout = Layout(root_container)
+
+def update_geometry():
+    size = app.output.get_size()
+    geometry.update(size.columns, size.rows)
+
+def relist():
+    if mode == 'main':
+        list_trackers()
+
+def on_resize():
+    # the name column of the list depends on the width. Resizes are noticed
+    # in before_render, which mustn't change what is being rendered, so the
+    # list is redone once that render is over and shown by the next.
+    if app.is_running:
+        call_in_ui(relist)
+    else:
+        relist()
+
+geometry.listeners.append(on_resize)
+
+# Redraws requested within a frame of the last one are combined into one
+app = Application(
+    layout=layout, key_bindings=kb, full_screen=True, mouse_support=True, style=style,
+    min_redraw_interval=FRAME_INTERVAL, max_render_postpone_time=FRAME_INTERVAL,
+    )
+
+def before_render(app):
+    render_stats['started'] = time.perf_counter()
+    # a resize redraws the screen, so checking the size before each render
+    # updates the geometry before anything is rendered at the new size
+    update_geometry()
+
+def after_render(app):
+    frame = time.perf_counter() - render_stats['started']
+    render_stats['frames'] += 1
+    render_stats['frame_time'] += frame
+    render_stats['last_frame'] = frame
+    render_stats['max_frame'] = max(render_stats['max_frame'], frame)
+
+app.before_render += before_render
+app.after_render += after_render
+
+app.layout.focus(root_container.body)
+
+
+command_server = CommandServer(socket_path(trf_home), partial(handle_command, tracker_manager, then=refresh_list))
+
+def on_start():
+    # called in the app's event loop before the first render
+    update_geometry()
+    start_periodic_checks()
+    app.create_background_task(command_server.start())
+
+def main():
+    try:
+        logger.info(f"Started TrackerManager with database file {db_path}")
+        display_text = tracker_manager.list_trackers()
+        display_message(display_text)
+        app.run(pre_run=on_start)
+    except Exception as e:
+        logger.error(f"exception raised:\n{e}")
+    else:
+        logger.error("exited tracker")
+    finally:
+        command_server.stop()
+        scheduler.stop()
+        tracker_manager.alarms.stop()
+        if tracker_manager:
+            tracker_manager.close()
+            logger.info(f"Closed TrackerManager and database file {db_path}")
+        else:
+            logger.info("TrackerManager was not initialized")
+
+if __name__ == "__main__":
+    main()
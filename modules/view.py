@@ -61,6 +61,7 @@ HelpText = """\
 - When list view is active:
     - **A**: Add a new chore.
     - **L**: Refresh the list of chores.
+    - **/**: Search for chores by name as you type. **Up** and **Down** select a chore, **PageUp** and **PageDown** show more matches and **Enter** shows the details of the selected chore.
     - **a**-**z**: Show the details of the chore tagged with the corresponding letter.
 - When details view is displaying a chore:
     - **C**: Complete the chore.
@@ -296,6 +297,93 @@ class AddChoreScreen(ModalScreen):
             self.dismiss(None)  # Close without adding chore
 
 
+class SearchScreen(ModalScreen):
+    """Screen for finding a chore by name, a page of matches at a time."""
+
+    PAGE = 10  # matches shown at once
+
+    def __init__(self, controller):
+        super().__init__()
+        self.controller = controller
+        # not query and offset, which Screen uses
+        self.search_text = ""
+        self.first_match = 0  # the number of matches before those shown
+        self.selected = 0  # in the matches shown
+        self.matches = []
+        self.more = False
+
+    def compose(self) -> ComposeResult:
+        """Create UI elements with a fixed footer."""
+        with Container(id="content"):  # Content container
+            yield Static("Search for chores named:", id="title")
+            yield Input(placeholder="Words or the start of words", id="search_input")
+            yield Static("", id="search_results")
+
+        yield Static(
+            "[bold yellow]Up[/bold yellow]/[bold yellow]Down[/bold yellow] select, "
+            "[bold yellow]PageUp[/bold yellow]/[bold yellow]PageDown[/bold yellow] more, "
+            "[bold yellow]Enter[/bold yellow] show, [bold yellow]ESC[/bold yellow] cancel",
+            id="footer",
+        )
+
+    def on_mount(self) -> None:
+        """Ensure the footer is styled properly."""
+        footer = self.query_one("#footer", Static)
+        footer.styles.margin_top = 1  # Ensures space between content and footer
+
+    def show_matches(self):
+        # one more than a page to tell whether there are more
+        matches = self.controller.search_chores(
+            self.search_text, self.PAGE + 1, self.first_match
+        )
+        self.more = len(matches) > self.PAGE
+        self.matches = matches[: self.PAGE]
+        self.selected = min(self.selected, max(len(self.matches) - 1, 0))
+        if not self.matches:
+            lines = ["[dim]No matching chores.[/dim]"] if self.search_text.strip() else []
+        else:
+            lines = []
+            for i, (chore_id, name, next) in enumerate(self.matches):
+                line = f"{Text(name).markup}  [dim]{fmt_dt(next)}[/dim]"
+                lines.append(f"[reverse]{line}[/reverse]" if i == self.selected else line)
+            first = self.first_match + 1
+            lines.append(
+                f"[dim]{first}-{first + len(self.matches) - 1}"
+                f"{' of more' if self.more else ''}[/dim]"
+            )
+        self.query_one("#search_results", Static).update("\n".join(lines))
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Search again from the first match as the query changes."""
+        self.search_text = event.value
+        self.first_match = self.selected = 0
+        self.show_matches()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        """Handle Enter key submission."""
+        if self.matches:
+            self.dismiss(self.matches[self.selected][0])
+
+    def on_key(self, event):
+        """Handle key presses for selection, paging and cancellation."""
+        if event.key == "escape":
+            self.dismiss(None)  # Close without choosing a chore
+        elif event.key == "down" and self.selected < len(self.matches) - 1:
+            self.selected += 1
+        elif event.key == "up" and self.selected > 0:
+            self.selected -= 1
+        elif event.key == "pagedown" and self.more:
+            self.first_match += self.PAGE
+            self.selected = 0
+        elif event.key == "pageup" and self.first_match:
+            self.first_match = max(self.first_match - self.PAGE, 0)
+            self.selected = 0
+        else:
+            return
+        event.stop()
+        self.show_matches()
+
+
 class IntervalInputScreen(ModalScreen):
     """Screen for entering an interval timedelta."""
 
@@ -568,7 +656,10 @@ class ScrollableList(ScrollView):
         # Extract the title and remaining lines
         # self.title = Text.from_markup(title) if title else Text("Untitled")
         width = shutil.get_terminal_size().columns - 3
-        self.lines = [Text.from_markup(line) for line in lines]  # Exclude the title
+        # parsed as they are first rendered - parsing the markup of every
+        # line up front takes seconds for a long list
+        self.lines = lines
+        self.texts = {}
         self.virtual_size = Size(
             width, len(self.lines)
         )  # Adjust virtual size for lines
@@ -586,7 +677,9 @@ class ScrollableList(ScrollView):
             return Strip.blank(self.size.width)
 
         # Get the Rich Text object for the current line
-        line_text = self.lines[y].copy()  # Create a copy to apply styles dynamically
+        if y not in self.texts:
+            self.texts[y] = Text.from_markup(self.lines[y])
+        line_text = self.texts[y].copy()  # Create a copy to apply styles dynamically
 
         # Highlight the line if it matches the search term
         # if self.search_term and y in self.matches:
@@ -680,14 +773,71 @@ class TextualView(App):
         self.selected_tag = None
         self.timestamp = None
         self.update_timer = None
+        self.backup_timer = None
         self.details = None
+        self.stale = False  # whether details is the saved snapshot
         self.full_screen_list = None  # Store the FullScreenList instance
 
     def on_mount(self):
         """Wait until the next full minute starts, then set an interval of 60s."""
-        self.action_update_list()  # Initial update
+        snapshot = self.controller.load_snapshot(self.app.size.width - 1)
+        if snapshot:
+            # paint the list saved last time at once and replace it when
+            # the query in reconcile_list is done
+            self.show_snapshot(snapshot)
+            self.run_worker(
+                self.reconcile_list, thread=True, exclusive=True, group="list"
+            )
+        else:
+            self.action_update_list()  # Initial update
         self.action_show_list()  # Start with list view
         self.update_timer = self.set_interval(1, self.maybe_update)
+        # check for a new daily backup now and then hourly
+        self.action_backup()
+        self.backup_timer = self.set_interval(3600, self.action_backup)
+
+    def action_backup(self):
+        """Back up the database in a worker thread."""
+        self.run_worker(
+            self.backup_database, thread=True, exclusive=True, group="backup"
+        )
+
+    def backup_database(self):
+        try:
+            self.controller.backup_database()
+        except Exception as e:
+            log_msg(f"Backup failed: {e}")
+            self.call_from_thread(
+                self.notify, f"Backup failed: {e}", severity="error"
+            )
+
+    def on_unmount(self):
+        if self.details and not self.stale:
+            self.controller.save_snapshot(self.details, self.app.size.width - 1)
+
+    def show_snapshot(self, snapshot: dict):
+        """Show the rows of the snapshot dimmed until they are reconciled."""
+        rows = snapshot["rows"]
+        self.details = rows[:1] + [f"[dim]{row}[/dim]" for row in rows[1:]]
+        self.stale = True
+        if snapshot["current"]:
+            self.afill = snapshot["afill"]
+        saved = datetime.fromtimestamp(snapshot["saved"]).strftime("%a %H:%M")
+        self.timestamp = f"{saved} [dim]updating…[/dim]"
+
+    def reconcile_list(self):
+        """Query the chores in a worker thread and then show the live list."""
+        try:
+            listed = self.controller.db_manager.read_chores()
+        except Exception as e:
+            log_msg(f"Reading the chores failed: {e}")
+            listed = None  # query again on the main thread
+        self.call_from_thread(self.show_reconciled, listed)
+
+    def show_reconciled(self, listed):
+        # unless a change has already replaced the snapshot
+        if self.stale:
+            self.action_update_list(datetime.now(), listed)
 
     def maybe_update(self):
         """Update the list if the current time is a full minute."""
@@ -706,15 +856,18 @@ class TextualView(App):
     #         seconds, self.refresh_update_timer, repeat=1
     #     )
 
-    def action_update_list(self, now: datetime = datetime.now()):
+    def action_update_list(self, now: datetime = datetime.now(), listed=None):
         """Show the list of chores using FullScreenList."""
         log_msg(f"{self.view = }")
+        width = self.app.size.width - 1
         chores = self.controller.show_chores_as_list(
-            self.app.size.width - 1
+            width, listed
         )  # Fetch chore data
         num_chores = len(chores) - 1
         self.afill = 1 if num_chores < 26 else 2 if num_chores < 676 else 3
         self.details = chores  # Title + chore data
+        self.stale = False
+        self.controller.save_snapshot(chores, width)
 
         self.timestamp = now.strftime("%a %H:%M")  # Format time
         log_msg(f"{self.view = }, {self.timestamp = }")
@@ -767,6 +920,15 @@ class TextualView(App):
 
         self.push_screen(AddChoreScreen(self.controller), callback=on_close)
 
+    def action_search(self):
+        """Find a chore by name and show its details."""
+
+        def on_close(chore_id):
+            if chore_id:
+                self.action_show_chore(chore_id)
+
+        self.push_screen(SearchScreen(self.controller), callback=on_close)
+
     def action_show_chore(self, tag: str):
         """Show details for a selected chore."""
         chore_id, name, last_completion, details, interval_tag_to_idx = (
@@ -921,6 +1083,8 @@ class TextualView(App):
                     self.action_show_chore(base26_tag)
             elif event.key == "A":
                 self.action_add_chore()
+            elif event.character == "/":
+                self.action_search()
             elif event.key == "L":
                 self.action_show_list()
             elif event.key == "Q":
@@ -0,0 +1,68 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+# Storage worker
+
+
+class StorageWorker:
+    """
+    Run storage commands one at a time, in the order submitted, on a
+    dedicated thread. ZODB connections are not thread safe, so every change
+    to the datastore, every commit and anything that reads the storage
+    files (e.g. backups) goes through a single worker and never blocks
+    the UI thread.
+    """
+
+    def __init__(self, name: str = "storage", nice: int = 0):
+        self.nice = nice
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) and return a Future for its result.
+        Commands submitted from the worker thread itself run immediately.
+        """
+        future = Future()
+        if threading.current_thread() is self.thread:
+            self._execute(future, fn, args, kwargs)
+        else:
+            self.queue.put((future, fn, args, kwargs))
+        return future
+
+    def stop(self, timeout: float = None):
+        """
+        Run the commands already queued and then stop the thread.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def _run(self):
+        if self.nice and hasattr(os, "setpriority"):
+            # on Linux this lowers the priority of just this thread and,
+            # unless an I/O priority has been set, its I/O priority with it
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            except OSError:
+                pass
+        while True:
+            command = self.queue.get()
+            if command is None:
+                break
+            self._execute(*command)
+
+    @staticmethod
+    def _execute(future: Future, fn: Callable, args: tuple, kwargs: dict):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)